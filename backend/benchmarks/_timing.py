@@ -0,0 +1,29 @@
+import os
+import statistics
+import time
+from typing import Callable
+
+# Benchmarks import the app's modules, whose settings need an API key
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+
+def median_ms(fn: Callable[[], object], runs: int = 20, warmup: int = 2) -> float:
+    """Median wall time of ``fn()`` in milliseconds, after ``warmup`` untimed calls"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def report(name: str, before_ms: float, after_ms: float):
+    speedup = before_ms / after_ms if after_ms else float("inf")
+    print(f"  {name:<28} {before_ms:9.2f} ms  {after_ms:9.2f} ms  {speedup:7.1f}x")
+
+
+def header(title: str, before: str = "before", after: str = "after"):
+    print(f"\n{title}")
+    print(f"  {'':<28} {before:>12}  {after:>12}  {'speedup':>7}")
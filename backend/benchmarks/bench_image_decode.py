@@ -0,0 +1,134 @@
+"""
+Benchmark of load_image() (draft()/reduce() before the final resample)
+against a full-resolution decode followed by LANCZOS, on 24MP uploads.
+
+Every case runs in a fresh process, so peak RSS growth measures that
+decode alone. Fixtures are generated into a temporary
+directory. Run from backend/:
+
+    python -m benchmarks.bench_image_decode [--runs 3]
+"""
+import argparse
+import io
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageOps
+
+# First: sets up the environment the app's settings need
+from . import _timing  # noqa: F401
+from services.image_utils import COVER_SIZE, load_image
+
+FIXTURE_SIZE = (6000, 4000)
+EXIF_ORIENTATION = 0x0112
+
+
+def full_decode(image_data: bytes) -> Image.Image:
+    """Decode at full resolution, then LANCZOS to the size load_image() produces"""
+    img = ImageOps.exif_transpose(Image.open(io.BytesIO(image_data))).convert('RGB')
+    scale = max(COVER_SIZE[0] / img.width, COVER_SIZE[1] / img.height)
+    return img.resize((round(img.width * scale), round(img.height * scale)), Image.Resampling.LANCZOS)
+
+
+def reduced_decode(image_data: bytes) -> Image.Image:
+    return load_image(image_data).image
+
+
+DECODERS = {"full": full_decode, "reduced": reduced_decode}
+
+
+def make_fixtures(directory: Path) -> dict:
+    """Photo-like 24MP JPEG and PNG (smooth gradients plus sensor noise), and a rotated JPEG"""
+    width, height = FIXTURE_SIZE
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 1, width, dtype=np.float32)
+    y = np.linspace(0, 1, height, dtype=np.float32)[:, None]
+    base = np.stack([x * 200 + y * 40, y * 180 + 30 + 0 * x, (1 - x) * y * 220], axis=-1)
+    pixels = np.clip(base + rng.normal(0, 12, base.shape), 0, 255).astype(np.uint8)
+    img = Image.fromarray(pixels)
+
+    fixtures = {"jpeg": directory / "photo.jpg", "png": directory / "photo.png", "jpeg_rotated": directory / "rotated.jpg"}
+    img.save(fixtures["jpeg"], "JPEG", quality=90)
+    img.save(fixtures["png"], "PNG", compress_level=1)
+    exif = Image.Exif()
+    exif[EXIF_ORIENTATION] = 6
+    img.save(fixtures["jpeg_rotated"], "JPEG", quality=90, exif=exif)
+    return fixtures
+
+
+def peak_rss_mib() -> float:
+    """Peak RSS of this process"""
+    try:
+        # Linux: VmHWM starts over at exec, unlike ru_maxrss which a child
+        # inherits from the process that spawned it
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # macOS reports bytes
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024)
+
+
+def run_case(decoder: str, path: str, runs: int):
+    """Child process: time one decoder on one file and print JSON"""
+    image_data = Path(path).read_bytes()
+    rss_before = peak_rss_mib()
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        img = DECODERS[decoder](image_data)
+        timings.append((time.perf_counter() - started) * 1000)
+        del img
+    print(json.dumps({"min_ms": min(timings), "rss_mib": peak_rss_mib() - rss_before}))
+
+
+def measure(decoder: str, path: Path, runs: int) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_image_decode", "--case", decoder, "--file", str(path), "--runs", str(runs)],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3, help="runs per case (minimum reported)")
+    parser.add_argument("--case", choices=DECODERS, help=argparse.SUPPRESS)
+    parser.add_argument("--file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.case:
+        run_case(args.case, args.file, args.runs)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fixtures = make_fixtures(Path(tmp))
+        print(f"Decode {FIXTURE_SIZE[0]}x{FIXTURE_SIZE[1]} to cover {COVER_SIZE[0]}x{COVER_SIZE[1]}: full decode -> load_image()")
+        for name in ("jpeg", "png"):
+            path = fixtures[name]
+            full = measure("full", path, args.runs)
+            reduced = measure("reduced", path, args.runs)
+            size_mb = path.stat().st_size / 1e6
+            print(
+                f"  {name.upper()} {size_mb:5.1f} MB  time {full['min_ms']:7.0f} ms -> {reduced['min_ms']:6.0f} ms"
+                f"   peak RSS +{full['rss_mib']:4.0f} MiB -> +{reduced['rss_mib']:4.0f} MiB"
+            )
+
+            image_data = path.read_bytes()
+            difference = np.abs(
+                np.asarray(full_decode(image_data), dtype=np.int16) - np.asarray(reduced_decode(image_data), dtype=np.int16)
+            ).mean()
+            print(f"  {'':<10} mean absolute pixel difference: {difference:.2f} / 255")
+
+        rotated = load_image(fixtures["jpeg_rotated"].read_bytes())
+        print(f"\n  EXIF orientation 6 JPEG decodes upright: {rotated.image.size} (original {rotated.original_size})")
+
+
+if __name__ == "__main__":
+    main()
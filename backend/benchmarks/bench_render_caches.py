@@ -0,0 +1,145 @@
+"""
+Micro-benchmark of the native renderer's cached paths: the full-bleed
+image overlay, gradient backgrounds, fonts and QR codes, each against the
+uncached code it replaced, plus whole full_hero and media_image_feature
+renders with the old and the cached overlay.
+
+Run from backend/:
+
+    python -m benchmarks.bench_render_caches [--runs 20]
+"""
+import argparse
+import io
+
+import numpy as np
+from PIL import Image, ImageChops, ImageDraw, ImageFont
+
+# First: sets up the environment the app's settings need
+from ._timing import header, median_ms, report
+from services.exporters import image_exporter
+from services.exporters.base import SlideData
+from services.exporters.fonts import BOLD, font_registry
+from services.exporters.gradients import gradient_cache, overlay_ramp, render_gradient
+from services.exporters.image_exporter import PNGExporter
+from services.exporters.qr import build_matrix, qr_cache, render_qr
+
+SIZE = (PNGExporter.WIDTH, PNGExporter.HEIGHT)
+OPACITY = 0.7
+URL = "https://example.com/research/2024/markets-under-pressure"
+
+
+def legacy_overlay(size, opacity) -> Image.Image:
+    """The overlay as _add_full_background_image drew it before the ramp cache"""
+    width, height = size
+    overlay = Image.new('RGBA', size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+    for y in range(height):
+        draw.line([(0, y), (width, y)], fill=(0, 0, 0, int(255 * (y / height) * opacity)))
+    return overlay
+
+
+def photo(size=(4000, 3000)) -> bytes:
+    """A smooth, photo-like JPEG upload"""
+    x = np.linspace(0, 1, size[0], dtype=np.float32)
+    y = np.linspace(0, 1, size[1], dtype=np.float32)[:, None]
+    pixels = np.stack([x * 255 + 0 * y, y * 255 + 0 * x, (x * y) * 255], axis=-1).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def bench_overlay(runs: int):
+    header("Full-bleed overlay (1920x1080, opacity 0.7)", "line draw", "cached ramp")
+    base = Image.new('RGBA', SIZE, (40, 80, 120, 255))
+
+    def old():
+        layer = legacy_overlay(SIZE, OPACITY)
+        base.copy().paste(layer, (0, 0), layer)
+
+    def new():
+        layer = overlay_ramp(SIZE, OPACITY)
+        base.copy().paste(layer, (0, 0), layer)
+
+    report("overlay step", median_ms(old, runs), median_ms(new, runs))
+
+    old_img, new_img = base.copy(), base.copy()
+    old_layer, new_layer = legacy_overlay(SIZE, OPACITY), overlay_ramp(SIZE, OPACITY)
+    old_img.paste(old_layer, (0, 0), old_layer)
+    new_img.paste(new_layer, (0, 0), new_layer)
+    diff = ImageChops.difference(old_img.convert('RGB'), new_img.convert('RGB')).getextrema()
+    print(f"  max RGB difference old vs new: {max(high for _, high in diff)}")
+
+
+def bench_slides(runs: int):
+    header("Whole native renders (upload decoded once, then cached)", "line draw", "cached ramp")
+    exporter = PNGExporter()
+    exporter.prepare()
+    image_data = photo()
+    slides = {
+        "full_hero": SlideData(
+            headline="Markets Under Pressure", description="What rising rates mean for startups.",
+            image_data=image_data, template_id="research_full_hero", slide_category="research_spotlight",
+            publication_link=URL,
+        ),
+        "media_image_feature": SlideData(
+            headline="Markets Under Pressure", description="What rising rates mean for startups.",
+            image_data=image_data, template_id="media_image_feature", slide_category="media_mention",
+            publication_link=URL,
+        ),
+    }
+    for name, slide_data in slides.items():
+        image_exporter.overlay_ramp = legacy_overlay
+        try:
+            old = median_ms(lambda: exporter._render_slide(slide_data), runs)
+        finally:
+            image_exporter.overlay_ramp = overlay_ramp
+        new = median_ms(lambda: exporter._render_slide(slide_data), runs)
+        report(name, old, new)
+
+
+def bench_gradient(runs: int):
+    header("Gradient background (1920x1080)", "render", "cache copy")
+    report(
+        "template gradient",
+        median_ms(lambda: render_gradient("#003DA5", "#0052CC", SIZE).convert('RGBA'), runs),
+        median_ms(lambda: gradient_cache.get("#003DA5", "#0052CC", SIZE, mode='RGBA'), runs),
+    )
+
+
+def bench_fonts(runs: int):
+    header("Fonts (bold, 8 sizes per slide)", "truetype()", "registry")
+    path = font_registry.resolve()[BOLD]
+    sizes = (18, 22, 28, 36, 44, 56, 64, 72)
+    if path is None:
+        print("  skipped: no TrueType font found, the registry uses Pillow's default font")
+        return
+    report(
+        "font lookups",
+        median_ms(lambda: [ImageFont.truetype(path, size) for size in sizes], runs),
+        median_ms(lambda: [font_registry.get(size, BOLD) for size in sizes], runs),
+    )
+
+
+def bench_qr(runs: int):
+    header("QR code (240 px)", "encode+draw", "cached")
+    report(
+        "qr image",
+        median_ms(lambda: render_qr(build_matrix(URL), 240, "#000000", "#ffffff"), runs),
+        median_ms(lambda: qr_cache.image(URL, 240), runs),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20, help="timed runs per case (median reported)")
+    args = parser.parse_args()
+
+    bench_overlay(args.runs)
+    bench_gradient(args.runs)
+    bench_fonts(args.runs)
+    bench_qr(args.runs)
+    bench_slides(args.runs)
+
+
+if __name__ == "__main__":
+    main()
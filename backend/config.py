@@ -4,6 +4,22 @@ from typing import List, Optional
 
 class Settings(BaseSettings):
     openai_api_key: str
+    # Alternative API endpoint (e.g. a proxy or a local mock server)
+    openai_base_url: Optional[str] = None
+
+    # OpenAI call limits - concurrent calls, tokens-per-minute budget (0 =
+    # unlimited), per-attempt timeout and overall deadline (seconds) including
+    # retries, and max attempts per call
+    openai_max_in_flight: int = 4
+    openai_tokens_per_minute: int = 30000
+    openai_timeout: float = 30.0
+    openai_deadline: float = 60.0
+    openai_max_attempts: int = 4
+
+    # Circuit breaker - consecutive failed calls before vision calls are
+    # skipped, and seconds before a probe call is let through again
+    openai_breaker_threshold: int = 5
+    openai_breaker_reset_seconds: float = 30.0
     cors_origins: str = "http://localhost:5173,http://localhost:3000"
 
     # Frontend URL for CORS (set in production to your Railway frontend URL)
@@ -13,6 +29,124 @@ class Settings(BaseSettings):
     # Leave empty to allow all origins (*)
     allowed_iframe_origins: Optional[str] = None
 
+    # Vision analyses (description + face position) cached per image hash
+    vision_cache_size: int = 256
+
+    # Persistent vision cache (SQLite). Exact re-uploads (same bytes) always
+    # hit; vision_cache_max_distance > 0 also reuses results for perceptual
+    # hashes within that many bits (re-encodes, resizes), at the risk of
+    # matching a different but similar-looking photo
+    vision_cache_enabled: bool = True
+    vision_cache_path: str = "./.vision_cache/vision.sqlite3"
+    vision_cache_ttl_seconds: float = 30 * 24 * 3600
+    vision_cache_max_entries: int = 10000
+    vision_cache_max_distance: int = 0
+
+    # Uploads are sent to the vision model as a proxy no larger than
+    # vision_max_edge px, re-encoded as vision_format ("jpeg" or "webp")
+    vision_max_edge: int = 1024
+    vision_quality: int = 85
+    vision_format: str = "jpeg"
+
+    # Face locators tried in order for smart cropping: "local" (OpenCV Haar
+    # cascade, on-CPU) and/or "llm" (GPT-4o Vision)
+    face_locator: str = "local,llm"
+
+    # Default render engine for PNG/JPG: "browser" (headless Chromium) or
+    # "native" (Pillow renderer, no browser). Can be overridden per request.
+    export_render_engine: str = "browser"
+
+    # Warm up the default engine's exporters at startup (precomputed
+    # gradient backgrounds for native, open render pages for browser)
+    export_warm_up: bool = True
+
+    # Cache of finished exports keyed by a hash of the slide content, format
+    # and renderer version. The disk tier is shared by workers on a host;
+    # set render_cache_disk_bytes=0 to keep only the memory tier.
+    render_cache_enabled: bool = True
+    render_cache_memory_bytes: int = 64 * 1024 * 1024
+    render_cache_dir: str = "./.render_cache"
+    render_cache_disk_bytes: int = 1024 * 1024 * 1024
+
+    # Native export - max cached 1920x1080 gradient backgrounds (~6MB each)
+    gradient_cache_size: int = 8
+
+    # Max cached QR codes (module grids per URL, images per URL and size)
+    qr_cache_size: int = 64
+
+    # Session store for processed metadata (uploaded image per session_id).
+    # Sessions expire session_ttl_seconds after last use; beyond the entry
+    # or byte budget the least recently used are evicted.
+    # Backends: "memory" (single worker), "sqlite" (all workers on one host,
+    # under session_store_dir) or "redis" (all workers and replicas)
+    session_store_backend: str = "memory"
+    session_ttl_seconds: float = 3600
+    session_max_bytes: int = 512 * 1024 * 1024
+    session_max_entries: int = 1000
+    session_store_dir: str = "./.sessions"
+    session_redis_url: str = "redis://localhost:6379/0"
+
+    # Decoded upload cache shared by image crops and native exports, bounded
+    # by decoded pixel bytes (uploads are downscaled to cover 1920x1080)
+    image_cache_max_bytes: int = 256 * 1024 * 1024
+
+    # Native export - directory searched first for the NeueHaasDisplay*.ttf
+    # faces (defaults to the bundled frontend/public/fonts)
+    font_dir: Optional[str] = None
+
+    # Browser export - directory of the prebuilt render bundle
+    # (frontend `npm run build:render` output). When unset, pages load the
+    # render route from render_url, which defaults to the Vite dev server.
+    render_bundle_dir: Optional[str] = None
+    render_url: Optional[str] = None
+
+    # Browser export - number of warm render pages kept per exporter, and how
+    # many renders a page serves before it is recycled to bound memory growth
+    browser_page_pool_size: int = 2
+    browser_page_max_renders: int = 100
+
+    # Native PNG/JPG and PPTX renders run in a process pool - worker count
+    # (unset = CPU count, 0 = render in a thread instead), renders per worker
+    # before it is replaced (0 = never), whether workers precompute fonts and
+    # gradients on start, and the per-render timeout in seconds
+    render_pool_workers: Optional[int] = None
+    render_pool_max_tasks_per_child: int = 200
+    render_pool_warm_up: bool = True
+    render_pool_task_timeout: float = 60.0
+
+    # Event-loop blocking instrumentation (reported under /metrics): time
+    # each request spends holding the loop, per route, plus a loop lag
+    # sampler every loop_monitor_interval seconds. Single blocking steps
+    # longer than loop_monitor_warn_ms are logged.
+    loop_monitor_enabled: bool = True
+    loop_monitor_interval: float = 0.05
+    loop_monitor_warn_ms: float = 100.0
+
+    # Export admission control - concurrent exports per format, how many more
+    # may queue, and how long (seconds) a queued export waits before a 503
+    export_max_concurrency: int = 2
+    export_max_queue: int = 8
+    export_queue_timeout: float = 20.0
+
+    # Batch and deck export - max slides per request, and how many batch
+    # slides render concurrently
+    export_batch_max_items: int = 100
+    export_batch_parallelism: int = 2
+
+    # Background export jobs (/jobs) - worker tasks, max waiting jobs, how
+    # long (seconds) and how many finished results are kept; set
+    # job_store_dir to persist the queue and results across restarts.
+    # A job rejected by export admission control is queued again after the
+    # Retry-After delay, at most job_max_retries times.
+    job_workers: int = 2
+    job_max_queue: int = 100
+    job_result_ttl_seconds: float = 3600
+    job_max_results: int = 500
+    job_store_dir: Optional[str] = None
+    job_max_retries: int = 20
+    # Budget for finished results held in memory (without job_store_dir)
+    job_max_result_bytes: int = 512 * 1024 * 1024
+
     @property
     def cors_origins_list(self) -> List[str]:
         origins = [origin.strip() for origin in self.cors_origins.split(",")]
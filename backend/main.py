@@ -25,8 +25,12 @@ from config import settings
 logger.info(f"Config loaded. CORS origins: {settings.cors_origins_list}")
 
 # Import routers
-from routers import templates_router, exports_router, images_router
-from routers.exports import get_supported_formats
+from routers import templates_router, exports_router, images_router, jobs_router
+from services.openai_service import openai_service
+from services.face_locator import face_locator
+from routers.exports import get_supported_formats, get_export_stats, get_session_stats, export_service, session_store
+from routers.jobs import get_job_stats, job_queue
+from services.loop_monitor import LoopMonitor
 logger.info("Routers loaded")
 
 
@@ -42,6 +46,13 @@ class IframeMiddleware(BaseHTTPMiddleware):
         return response
 
 
+# Event-loop blocking per route, reported under /metrics
+loop_monitor = LoopMonitor(
+    interval=settings.loop_monitor_interval,
+    warn_ms=settings.loop_monitor_warn_ms
+) if settings.loop_monitor_enabled else None
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
@@ -49,10 +60,21 @@ async def lifespan(app: FastAPI):
     logger.info("APPLICATION STARTUP")
     logger.info(f"CORS origins configured: {settings.cors_origins_list}")
     logger.info(f"OpenAI API key present: {bool(settings.openai_api_key)}")
+    logger.info(f"Default render engine: {export_service.default_engine.value}")
     logger.info("=" * 50)
+    if settings.export_warm_up:
+        await export_service.warm_up()
+    await job_queue.start()
+    if loop_monitor is not None:
+        loop_monitor.start()
     yield
     # Shutdown
     logger.info("APPLICATION SHUTDOWN")
+    if loop_monitor is not None:
+        await loop_monitor.close()
+    await job_queue.close()
+    await export_service.close()
+    await session_store.close()
 
 
 app = FastAPI(
@@ -62,6 +84,11 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Added first, so it is the innermost middleware and times the route
+# handler in its own task (IframeMiddleware runs call_next in a new task)
+if loop_monitor is not None:
+    app.add_middleware(loop_monitor.middleware)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -69,6 +96,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        "ETag", "X-Deck-Slides", "X-Deck-Images", "X-Deck-Image-References",
+        "X-Deck-Build-Ms", "X-Deck-Slide-Build-Ms", "X-Deck-Slide-Bytes"
+    ],
 )
 
 # Add iframe embedding support
@@ -78,6 +109,7 @@ app.add_middleware(IframeMiddleware)
 app.include_router(templates_router)
 app.include_router(exports_router)
 app.include_router(images_router)
+app.include_router(jobs_router)
 
 
 @app.get("/")
@@ -89,8 +121,12 @@ async def root():
         "endpoints": {
             "/process-metadata": "POST - Process slide metadata and analyze image",
             "/export": "POST - Export slide to specified format",
+            "/export/batch": "POST - Export many slides as a streamed ZIP archive",
+            "/export/deck": "POST - Export many slides as one streamed PPTX deck",
+            "/jobs/export": "POST - Queue a slide export; poll /jobs/{id}, download /jobs/{id}/result",
             "/templates/{category}": "GET - Get templates for a category",
-            "/health": "GET - Health check"
+            "/health": "GET - Health check",
+            "/metrics": "GET - Export queue, job queue, session store, vision cache, face locator and event loop statistics"
         }
     }
 
@@ -100,10 +136,23 @@ async def health_check():
     logger.info("Health check endpoint called")
     return {
         "status": "healthy",
+        "vision": "degraded" if openai_service.degraded else "ok",
         "supported_formats": get_supported_formats()
     }
 
 
+@app.get("/metrics")
+async def metrics():
+    return {
+        "exports": get_export_stats(),
+        "sessions": get_session_stats(),
+        "jobs": get_job_stats(),
+        "vision": openai_service.stats(),
+        "face_locator": face_locator.stats(),
+        "event_loop": loop_monitor.stats() if loop_monitor is not None else None
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
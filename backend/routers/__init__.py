@@ -3,5 +3,6 @@
 from .templates import router as templates_router
 from .exports import router as exports_router
 from .images import router as images_router
+from .jobs import router as jobs_router
 
-__all__ = ["templates_router", "exports_router", "images_router"]
+__all__ = ["templates_router", "exports_router", "images_router", "jobs_router"]
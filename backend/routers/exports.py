@@ -1,20 +1,22 @@
 """Export-related routes."""
 
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query
-from fastapi.responses import Response
+from fastapi import APIRouter, UploadFile, File, Form, Header, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from enum import Enum
+import json
 
-from services.exporters import ExportService, ExportFormat, SlideData
+from config import settings
+from services.exporters import ExportFormat, RenderEngine, SlideData, ExportOverloadedError
+from services.exporters.export_service import export_service
+from services.session_store import SessionNotFoundError, create_session_store
+from utils.zip_stream import ZipStreamWriter
 
 router = APIRouter(tags=["exports"])
 
-# Initialize export service
-export_service = ExportService()
-
-# Store for processed metadata (in production, use Redis or similar)
-_metadata_store: dict = {}
+# Store for processed metadata, bounded by TTL, entry count and bytes
+session_store = create_session_store(settings)
 
 
 class ExportFormatEnum(str, Enum):
@@ -23,6 +25,16 @@ class ExportFormatEnum(str, Enum):
     jpg = "jpg"
 
 
+class RenderEngineEnum(str, Enum):
+    browser = "browser"
+    native = "native"
+
+
+def _render_engine(engine: Optional[RenderEngineEnum]) -> Optional[RenderEngine]:
+    """Map the optional query parameter to a RenderEngine (None = configured default)."""
+    return RenderEngine(engine.value) if engine else None
+
+
 class ExportRequest(BaseModel):
     headline: str
     description: str
@@ -40,67 +52,116 @@ class ExportRequest(BaseModel):
     slide_category: Optional[str] = "research_spotlight"
 
 
+class BatchExportRequest(BaseModel):
+    items: List[ExportRequest]
+
+
 def get_metadata_store():
     """Get reference to metadata store."""
-    return _metadata_store
+    return session_store
 
 
-def store_metadata(session_id: str, data: dict):
+async def store_metadata(session_id: str, data: dict):
     """Store metadata for later retrieval."""
-    _metadata_store[session_id] = data
+    await session_store.put(session_id, data)
+
+
+async def build_slide_data(request: ExportRequest) -> SlideData:
+    """
+    Create SlideData for an export request, attaching the session image if any.
+
+    Raises:
+        SessionNotFoundError: the request names a session that has expired
+    """
+    image_data = None
+    if request.session_id:
+        session = await session_store.get(request.session_id)
+        if session is None:
+            raise SessionNotFoundError(request.session_id)
+        image_data = session.get("image_data")
+
+    return SlideData(
+        headline=request.headline,
+        description=request.description,
+        caption=request.caption,
+        author_name=request.author_name,
+        publication_link=request.publication_link,
+        image_data=image_data,
+        image_description=request.image_description,
+        template_id=request.template_id,
+        event_date=request.event_date,
+        event_time=request.event_time,
+        event_location=request.event_location,
+        slide_category=request.slide_category
+    )
+
+
+def export_filename(headline: str, extension: str) -> str:
+    """Build a download filename from the slide headline."""
+    safe_headline = "".join(c for c in headline[:30] if c.isalnum() or c in " -_").strip()
+    return f"slide_{safe_headline}{extension}"
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header value matches ``etag`` (weak comparison)."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
 
 
 @router.post("/export")
 async def export_slide(
     request: ExportRequest,
-    format: ExportFormatEnum = Query(default=ExportFormatEnum.pptx, description="Export format")
+    format: ExportFormatEnum = Query(default=ExportFormatEnum.pptx, description="Export format"),
+    engine: Optional[RenderEngineEnum] = Query(default=None, description="PNG/JPG render engine (default: server setting)"),
+    if_none_match: Optional[str] = Header(default=None)
 ):
     """
     Export slide to the specified format (pptx, png, or jpg).
     Returns the file directly for download.
+
+    The ETag is a hash of the slide content, format and renderer, so a
+    client that sends it back in If-None-Match gets 304 Not Modified without
+    anything being rendered.
     """
     try:
-        # Get image data from store if available
-        image_data = None
-        if request.session_id and request.session_id in _metadata_store:
-            image_data = _metadata_store[request.session_id].get("image_data")
-
-        # Create slide data
-        slide_data = SlideData(
-            headline=request.headline,
-            description=request.description,
-            caption=request.caption,
-            author_name=request.author_name,
-            publication_link=request.publication_link,
-            image_data=image_data,
-            image_description=request.image_description,
-            template_id=request.template_id,
-            event_date=request.event_date,
-            event_time=request.event_time,
-            event_location=request.event_location,
-            slide_category=request.slide_category
-        )
+        # Create slide data (with image from the session store if available)
+        slide_data = await build_slide_data(request)
 
         # Get the export format enum
         export_format = ExportFormat(format.value)
+        render_engine = _render_engine(engine)
+
+        etag = f'"{export_service.cache_key(slide_data, export_format, render_engine)}"'
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
 
         # Export
-        content = await export_service.export(slide_data, export_format)
+        content = await export_service.export(slide_data, export_format, render_engine)
         content_type = export_service.get_content_type(export_format)
         extension = export_service.get_file_extension(export_format)
 
         # Generate filename
-        safe_headline = "".join(c for c in request.headline[:30] if c.isalnum() or c in " -_").strip()
-        filename = f"slide_{safe_headline}{extension}"
+        filename = export_filename(request.headline, extension)
 
         return Response(
             content=content,
             media_type=content_type,
             headers={
-                "Content-Disposition": f'attachment; filename="{filename}"'
+                "Content-Disposition": f'attachment; filename="{filename}"',
+                "ETag": etag
             }
         )
 
+    except SessionNotFoundError as e:
+        raise HTTPException(status_code=410, detail=str(e))
+    except ExportOverloadedError as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -110,6 +171,110 @@ async def export_slide(
         )
 
 
+@router.post("/export/batch")
+async def export_batch(
+    request: BatchExportRequest,
+    format: ExportFormatEnum = Query(default=ExportFormatEnum.png, description="Export format for every slide"),
+    engine: Optional[RenderEngineEnum] = Query(default=None, description="PNG/JPG render engine (default: server setting)")
+):
+    """
+    Export many slides in one request.
+    Streams back a ZIP archive, adding each slide as soon as it is rendered.
+    A slide that fails to export is skipped; manifest.json at the end of the
+    archive lists the outcome of every item.
+    """
+    if not request.items:
+        raise HTTPException(status_code=400, detail="Batch must contain at least one slide")
+    if len(request.items) > settings.export_batch_max_items:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch is limited to {settings.export_batch_max_items} slides"
+        )
+
+    export_format = ExportFormat(format.value)
+    extension = export_service.get_file_extension(export_format)
+    try:
+        slides = [await build_slide_data(item) for item in request.items]
+    except SessionNotFoundError as e:
+        raise HTTPException(status_code=410, detail=str(e))
+
+    async def stream_archive():
+        writer = ZipStreamWriter()
+        manifest = [None] * len(slides)
+
+        async for index, content, error in export_service.export_batch(
+            slides, export_format, engine=_render_engine(engine)
+        ):
+            if error is not None:
+                manifest[index] = {"index": index, "status": "error", "error": str(error)}
+                continue
+            filename = f"{index + 1:03d}_{export_filename(slides[index].headline, extension)}"
+            manifest[index] = {"index": index, "status": "ok", "filename": filename}
+            yield writer.add(filename, content)
+
+        yield writer.add("manifest.json", json.dumps({"format": export_format.value, "items": manifest}, indent=2).encode())
+        yield writer.close()
+
+    return StreamingResponse(
+        stream_archive(),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f'attachment; filename="slides_{export_format.value}.zip"'
+        }
+    )
+
+
+@router.post("/export/deck")
+async def export_deck(request: BatchExportRequest):
+    """
+    Export many slides as a single PPTX deck, in request order (e.g. a
+    weekly screen loop). An image shared by several slides is embedded once.
+    The file is streamed while it is written.
+
+    Build statistics are returned as headers: X-Deck-Build-Ms (total), and
+    X-Deck-Slide-Build-Ms / X-Deck-Slide-Bytes with one comma-separated
+    value per slide.
+    """
+    if not request.items:
+        raise HTTPException(status_code=400, detail="Deck must contain at least one slide")
+    if len(request.items) > settings.export_batch_max_items:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Deck is limited to {settings.export_batch_max_items} slides"
+        )
+
+    try:
+        slides = [await build_slide_data(item) for item in request.items]
+        deck = await export_service.build_deck(slides)
+    except SessionNotFoundError as e:
+        raise HTTPException(status_code=410, detail=str(e))
+    except ExportOverloadedError as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error building deck: {str(e)}"
+        )
+
+    return StreamingResponse(
+        export_service.stream_deck(deck),
+        media_type=export_service.get_content_type(ExportFormat.PPTX),
+        headers={
+            "Content-Disposition": f'attachment; filename="deck_{len(slides)}_slides.pptx"',
+            "X-Deck-Slides": str(len(deck.slides)),
+            "X-Deck-Images": str(deck.images),
+            "X-Deck-Image-References": str(deck.image_references),
+            "X-Deck-Build-Ms": f"{deck.build_ms:.1f}",
+            "X-Deck-Slide-Build-Ms": ",".join(f"{slide.build_ms:.1f}" for slide in deck.slides),
+            "X-Deck-Slide-Bytes": ",".join(str(slide.bytes) for slide in deck.slides),
+        }
+    )
+
+
 @router.post("/export-with-image")
 async def export_slide_with_image(
     image: UploadFile = File(...),
@@ -119,7 +284,8 @@ async def export_slide_with_image(
     author_name: Optional[str] = Form(None),
     publication_link: Optional[str] = Form(None),
     template_id: str = Form("template1"),
-    format: ExportFormatEnum = Query(default=ExportFormatEnum.pptx)
+    format: ExportFormatEnum = Query(default=ExportFormatEnum.pptx),
+    engine: Optional[RenderEngineEnum] = Query(default=None)
 ):
     """
     Export slide with image upload in a single request.
@@ -144,13 +310,12 @@ async def export_slide_with_image(
         export_format = ExportFormat(format.value)
 
         # Export
-        content = await export_service.export(slide_data, export_format)
+        content = await export_service.export(slide_data, export_format, _render_engine(engine))
         content_type = export_service.get_content_type(export_format)
         extension = export_service.get_file_extension(export_format)
 
         # Generate filename
-        safe_headline = "".join(c for c in headline[:30] if c.isalnum() or c in " -_").strip()
-        filename = f"slide_{safe_headline}{extension}"
+        filename = export_filename(headline, extension)
 
         return Response(
             content=content,
@@ -160,6 +325,12 @@ async def export_slide_with_image(
             }
         )
 
+    except ExportOverloadedError as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -172,3 +343,13 @@ async def export_slide_with_image(
 def get_supported_formats():
     """Get list of supported export formats."""
     return [f.value for f in export_service.supported_formats]
+
+
+def get_session_stats():
+    """Get session store statistics."""
+    return session_store.stats()
+
+
+def get_export_stats():
+    """Get export queue and exporter statistics."""
+    return export_service.stats()
@@ -2,12 +2,15 @@
 
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, Tuple
+import asyncio
 import base64
 import hashlib
 
 from services.openai_service import openai_service
-from services.image_utils import crop_image_to_face
+from services.face_locator import face_locator
+from services.image_utils import crop_image_to_face, face_in_crop
+from services.session_store import SessionTooLargeError
 from .exports import store_metadata
 
 router = APIRouter(tags=["images"])
@@ -28,14 +31,25 @@ class ProcessMetadataResponse(BaseModel):
     metadata: dict
 
 
+def _crop_and_encode(image_data: bytes, face_detection: dict, output_size: int) -> Tuple[bytes, dict, str]:
+    """Decode, crop, resize and JPEG-encode the upload, plus its base64 form"""
+    cropped_image, crop_info = crop_image_to_face(
+        image_data,
+        face_detection,
+        output_size=output_size
+    )
+    return cropped_image, crop_info, base64.b64encode(cropped_image).decode('utf-8')
+
+
 @router.post("/analyze-and-crop-image", response_model=CropImageResponse)
 async def analyze_and_crop_image(
     image: UploadFile = File(...),
-    output_size: int = Query(default=800, description="Output image size in pixels")
+    output_size: int = Query(default=800, description="Output image size in pixels"),
+    bypass_cache: bool = Query(default=False, description="Analyze the image again instead of using a cached result")
 ):
     """
-    Analyze an uploaded image using GPT-4 Vision to detect face position,
-    then crop the image centered on the detected face.
+    Locate the face in an uploaded image (locally, falling back to GPT-4
+    Vision), then crop the image centered on the detected face.
 
     Returns the cropped image as base64 for preview and later use.
 
@@ -45,23 +59,32 @@ async def analyze_and_crop_image(
         image_data = await image.read()
         image_type = image.content_type or "image/jpeg"
 
-        # Step 1: Use GPT-4 Vision to detect face position
+        # Step 1: Detect face position with the configured locators
         print(f"Detecting face in uploaded image: {image.filename}")
-        face_detection = await openai_service.detect_face_position(
+        face_detection = await face_locator.locate(
             image_data,
-            image_type
+            image_type,
+            bypass_cache=bypass_cache
         )
         print(f"Face detection result: {face_detection}")
 
-        # Step 2: Crop image based on face detection
-        cropped_image, crop_info = crop_image_to_face(
-            image_data,
-            face_detection,
-            output_size=output_size
+        # Step 2: Crop image based on face detection. Decoding, resizing and
+        # encoding a large upload takes hundreds of ms, so it runs in a
+        # worker thread (Pillow releases the GIL) instead of on the event loop
+        cropped_image, crop_info, cropped_base64 = await asyncio.to_thread(
+            _crop_and_encode, image_data, face_detection, output_size
         )
 
-        # Convert to base64 for frontend
-        cropped_base64 = base64.b64encode(cropped_image).decode('utf-8')
+        # The frontend submits the cropped image to /process-metadata; register
+        # this call's description and face position for it too, so that step
+        # needs no second vision call
+        analysis = openai_service.cached_analysis(image_data)
+        if analysis is not None:
+            await openai_service.remember_analysis(cropped_image, {
+                "description": analysis["description"],
+                "confidence": analysis.get("confidence", 0.0),
+                **face_in_crop(face_detection, crop_info)
+            })
 
         return CropImageResponse(
             success=True,
@@ -93,7 +116,8 @@ async def process_metadata(
     publication_link: Optional[str] = Form(None),
     event_date: Optional[str] = Form(None),
     event_time: Optional[str] = Form(None),
-    event_location: Optional[str] = Form(None)
+    event_location: Optional[str] = Form(None),
+    bypass_cache: bool = Query(default=False, description="Analyze the image again instead of using a cached result")
 ):
     """
     Process metadata fields and analyze the uploaded image.
@@ -108,7 +132,8 @@ async def process_metadata(
             image_data = await image.read()
             image_description = await openai_service.analyze_image(
                 image_data,
-                image.content_type or "image/jpeg"
+                image.content_type or "image/jpeg",
+                bypass_cache=bypass_cache
             )
             print(f"Image analysis complete: {image_description}")
 
@@ -128,7 +153,7 @@ async def process_metadata(
 
         # Store image data for later export (keyed by some identifier)
         session_id = hashlib.md5(f"{headline}{description}".encode()).hexdigest()[:16]
-        store_metadata(session_id, {
+        await store_metadata(session_id, {
             "image_data": image_data,
             "image_description": image_description
         })
@@ -151,6 +176,8 @@ async def process_metadata(
             }
         )
 
+    except SessionTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -0,0 +1,144 @@
+"""Background export job routes."""
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import Response
+from dataclasses import asdict
+from typing import Any, Dict, Optional
+
+from config import settings
+from services.exporters import ExportFormat, ExportOverloadedError, ExportTimeoutError, RenderEngine, SlideData
+from services.job_queue import JobNotFoundError, JobQueue, JobQueueFullError, JobResult, JobRetryError, JobStatus
+from services.session_store import SessionNotFoundError
+from .exports import (
+    ExportFormatEnum, ExportRequest, RenderEngineEnum, build_slide_data, export_filename, export_service
+)
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+# Export jobs drained by a worker pool started in the app lifespan
+job_queue = JobQueue(
+    workers=settings.job_workers,
+    max_queue=settings.job_max_queue,
+    result_ttl=settings.job_result_ttl_seconds,
+    max_results=settings.job_max_results,
+    store_dir=settings.job_store_dir,
+    max_retries=settings.job_max_retries,
+    max_result_bytes=settings.job_max_result_bytes
+)
+
+
+async def run_export_job(payload: Dict[str, Any]) -> JobResult:
+    """Render one queued export; the payload is SlideData fields plus format/engine"""
+    payload = dict(payload)
+    export_format = ExportFormat(payload.pop("format"))
+    engine = payload.pop("engine")
+    slide_data = SlideData(**payload)
+
+    try:
+        content = await export_service.export(slide_data, export_format, RenderEngine(engine) if engine else None)
+    except ExportTimeoutError:
+        # The slide itself is too slow; running it again would time out again
+        raise
+    except ExportOverloadedError as e:
+        # Admission control is backpressure: wait and run the job again
+        raise JobRetryError(str(e), retry_after=e.retry_after)
+    return JobResult(
+        content=content,
+        content_type=export_service.get_content_type(export_format),
+        filename=export_filename(slide_data.headline, export_service.get_file_extension(export_format))
+    )
+
+
+job_queue.register("export", run_export_job)
+
+
+def _job_response(job) -> dict:
+    return {**job.describe(), "queue_position": job_queue.position(job)}
+
+
+def _get_job(job_id: str):
+    try:
+        return job_queue.get(job_id)
+    except JobNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.post("/export", status_code=202)
+async def submit_export_job(
+    request: ExportRequest,
+    format: ExportFormatEnum = Query(default=ExportFormatEnum.pptx, description="Export format"),
+    engine: Optional[RenderEngineEnum] = Query(default=None, description="PNG/JPG render engine (default: server setting)"),
+    priority: int = Query(default=0, ge=-10, le=10, description="Higher runs first")
+):
+    """
+    Queue a slide export and return its job id immediately.
+
+    Poll GET /jobs/{id} until the status is "succeeded", then download the
+    file from GET /jobs/{id}/result.
+    """
+    try:
+        # Resolve the session image now, so an expiring session cannot fail the job later
+        slide_data = await build_slide_data(request)
+    except SessionNotFoundError as e:
+        raise HTTPException(status_code=410, detail=str(e))
+
+    payload = {
+        **asdict(slide_data),
+        "format": format.value,
+        "engine": engine.value if engine else None,
+    }
+    try:
+        job = await job_queue.submit("export", payload, priority=priority)
+    except JobQueueFullError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    return _job_response(job)
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: str):
+    """Job status, with the queue position while it waits"""
+    return _job_response(_get_job(job_id))
+
+
+@router.get("/{job_id}/result")
+async def get_job_result(job_id: str):
+    """
+    Download the exported file of a succeeded job.
+    Returns 409 while the job is queued or running, or if it failed or was cancelled.
+    """
+    job = _get_job(job_id)
+    if job.status in (JobStatus.QUEUED, JobStatus.RUNNING):
+        raise HTTPException(
+            status_code=409,
+            detail=f"Job is {job.status.value}",
+            headers={"Retry-After": "1"}
+        )
+    if job.status != JobStatus.SUCCEEDED:
+        raise HTTPException(status_code=409, detail=f"Job {job.status.value}: {job.error or 'no result'}")
+
+    try:
+        content = await job_queue.result(job_id)
+    except JobNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return Response(
+        content=content,
+        media_type=job.content_type,
+        headers={"Content-Disposition": f'attachment; filename="{job.filename}"'}
+    )
+
+
+@router.delete("/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job, or delete a finished job and its result"""
+    _get_job(job_id)
+    job = await job_queue.cancel(job_id)
+    return _job_response(job)
+
+
+def get_job_stats():
+    """Get export job queue statistics."""
+    return job_queue.stats()
@@ -1,4 +1,5 @@
 from .openai_service import openai_service
-from .exporters import ExportService, export_service
+from .exporters import ExportService
+from .exporters.export_service import export_service
 
 __all__ = ["openai_service", "ExportService", "export_service"]
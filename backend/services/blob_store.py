@@ -0,0 +1,61 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+
+def blob_digest(data: bytes) -> str:
+    """Content address of a blob"""
+    return hashlib.sha256(data).hexdigest()
+
+
+class FileBlobStore:
+    """
+    Content-addressed blobs on the local filesystem.
+
+    Each blob is stored once under its SHA-256 (``ab/abcdef...``), so the
+    same upload referenced by several sessions occupies disk once. Writes go
+    through a temporary file and an atomic rename, so concurrent writers in
+    other processes never expose a partial blob.
+    """
+
+    def __init__(self, root: str):
+        self._root = Path(root).expanduser()
+        self._root.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    def path(self, digest: str) -> Path:
+        return self._root / digest[:2] / digest
+
+    def put(self, data: bytes) -> str:
+        """Store ``data`` if it is not stored yet and return its digest"""
+        digest = blob_digest(data)
+        path = self.path(digest)
+        if path.exists():
+            return digest
+        path.parent.mkdir(exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return digest
+
+    def get(self, digest: str) -> Optional[bytes]:
+        try:
+            return self.path(digest).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def delete(self, digest: str):
+        try:
+            self.path(digest).unlink()
+        except FileNotFoundError:
+            pass
@@ -1,22 +1,29 @@
-from .base import BaseExporter, ExportFormat, SlideData, TemplateConfig, CategoryTemplates, TemplateStyle, SlideCategory
-from .pptx_exporter import PPTXExporter
+from .base import BaseExporter, CpuBoundExporter, ExportFormat, RenderEngine, SlideData, TemplateConfig, CategoryTemplates, TemplateStyle, SlideCategory
+from .pptx_exporter import PPTXDeck, PPTXExporter
 from .image_exporter import PNGExporter, JPGExporter
 from .browser_exporter import BrowserExporter, BrowserPNGExporter, BrowserJPGExporter
 from .export_service import ExportService
+from .admission import AdmissionController, ExportOverloadedError, ExportTimeoutError
 
 __all__ = [
     "BaseExporter",
+    "CpuBoundExporter",
     "ExportFormat",
+    "RenderEngine",
     "SlideData",
     "TemplateConfig",
     "CategoryTemplates",
     "TemplateStyle",
     "SlideCategory",
     "PPTXExporter",
+    "PPTXDeck",
     "PNGExporter",
     "JPGExporter",
     "BrowserExporter",
     "BrowserPNGExporter",
     "BrowserJPGExporter",
     "ExportService",
+    "AdmissionController",
+    "ExportOverloadedError",
+    "ExportTimeoutError",
 ]
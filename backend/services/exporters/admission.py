@@ -0,0 +1,116 @@
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+
+from ..metrics import LatencyWindow
+
+
+class ExportOverloadedError(Exception):
+    """Raised when an export cannot be admitted; maps to a 429/503 response"""
+
+    def __init__(self, message: str, status_code: int = 503, retry_after: int = 1):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class ExportTimeoutError(ExportOverloadedError):
+    """Raised when an admitted export ran past its time limit; retrying the same slide is unlikely to help"""
+
+
+class AdmissionController:
+    """
+    Bounded concurrency with a bounded wait queue for one exporter.
+
+    At most ``max_concurrent`` exports run at once. Up to ``max_queue`` more
+    wait for a slot for at most ``queue_timeout`` seconds; beyond that the
+    request is rejected immediately so the caller can back off instead of
+    piling more work onto the process.
+    """
+
+    def __init__(self, name: str, max_concurrent: int = 2, max_queue: int = 8, queue_timeout: float = 20.0):
+        self.name = name
+        self._max_concurrent = max(1, max_concurrent)
+        self._max_queue = max(0, max_queue)
+        self._queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(self._max_concurrent)
+
+        self._in_flight = 0
+        self._waiting = 0
+        self._admitted = 0
+        self._rejected_queue_full = 0
+        self._rejected_timeout = 0
+        self._waits = LatencyWindow()
+        # Exponentially weighted average of time spent holding a slot
+        self._avg_service_time = 1.0
+
+    def _retry_after(self) -> int:
+        """Estimate seconds until a slot frees up for a new request"""
+        backlog = self._waiting + 1
+        return max(1, math.ceil(self._avg_service_time * backlog / self._max_concurrent))
+
+    @asynccontextmanager
+    async def admit(self):
+        """
+        Hold an export slot for the duration of the block.
+
+        Raises:
+            ExportOverloadedError: 429 when the wait queue is full, 503 when
+                no slot became free within the queue timeout
+        """
+        if self._semaphore.locked() and self._waiting >= self._max_queue:
+            self._rejected_queue_full += 1
+            raise ExportOverloadedError(
+                f"{self.name} export queue is full, try again later",
+                status_code=429,
+                retry_after=self._retry_after()
+            )
+
+        queued_at = time.monotonic()
+        if not self._semaphore.locked() and not self._waiting:
+            # Free slot: acquire() completes without suspending
+            await self._semaphore.acquire()
+        else:
+            self._waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self._queue_timeout)
+            except asyncio.TimeoutError:
+                self._rejected_timeout += 1
+                raise ExportOverloadedError(
+                    f"Timed out waiting for a free {self.name} export slot",
+                    status_code=503,
+                    retry_after=self._retry_after()
+                )
+            finally:
+                self._waiting -= 1
+
+        self._waits.record(time.monotonic() - queued_at)
+        self._admitted += 1
+        self._in_flight += 1
+
+        started_at = time.monotonic()
+        try:
+            yield
+        finally:
+            self._in_flight -= 1
+            self._semaphore.release()
+            service_time = time.monotonic() - started_at
+            self._avg_service_time = 0.8 * self._avg_service_time + 0.2 * service_time
+
+    def stats(self) -> dict:
+        """Queue depth and wait-time statistics for capacity planning"""
+        waits = self._waits.stats()
+        return {
+            "max_concurrent": self._max_concurrent,
+            "max_queue": self._max_queue,
+            "in_flight": self._in_flight,
+            "queue_depth": self._waiting,
+            "admitted": self._admitted,
+            "rejected_queue_full": self._rejected_queue_full,
+            "rejected_timeout": self._rejected_timeout,
+            "wait_ms_p50": waits["p50_ms"],
+            "wait_ms_p95": waits["p95_ms"],
+            "wait_ms_max": waits["max_ms"],
+            "avg_service_ms": round(self._avg_service_time * 1000, 1),
+        }
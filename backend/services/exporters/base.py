@@ -10,6 +10,11 @@ class ExportFormat(str, Enum):
     JPG = "jpg"
 
 
+class RenderEngine(str, Enum):
+    BROWSER = "browser"
+    NATIVE = "native"
+
+
 class SlideCategory(str, Enum):
     RESEARCH_SPOTLIGHT = "research_spotlight"
     STUDENT_SCREENS = "student_screens"
@@ -386,6 +391,15 @@ class SlideData:
 class BaseExporter(ABC):
     """Abstract base class for all exporters"""
 
+    # Part of the render cache key: bump whenever a change alters the output,
+    # so renders cached by the previous version are not served
+    RENDERER_VERSION = "1"
+
+    @property
+    def renderer_version(self) -> str:
+        """Identifies the renderer that produced an export"""
+        return self.RENDERER_VERSION
+
     @property
     @abstractmethod
     def format(self) -> ExportFormat:
@@ -416,3 +430,22 @@ class BaseExporter(ABC):
             Binary content of the exported file
         """
         pass
+
+
+class CpuBoundExporter(BaseExporter):
+    """
+    Base class for exporters that render synchronously on the CPU.
+    ExportService runs ``render`` off the event loop, in the render pool's
+    worker processes or in a thread.
+    """
+
+    async def export(self, slide_data: SlideData) -> bytes:
+        return self.render(slide_data)
+
+    @abstractmethod
+    def render(self, slide_data: SlideData) -> bytes:
+        """
+        Export the slide data synchronously. Must only depend on
+        ``slide_data`` (which is picklable) so it can run in a worker process.
+        """
+        pass
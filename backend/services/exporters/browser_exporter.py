@@ -1,27 +1,77 @@
 import base64
-import json
 import asyncio
-from typing import Optional
+import itertools
+import time
+from typing import Dict, Optional
 
 from playwright.async_api import async_playwright, Browser, Page
 
+from config import settings
+from ..metrics import LatencyWindow
 from .base import BaseExporter, ExportFormat, SlideData
+from .page_pool import RenderPagePool
+from .render_bundle import RenderBundle
 
 
 class BrowserExporter(BaseExporter):
     """
     Export slides by rendering them in a headless browser and taking screenshots.
     This ensures pixel-perfect match with the frontend preview.
+
+    When ``RENDER_BUNDLE_DIR`` is configured the prebuilt render bundle is
+    served to the browser from memory; otherwise pages load the render route
+    from ``RENDER_URL`` (the Vite dev server by default).
     """
 
     RENDER_URL = "http://localhost:5173/render"
     VIEWPORT_WIDTH = 1920
     VIEWPORT_HEIGHT = 1080
 
+    # Resolves once web fonts are loaded and every slide image is decoded,
+    # then waits one frame so the decoded images are painted. Returns how
+    # long each step took (ms).
+    ASSETS_READY_SCRIPT = """async () => {
+        const start = performance.now();
+        await document.fonts.ready;
+        const fontsDone = performance.now();
+        const images = Array.from(document.querySelectorAll('#slide-render-container img'));
+        await Promise.all(images.map((img) => img.decode().catch(() => undefined)));
+        const imagesDone = performance.now();
+        await new Promise((resolve) => requestAnimationFrame(() => resolve()));
+        return {
+            fonts: fontsDone - start,
+            images: imagesDone - fontsDone,
+            paint: performance.now() - imagesDone,
+        };
+    }"""
+
+    # Render stages timed per export, reported by stats()
+    TIMED_STAGES = ("data_ready", "fonts", "images", "paint", "screenshot", "total")
+
     def __init__(self, format: ExportFormat = ExportFormat.PNG):
         self._format = format
         self._browser: Optional[Browser] = None
         self._playwright = None
+        self._browser_lock = asyncio.Lock()
+        self._render_ids = itertools.count(1)
+        self._timings: Dict[str, LatencyWindow] = {stage: LatencyWindow() for stage in self.TIMED_STAGES}
+        self._bundle: Optional[RenderBundle] = None
+        if settings.render_bundle_dir:
+            self._bundle = RenderBundle(settings.render_bundle_dir)
+            self._render_url = self._bundle.url
+        else:
+            self._render_url = settings.render_url or self.RENDER_URL
+        self._pool = RenderPagePool(
+            self._open_render_page,
+            size=settings.browser_page_pool_size,
+            max_renders=settings.browser_page_max_renders
+        )
+
+    @property
+    def renderer_version(self) -> str:
+        """Includes the render bundle fingerprint, so a rebuilt bundle misses the cache"""
+        source = self._bundle.fingerprint if self._bundle is not None else self._render_url
+        return f"{self.RENDERER_VERSION}+{source}"
 
     @property
     def format(self) -> ExportFormat:
@@ -40,13 +90,38 @@ class BrowserExporter(BaseExporter):
         return ".jpg"
 
     async def _ensure_browser(self):
-        """Ensure browser is launched"""
-        if self._browser is None:
-            self._playwright = await async_playwright().start()
-            self._browser = await self._playwright.chromium.launch(
-                headless=True,
-                args=['--no-sandbox', '--disable-setuid-sandbox']
-            )
+        """Ensure browser is launched (and relaunch it if it has crashed)"""
+        async with self._browser_lock:
+            if self._browser is not None and not self._browser.is_connected():
+                self._browser = None
+            if self._browser is None:
+                if self._playwright is None:
+                    self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(
+                    headless=True,
+                    args=['--no-sandbox', '--disable-setuid-sandbox']
+                )
+
+    async def _open_render_page(self) -> Page:
+        """Open a page on the render route and wait until it accepts slide data"""
+        await self._ensure_browser()
+
+        page: Page = await self._browser.new_page(
+            viewport={'width': self.VIEWPORT_WIDTH, 'height': self.VIEWPORT_HEIGHT}
+        )
+        try:
+            if self._bundle is not None:
+                # Bundle requests are answered from memory, so there is no
+                # network to wait on beyond the load event
+                await self._bundle.install(page)
+                await page.goto(self._render_url, wait_until='load')
+            else:
+                await page.goto(self._render_url, wait_until='networkidle')
+            await page.wait_for_function('window.__SLIDE_RENDER_READY__ === true', timeout=10000)
+        except Exception:
+            await page.close()
+            raise
+        return page
 
     async def _prepare_slide_data(self, slide_data: SlideData) -> dict:
         """Convert SlideData to JSON-serializable dict for frontend"""
@@ -104,31 +179,27 @@ class BrowserExporter(BaseExporter):
         Returns:
             Binary content of the screenshot (PNG or JPG)
         """
-        await self._ensure_browser()
-
-        # Prepare data for frontend
+        # Prepare data for frontend; the render id lets us wait for this
+        # render specifically on a page that has served earlier exports
         data = await self._prepare_slide_data(slide_data)
+        render_id = str(next(self._render_ids))
+        data['renderId'] = render_id
 
-        # Create new page with exact viewport
-        page: Page = await self._browser.new_page(
-            viewport={'width': self.VIEWPORT_WIDTH, 'height': self.VIEWPORT_HEIGHT}
-        )
-
-        try:
-            # Navigate to render page (without data in URL)
-            await page.goto(self.RENDER_URL, wait_until='networkidle')
-
-            # Wait for the component to be ready to receive data
-            await page.wait_for_function('window.__SLIDE_RENDER_READY__ === true', timeout=10000)
-
+        started = time.monotonic()
+        async with self._pool.page() as page:
             # Inject the slide data via JavaScript
-            await page.evaluate(f'window.__setSlideData__({json.dumps(data)})')
+            await page.evaluate('(data) => window.__setSlideData__(data)', data)
 
             # Wait for the component to signal it's ready (after rendering)
-            await page.wait_for_selector('#slide-render-container[data-status="ready"]', timeout=10000)
+            await page.wait_for_selector(
+                f'#slide-render-container[data-status="ready"][data-render-id="{render_id}"]',
+                timeout=10000
+            )
+            data_ready = time.monotonic()
 
-            # Small additional delay to ensure fonts are loaded
-            await asyncio.sleep(0.2)
+            # Wait for fonts and image decodes instead of a fixed delay
+            asset_timings = await page.evaluate(self.ASSETS_READY_SCRIPT)
+            assets_ready = time.monotonic()
 
             # Find the slide container and screenshot it
             container = await page.query_selector('#slide-render-container')
@@ -146,14 +217,30 @@ class BrowserExporter(BaseExporter):
                     quality=95 if self._format == ExportFormat.JPG else None,
                     clip={'x': 0, 'y': 0, 'width': self.VIEWPORT_WIDTH, 'height': self.VIEWPORT_HEIGHT}
                 )
+            finished = time.monotonic()
 
-            return screenshot_bytes
+        self._timings["data_ready"].record(data_ready - started)
+        for stage in ("fonts", "images", "paint"):
+            self._timings[stage].record(asset_timings.get(stage, 0) / 1000)
+        self._timings["screenshot"].record(finished - assets_ready)
+        self._timings["total"].record(finished - started)
 
-        finally:
-            await page.close()
+        return screenshot_bytes
+
+    async def warm_up(self):
+        """Launch the browser and pre-open the render page pool"""
+        await self._pool.warm_up()
+
+    def stats(self) -> dict:
+        """Render page pool statistics and per-stage render timings"""
+        return {
+            "pool": self._pool.stats(),
+            "timings": {stage: window.stats() for stage, window in self._timings.items()},
+        }
 
     async def close(self):
-        """Close browser instance"""
+        """Close pooled pages and the browser instance"""
+        await self._pool.close()
         if self._browser:
             await self._browser.close()
             self._browser = None
@@ -1,54 +1,319 @@
-from typing import Dict, Type
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Type
 
-from .base import BaseExporter, ExportFormat, SlideData
-from .pptx_exporter import PPTXExporter
+from config import settings
+from ..singleflight import SingleFlight
+from .admission import AdmissionController
+from .base import BaseExporter, CpuBoundExporter, ExportFormat, RenderEngine, SlideData
+from .pptx_exporter import PPTXDeck, PPTXExporter
+from .image_exporter import PNGExporter, JPGExporter
 from .browser_exporter import BrowserPNGExporter, BrowserJPGExporter
+from .render_cache import RenderCache, render_cache_key
+from .render_pool import RenderPool
+
+logger = logging.getLogger(__name__)
+
+
+class _DeckStreamClosed(Exception):
+    """Raised inside the writer thread once the consumer has gone away"""
+
+
+class _LoopSink:
+    """
+    Write-only stream filled by a worker thread and drained on the event
+    loop: writes are buffered up to ``chunk_size`` bytes, then handed to a
+    bounded asyncio queue. A full queue blocks the writer, so a slow client
+    slows the writer down instead of the deck piling up in memory. After
+    ``close()`` a blocked or later write raises, which stops the writer.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, queue: asyncio.Queue, chunk_size: int):
+        self._loop = loop
+        self._queue = queue
+        self._chunk_size = chunk_size
+        self._buffer = bytearray()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._pending: Optional[concurrent.futures.Future] = None
+
+    def _put(self, item):
+        with self._lock:
+            if self._closed:
+                raise _DeckStreamClosed()
+            self._pending = asyncio.run_coroutine_threadsafe(self._queue.put(item), self._loop)
+        try:
+            self._pending.result()
+        except concurrent.futures.CancelledError:
+            raise _DeckStreamClosed()
+
+    def write(self, data) -> int:
+        self._buffer += data
+        if len(self._buffer) >= self._chunk_size:
+            self._put(bytes(self._buffer))
+            self._buffer.clear()
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def run(self, write, *args):
+        """Call ``write(*args, self)``, then queue the tail and an end marker (or the error)"""
+        try:
+            write(*args, self)
+            if self._buffer:
+                self._put(bytes(self._buffer))
+            self._put(None)
+        except _DeckStreamClosed:
+            pass
+        except Exception as e:
+            try:
+                self._put(e)
+            except _DeckStreamClosed:
+                pass
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            if self._pending is not None:
+                self._pending.cancel()
 
 
 class ExportService:
     """
     Facade for all export operations.
     Provides a unified interface for exporting slides to various formats.
+
+    PNG/JPG can be produced by two render engines: ``browser`` (headless
+    Chromium screenshot of the frontend render route) and ``native`` (the
+    Pillow renderer, no browser involved). The default engine comes from
+    EXPORT_RENDER_ENGINE and can be overridden per export. PPTX is the same
+    for both engines.
     """
 
     def __init__(self):
-        self._exporters: Dict[ExportFormat, BaseExporter] = {}
+        self._engines: Dict[RenderEngine, Dict[ExportFormat, BaseExporter]] = {
+            engine: {} for engine in RenderEngine
+        }
+        self._admission: Dict[BaseExporter, AdmissionController] = {}
+        self.default_engine = RenderEngine(settings.export_render_engine)
+        self._render_cache: Optional[RenderCache] = None
+        if settings.render_cache_enabled:
+            self._render_cache = RenderCache(
+                settings.render_cache_memory_bytes,
+                disk_dir=settings.render_cache_dir,
+                disk_max_bytes=settings.render_cache_disk_bytes
+            )
+        # Identical exports requested concurrently share one render
+        self._inflight = SingleFlight("export")
+        # CPU-bound exporters render in worker processes (or, with the pool
+        # disabled, in a thread) so they never block the event loop
+        self._render_pool: Optional[RenderPool] = None
+        if settings.render_pool_workers != 0:
+            self._render_pool = RenderPool(
+                workers=settings.render_pool_workers,
+                max_tasks_per_child=settings.render_pool_max_tasks_per_child,
+                warm_up=settings.render_pool_warm_up,
+                task_timeout=settings.render_pool_task_timeout,
+                image_cache_max_bytes=settings.image_cache_max_bytes
+            )
         self._register_exporters()
 
     def _register_exporters(self):
         """Register all available exporters"""
-        self._register(PPTXExporter())
-        self._register(BrowserPNGExporter())
-        self._register(BrowserJPGExporter())
+        pptx_exporter = PPTXExporter()
+        self._register(pptx_exporter, RenderEngine.BROWSER)
+        self._register(pptx_exporter, RenderEngine.NATIVE)
+        self._register(BrowserPNGExporter(), RenderEngine.BROWSER)
+        self._register(BrowserJPGExporter(), RenderEngine.BROWSER)
+        self._register(PNGExporter(), RenderEngine.NATIVE)
+        self._register(JPGExporter(), RenderEngine.NATIVE)
 
-    def _register(self, exporter: BaseExporter):
-        """Register an exporter"""
-        self._exporters[exporter.format] = exporter
+    def _register(self, exporter: BaseExporter, engine: RenderEngine):
+        """Register an exporter for an engine, with its own admission controller"""
+        self._engines[engine][exporter.format] = exporter
+        if exporter not in self._admission:
+            self._admission[exporter] = AdmissionController(
+                exporter.format.value,
+                max_concurrent=settings.export_max_concurrency,
+                max_queue=settings.export_max_queue,
+                queue_timeout=settings.export_queue_timeout
+            )
 
-    def get_exporter(self, format: ExportFormat) -> BaseExporter:
-        """Get exporter for a specific format"""
-        if format not in self._exporters:
+    def get_exporter(self, format: ExportFormat, engine: Optional[RenderEngine] = None) -> BaseExporter:
+        """Get exporter for a specific format (and engine, default if omitted)"""
+        exporters = self._engines[engine or self.default_engine]
+        if format not in exporters:
             raise ValueError(f"Unsupported export format: {format}")
-        return self._exporters[format]
+        return exporters[format]
 
     @property
     def supported_formats(self) -> list[ExportFormat]:
         """List all supported export formats"""
-        return list(self._exporters.keys())
+        return list(self._engines[self.default_engine].keys())
+
+    def cache_key(
+        self,
+        slide_data: SlideData,
+        format: ExportFormat,
+        engine: Optional[RenderEngine] = None
+    ) -> str:
+        """
+        Content hash identifying the export of ``slide_data`` in ``format``.
+        Equal keys mean byte-for-byte interchangeable exports, so the key
+        doubles as the ETag of the download.
+        """
+        engine = engine or self.default_engine
+        exporter = self.get_exporter(format, engine)
+        return render_cache_key(slide_data, format, engine, exporter.renderer_version)
 
-    async def export(self, slide_data: SlideData, format: ExportFormat) -> bytes:
+    async def export(
+        self,
+        slide_data: SlideData,
+        format: ExportFormat,
+        engine: Optional[RenderEngine] = None
+    ) -> bytes:
         """
         Export slide to the specified format.
+        Finished exports are served from the render cache when enabled, and
+        concurrent identical exports share a single render.
 
         Args:
             slide_data: The slide content and configuration
             format: The desired export format
+            engine: Render engine to use; defaults to the configured engine
 
         Returns:
             Binary content of the exported file
+
+        Raises:
+            ExportOverloadedError: If the exporter's queue is full or the
+                wait for a free slot timed out
+        """
+        exporter = self.get_exporter(format, engine)
+        key = self.cache_key(slide_data, format, engine)
+        return await self._inflight.do(key, lambda: self._export(exporter, key, slide_data))
+
+    async def _export(self, exporter: BaseExporter, key: str, slide_data: SlideData) -> bytes:
+        """Render through the cache (when enabled) and admission control"""
+        if self._render_cache is None:
+            async with self._admission[exporter].admit():
+                return await self._render(exporter, slide_data)
+
+        content = await self._render_cache.get(key)
+        if content is not None:
+            return content
+        async with self._admission[exporter].admit():
+            content = await self._render(exporter, slide_data)
+        await self._render_cache.put(key, content)
+        return content
+
+    def _in_pool(self, exporter: BaseExporter) -> bool:
+        """Whether the exporter renders in the render pool's worker processes"""
+        return isinstance(exporter, CpuBoundExporter) and self._render_pool is not None
+
+    async def _render(self, exporter: BaseExporter, slide_data: SlideData) -> bytes:
+        """Run the exporter: CPU-bound ones off the event loop, the rest directly"""
+        if not isinstance(exporter, CpuBoundExporter):
+            return await exporter.export(slide_data)
+        if self._in_pool(exporter):
+            return await self._render_pool.render(exporter, slide_data)
+        return await asyncio.to_thread(exporter.render, slide_data)
+
+    async def export_batch(
+        self,
+        slides: List[SlideData],
+        format: ExportFormat,
+        parallelism: Optional[int] = None,
+        engine: Optional[RenderEngine] = None
+    ) -> AsyncIterator[Tuple[int, Optional[bytes], Optional[Exception]]]:
         """
-        exporter = self.get_exporter(format)
-        return await exporter.export(slide_data)
+        Export many slides to one format, yielding results as they finish.
+
+        At most ``parallelism`` slides from this batch are in flight at once;
+        each still passes through the format's admission control.
+
+        Args:
+            slides: The slides to export
+            format: The desired export format
+            parallelism: Max concurrent exports for this batch
+            engine: Render engine to use; defaults to the configured engine
+
+        Yields:
+            (index, content, error) tuples in completion order; exactly one of
+            content and error is set
+        """
+        self.get_exporter(format, engine)
+        limit = asyncio.Semaphore(max(1, parallelism or settings.export_batch_parallelism))
+
+        async def run(index: int, slide_data: SlideData):
+            async with limit:
+                try:
+                    return index, await self.export(slide_data, format, engine), None
+                except Exception as e:
+                    return index, None, e
+
+        tasks = [asyncio.ensure_future(run(i, slide)) for i, slide in enumerate(slides)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Stop outstanding work if the consumer goes away (e.g. client disconnect)
+            for task in tasks:
+                task.cancel()
+
+    async def build_deck(self, slides: List[SlideData]) -> PPTXDeck:
+        """
+        Build one PPTX presentation containing every slide, in order.
+
+        Holds a PPTX admission slot while building. Runs in a thread rather
+        than the render pool: the deck is written out afterwards by
+        ``stream_deck`` and a live presentation cannot be sent between
+        processes.
+
+        Raises:
+            ExportOverloadedError: If the PPTX exporter's queue is full or
+                the wait for a free slot timed out
+        """
+        exporter = self.get_exporter(ExportFormat.PPTX)
+        async with self._admission[exporter].admit():
+            deck = await asyncio.to_thread(exporter.build_deck, slides)
+        logger.info(
+            f"Built deck: {len(deck.slides)} slides in {deck.build_ms:.0f}ms, "
+            f"{deck.images} images for {deck.image_references} placements"
+        )
+        return deck
+
+    async def stream_deck(
+        self,
+        deck: PPTXDeck,
+        chunk_size: int = 256 * 1024,
+        max_buffered: int = 4
+    ) -> AsyncIterator[bytes]:
+        """
+        Yield the .pptx bytes of a built deck while a worker thread writes
+        it, so the download starts before the archive is complete. At most
+        ``max_buffered`` chunks wait for the client; beyond that the writer
+        blocks. Closing the iterator early (client disconnect) stops the
+        writer.
+        """
+        exporter = self.get_exporter(ExportFormat.PPTX)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=max_buffered)
+        sink = _LoopSink(asyncio.get_running_loop(), queue, chunk_size)
+        writer = asyncio.ensure_future(asyncio.to_thread(sink.run, exporter.write_deck, deck))
+        try:
+            while True:
+                chunk = await queue.get()
+                if chunk is None:
+                    break
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield chunk
+            await writer
+        finally:
+            sink.close()
 
     def get_content_type(self, format: ExportFormat) -> str:
         """Get MIME content type for a format"""
@@ -58,6 +323,59 @@ class ExportService:
         """Get file extension for a format"""
         return self.get_exporter(format).file_extension
 
+    def stats(self) -> dict:
+        """
+        Render cache plus per-engine, per-format admission (and exporter,
+        where available) statistics. Exporters rendering in the pool keep
+        their caches in the workers, so their main-process stats are left out.
+        """
+        stats = {"default_engine": self.default_engine.value, "singleflight": self._inflight.stats()}
+        if self._render_cache is not None:
+            stats["render_cache"] = self._render_cache.stats()
+        if self._render_pool is not None:
+            stats["render_pool"] = self._render_pool.stats()
+        for engine, exporters in self._engines.items():
+            engine_stats = {}
+            for format, exporter in exporters.items():
+                entry = {"admission": self._admission[exporter].stats()}
+                exporter_stats = getattr(exporter, "stats", None)
+                if exporter_stats is not None and not self._in_pool(exporter):
+                    entry["exporter"] = exporter_stats()
+                engine_stats[format.value] = entry
+            stats[engine.value] = engine_stats
+        return stats
+
+    async def warm_up(self, engine: Optional[RenderEngine] = None):
+        """
+        Prepare the exporters of an engine (default engine if omitted) ahead
+        of the first export, e.g. precompute backgrounds or open render pages.
+        Failures are logged, not raised, so startup is never blocked.
+        Also starts the render pool workers, which prepare their own copies
+        of the CPU-bound exporters; those are not warmed up in this process.
+        """
+        if self._render_pool is not None:
+            try:
+                await self._render_pool.warm_up()
+            except Exception as e:
+                logger.warning(f"Render pool warm-up failed: {e}")
+        for exporter in self._engines[engine or self.default_engine].values():
+            warm_up = getattr(exporter, "warm_up", None)
+            if warm_up is None or self._in_pool(exporter):
+                continue
+            try:
+                await warm_up()
+            except Exception as e:
+                logger.warning(f"Warm-up failed for {type(exporter).__name__}: {e}")
+
+    async def close(self):
+        """Release resources held by exporters (e.g. browser instances) and the render pool"""
+        if self._render_pool is not None:
+            self._render_pool.close()
+        for exporter in self._admission:
+            close = getattr(exporter, "close", None)
+            if close is not None:
+                await close()
+
 
 # Singleton instance
 export_service = ExportService()
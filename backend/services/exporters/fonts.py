@@ -0,0 +1,136 @@
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from PIL import ImageFont
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# frontend/public/fonts, shipped alongside the backend in the repo
+BUNDLED_FONT_DIR = Path(__file__).resolve().parents[3] / "frontend" / "public" / "fonts"
+
+REGULAR = "regular"
+MEDIUM = "medium"
+BOLD = "bold"
+
+# File names of the brand family, as used by the frontend @font-face rules
+_BRAND_FILES = {
+    REGULAR: ["NeueHaasDisplayRoman.ttf"],
+    MEDIUM: ["NeueHaasDisplayMedium.ttf"],
+    BOLD: ["NeueHaasDisplayBold.ttf"],
+}
+
+# System fallbacks, tried in order after the brand family
+_SYSTEM_FONTS = {
+    REGULAR: [
+        "/Library/Fonts/NeueHaasGroteskDisplayPro.ttf",  # macOS custom
+        "/Library/Fonts/Neue Haas Grotesk Display Pro.ttf",  # macOS custom alt
+        "~/Library/Fonts/NeueHaasGroteskDisplayPro.ttf",  # macOS user
+        "~/Library/Fonts/Neue Haas Grotesk Display Pro.ttf",  # macOS user alt
+        "/System/Library/Fonts/Helvetica.ttc",  # macOS
+        "/System/Library/Fonts/SFNSText.ttf",   # macOS SF
+        "Arial.ttf",                             # Windows
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",  # Linux
+        "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",  # Linux
+    ],
+    MEDIUM: [],
+    BOLD: [
+        "/Library/Fonts/NeueHaasGroteskDisplayPro-Bold.ttf",  # macOS custom
+        "/Library/Fonts/Neue Haas Grotesk Display Pro Bold.ttf",  # macOS custom alt
+        "~/Library/Fonts/NeueHaasGroteskDisplayPro-Bold.ttf",  # macOS user
+        "~/Library/Fonts/Neue Haas Grotesk Display Pro Bold.ttf",  # macOS user alt
+        "/System/Library/Fonts/Helvetica.ttc",
+        "/System/Library/Fonts/SFNSText-Bold.otf",
+        "Arial Bold.ttf",
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+        "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf",
+    ],
+}
+
+# Weight to use when a weight has no face of its own
+_WEIGHT_FALLBACK = {MEDIUM: REGULAR, BOLD: REGULAR}
+
+
+class FontRegistry:
+    """
+    Resolves the slide font family once and hands out memoized fonts.
+
+    Each weight is resolved to the first loadable file among the configured
+    font directory, the bundled brand fonts and common system fonts. Fonts
+    are then cached per (family, weight, size), so layouts that ask for the
+    same size repeatedly do not touch the filesystem again.
+    """
+
+    def __init__(self, font_dir: Optional[str] = None):
+        self._font_dir = font_dir
+        self._faces: Optional[Dict[str, Optional[str]]] = None
+        self._fonts: Dict[tuple, ImageFont.ImageFont] = {}
+        self._lock = threading.Lock()
+
+    def _candidates(self, weight: str) -> List[str]:
+        directories = [BUNDLED_FONT_DIR]
+        if self._font_dir:
+            directories.insert(0, Path(self._font_dir).expanduser())
+        paths = [str(d / name) for d in directories for name in _BRAND_FILES[weight]]
+        return paths + [os.path.expanduser(p) for p in _SYSTEM_FONTS[weight]]
+
+    def _resolve_weight(self, weight: str) -> Optional[str]:
+        for path in self._candidates(weight):
+            try:
+                ImageFont.truetype(path, 12)
+                return path
+            except (IOError, OSError):
+                continue
+        return None
+
+    def resolve(self) -> Dict[str, Optional[str]]:
+        """Pick the font file for every weight (once) and log the choice"""
+        with self._lock:
+            if self._faces is None:
+                faces = {weight: self._resolve_weight(weight) for weight in _BRAND_FILES}
+                for weight, fallback in _WEIGHT_FALLBACK.items():
+                    if faces[weight] is None:
+                        faces[weight] = faces[fallback]
+                self._faces = faces
+                for weight, path in faces.items():
+                    logger.info(f"Native render font ({weight}): {path or 'Pillow default'}")
+            return self._faces
+
+    def get(self, size: int, weight: str = REGULAR) -> ImageFont.ImageFont:
+        """Font for ``weight`` at ``size``, loaded once and then shared"""
+        path = self.resolve().get(weight)
+        key = (path, weight, size)
+        font = self._fonts.get(key)
+        if font is not None:
+            return font
+
+        if path is not None:
+            font = ImageFont.truetype(path, size)
+        else:
+            # Sized where Pillow supports it, since the layout code relies
+            # on font.size
+            try:
+                font = ImageFont.load_default(size)
+            except TypeError:
+                font = ImageFont.load_default()
+
+        with self._lock:
+            return self._fonts.setdefault(key, font)
+
+    def describe(self) -> dict:
+        """Chosen face per weight, for logs and /metrics"""
+        faces = {}
+        for weight, path in self.resolve().items():
+            if path is None:
+                faces[weight] = {"path": None, "family": "Pillow default"}
+                continue
+            family, style = ImageFont.truetype(path, 12).getname()
+            faces[weight] = {"path": path, "family": family, "style": style}
+        return {"faces": faces, "cached_fonts": len(self._fonts)}
+
+
+font_registry = FontRegistry(settings.font_dir)
@@ -0,0 +1,157 @@
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Iterable, Tuple
+
+from PIL import Image, ImageDraw
+
+from config import settings
+from .base import CategoryTemplates, SlideCategory
+
+RGB = Tuple[int, int, int]
+Size = Tuple[int, int]
+
+
+def hex_to_rgb(hex_color: str) -> RGB:
+    """Convert hex color (#rrggbb or #rgb) to RGB tuple"""
+    hex_color = hex_color.lstrip('#')
+    if len(hex_color) == 3:
+        hex_color = ''.join(c * 2 for c in hex_color)
+    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+
+
+def _render_gradient_numpy(start_rgb: RGB, end_rgb: RGB, size: Size) -> Image.Image:
+    """Diagonal (135 degree) gradient built with numpy"""
+    import numpy as np
+
+    width, height = size
+    x = np.linspace(0, 1, width)
+    y = np.linspace(0, 1, height)
+    xv, yv = np.meshgrid(x, y)
+
+    # Blend factor (diagonal gradient at 135 degrees)
+    blend = (xv + yv) / 2
+
+    r = (start_rgb[0] * (1 - blend) + end_rgb[0] * blend).astype(np.uint8)
+    g = (start_rgb[1] * (1 - blend) + end_rgb[1] * blend).astype(np.uint8)
+    b = (start_rgb[2] * (1 - blend) + end_rgb[2] * blend).astype(np.uint8)
+
+    rgb_array = np.stack([r, g, b], axis=-1)
+    return Image.fromarray(rgb_array, 'RGB')
+
+
+def _render_gradient_python(start_rgb: RGB, end_rgb: RGB, size: Size) -> Image.Image:
+    """Diagonal (135 degree) gradient drawn per pixel, for when numpy is unavailable"""
+    width, height = size
+    img = Image.new('RGB', size)
+    draw = ImageDraw.Draw(img)
+
+    for y in range(height):
+        for x in range(width):
+            blend = (x / width + y / height) / 2
+            r = int(start_rgb[0] * (1 - blend) + end_rgb[0] * blend)
+            g = int(start_rgb[1] * (1 - blend) + end_rgb[1] * blend)
+            b = int(start_rgb[2] * (1 - blend) + end_rgb[2] * blend)
+            draw.point((x, y), fill=(r, g, b))
+
+    return img
+
+
+def render_gradient(start_color: str, end_color: str, size: Size) -> Image.Image:
+    """Render a diagonal gradient background without caching"""
+    start_rgb = hex_to_rgb(start_color)
+    end_rgb = hex_to_rgb(end_color)
+    try:
+        return _render_gradient_numpy(start_rgb, end_rgb, size)
+    except ImportError:
+        return _render_gradient_python(start_rgb, end_rgb, size)
+
+
+@lru_cache(maxsize=4)
+def overlay_ramp(size: Size, opacity: float) -> Image.Image:
+    """
+    Shared black RGBA overlay fading from transparent at the top to
+    ``opacity`` at the bottom, used to darken full-bleed images behind text.
+    Do not modify it.
+    """
+    width, height = size
+    column = Image.new('L', (1, height))
+    column.putdata([int(255 * (y / height) * opacity) for y in range(height)])
+    alpha = column.resize(size, Image.Resampling.NEAREST)
+    overlay = Image.new('RGBA', size, (0, 0, 0, 0))
+    overlay.putalpha(alpha)
+    return overlay
+
+
+class GradientCache:
+    """
+    Bounded LRU of rendered gradient backgrounds keyed by (start, end, size).
+
+    There are only a handful of distinct colour pairs across all templates,
+    so after warm-up every render copies a ready-made background instead of
+    recomputing it. Cached images are shared and must not be modified;
+    ``get`` returns a copy.
+    """
+
+    def __init__(self, max_entries: int = 8):
+        self._max_entries = max(1, max_entries)
+        self._images: "OrderedDict[tuple, Image.Image]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def _key(start_color: str, end_color: str, size: Size) -> tuple:
+        return (start_color.lower(), end_color.lower(), tuple(size))
+
+    def _get_shared(self, start_color: str, end_color: str, size: Size) -> Image.Image:
+        key = self._key(start_color, end_color, size)
+        with self._lock:
+            img = self._images.get(key)
+            if img is not None:
+                self._images.move_to_end(key)
+                self._hits += 1
+                return img
+            self._misses += 1
+
+        # Render outside the lock; a concurrent miss just renders twice
+        img = render_gradient(start_color, end_color, size)
+        with self._lock:
+            self._images[key] = img
+            self._images.move_to_end(key)
+            while len(self._images) > self._max_entries:
+                self._images.popitem(last=False)
+        return img
+
+    def get(self, start_color: str, end_color: str, size: Size, mode: str = 'RGB') -> Image.Image:
+        """Return a private copy of the gradient, converted to ``mode``"""
+        img = self._get_shared(start_color, end_color, size)
+        return img.convert(mode) if mode != img.mode else img.copy()
+
+    def precompute(self, color_pairs: Iterable[Tuple[str, str]], size: Size):
+        """Render the given colour pairs ahead of the first export"""
+        for start_color, end_color in color_pairs:
+            self._get_shared(start_color, end_color, size)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._images),
+                "max_entries": self._max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+
+def template_color_pairs() -> list:
+    """Distinct (background, gradient end) pairs across all category templates"""
+    pairs = []
+    for category in SlideCategory:
+        for style in CategoryTemplates.get_category_templates(category.value).templates:
+            pair = (style.background_color.lower(), style.background_gradient_end.lower())
+            if pair not in pairs:
+                pairs.append(pair)
+    return pairs
+
+
+gradient_cache = GradientCache(settings.gradient_cache_size)
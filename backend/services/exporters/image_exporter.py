@@ -1,105 +1,68 @@
+import asyncio
 import io
-import qrcode
-from PIL import Image, ImageDraw, ImageFont
+import logging
+from PIL import Image, ImageDraw, ImageFont, ImageOps, UnidentifiedImageError
 from typing import Tuple, Optional
 
-from .base import BaseExporter, ExportFormat, SlideData, TemplateConfig, TemplateStyle
+from ..image_utils import decoded_image_cache
+from .base import CpuBoundExporter, ExportFormat, SlideData, TemplateConfig, TemplateStyle
+from .fonts import BOLD, REGULAR, font_registry
+from .gradients import gradient_cache, hex_to_rgb, overlay_ramp, template_color_pairs
+from .qr import qr_cache
 
+logger = logging.getLogger(__name__)
 
-class BaseImageExporter(BaseExporter):
-    """Base class for image exporters (PNG/JPG)"""
+
+class BaseImageExporter(CpuBoundExporter):
+    """
+    Base class for image exporters (PNG/JPG).
+
+    This is the "native" render engine: slides are drawn with Pillow, without
+    a browser, mirroring the frontend layouts as closely as practical.
+    """
 
     # Output dimensions (1920x1080 for 16:9 at Full HD)
     WIDTH = 1920
     HEIGHT = 1080
 
+    # 2: QR codes scaled with nearest-neighbour instead of LANCZOS
+    RENDERER_VERSION = "2"
+
     def _hex_to_rgb(self, hex_color: str) -> Tuple[int, int, int]:
         """Convert hex color to RGB tuple"""
-        hex_color = hex_color.lstrip('#')
-        return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-
-    def _create_gradient(self, start_color: str, end_color: str) -> Image.Image:
-        """Create gradient background image"""
-        img = Image.new('RGB', (self.WIDTH, self.HEIGHT))
-        draw = ImageDraw.Draw(img)
-
-        start_rgb = self._hex_to_rgb(start_color)
-        end_rgb = self._hex_to_rgb(end_color)
-
-        # Create diagonal gradient (135 degrees approximation)
-        for y in range(self.HEIGHT):
-            for x in range(self.WIDTH):
-                # Blend factor based on position (diagonal)
-                blend = (x / self.WIDTH + y / self.HEIGHT) / 2
-                r = int(start_rgb[0] * (1 - blend) + end_rgb[0] * blend)
-                g = int(start_rgb[1] * (1 - blend) + end_rgb[1] * blend)
-                b = int(start_rgb[2] * (1 - blend) + end_rgb[2] * blend)
-                draw.point((x, y), fill=(r, g, b))
-
-        return img
-
-    def _create_gradient_fast(self, start_color: str, end_color: str) -> Image.Image:
-        """Create gradient background image (faster version)"""
-        import numpy as np
-
-        start_rgb = self._hex_to_rgb(start_color)
-        end_rgb = self._hex_to_rgb(end_color)
-
-        # Create coordinate grids
-        x = np.linspace(0, 1, self.WIDTH)
-        y = np.linspace(0, 1, self.HEIGHT)
-        xv, yv = np.meshgrid(x, y)
-
-        # Blend factor (diagonal gradient at 135 degrees)
-        blend = (xv + yv) / 2
-
-        # Create RGB channels
-        r = (start_rgb[0] * (1 - blend) + end_rgb[0] * blend).astype(np.uint8)
-        g = (start_rgb[1] * (1 - blend) + end_rgb[1] * blend).astype(np.uint8)
-        b = (start_rgb[2] * (1 - blend) + end_rgb[2] * blend).astype(np.uint8)
+        return hex_to_rgb(hex_color)
+
+    def _create_background(self, colors: dict) -> Image.Image:
+        """Gradient background (RGBA) for the slide, copied from the shared cache"""
+        return gradient_cache.get(
+            colors['background_color'],
+            colors['background_gradient_end'],
+            (self.WIDTH, self.HEIGHT),
+            mode='RGBA'
+        )
 
-        # Stack and create image
-        rgb_array = np.stack([r, g, b], axis=-1)
-        return Image.fromarray(rgb_array, 'RGB')
+    def prepare(self):
+        """Resolve fonts and render every template gradient ahead of the first export"""
+        font_registry.resolve()
+        gradient_cache.precompute(template_color_pairs(), (self.WIDTH, self.HEIGHT))
+
+    async def warm_up(self):
+        # Only used when rendering in this process (render pool disabled);
+        # the gradients take a while, so keep them off the event loop
+        await asyncio.to_thread(self.prepare)
+
+    def stats(self) -> dict:
+        """Render cache statistics"""
+        return {
+            "gradient_cache": gradient_cache.stats(),
+            "qr_cache": qr_cache.stats(),
+            "image_cache": decoded_image_cache.stats(),
+            "fonts": font_registry.describe(),
+        }
 
     def _get_font(self, size: int, bold: bool = False) -> ImageFont.FreeTypeFont:
-        """Get font with fallback to default"""
-        # Try Neue Haas Grotesk Display Pro first, then common system fonts
-        font_names = [
-            "/Library/Fonts/NeueHaasGroteskDisplayPro.ttf",  # macOS custom
-            "/Library/Fonts/Neue Haas Grotesk Display Pro.ttf",  # macOS custom alt
-            "~/Library/Fonts/NeueHaasGroteskDisplayPro.ttf",  # macOS user
-            "~/Library/Fonts/Neue Haas Grotesk Display Pro.ttf",  # macOS user alt
-            "/System/Library/Fonts/Helvetica.ttc",  # macOS
-            "/System/Library/Fonts/SFNSText.ttf",   # macOS SF
-            "Arial.ttf",                             # Windows
-            "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",  # Linux
-            "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",  # Linux
-        ]
-
-        if bold:
-            font_names = [
-                "/Library/Fonts/NeueHaasGroteskDisplayPro-Bold.ttf",  # macOS custom
-                "/Library/Fonts/Neue Haas Grotesk Display Pro Bold.ttf",  # macOS custom alt
-                "~/Library/Fonts/NeueHaasGroteskDisplayPro-Bold.ttf",  # macOS user
-                "~/Library/Fonts/Neue Haas Grotesk Display Pro Bold.ttf",  # macOS user alt
-                "/System/Library/Fonts/Helvetica.ttc",
-                "/System/Library/Fonts/SFNSText-Bold.otf",
-                "Arial Bold.ttf",
-                "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
-                "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf",
-            ] + font_names
-
-        import os
-        for font_name in font_names:
-            try:
-                expanded_path = os.path.expanduser(font_name)
-                return ImageFont.truetype(expanded_path, size)
-            except (IOError, OSError):
-                continue
-
-        # Fallback to default
-        return ImageFont.load_default()
+        """Get font from the shared registry (resolved once, cached per size)"""
+        return font_registry.get(size, BOLD if bold else REGULAR)
 
     def _draw_text_wrapped(
         self,
@@ -155,6 +118,17 @@ class BaseImageExporter(BaseExporter):
 
         return y - position[1]
 
+    def _load_image(self, image_data: bytes) -> Optional[Image.Image]:
+        """
+        Decoded upload (upright RGB, shared with other exports of the same
+        bytes - do not modify it), or None if it is unreadable
+        """
+        try:
+            return decoded_image_cache.get(image_data).image
+        except (UnidentifiedImageError, OSError, ValueError) as e:
+            logger.warning(f"Skipping unreadable slide image: {e}")
+            return None
+
     def _create_circular_mask(self, size: int) -> Image.Image:
         """Create a circular mask"""
         mask = Image.new('L', (size, size), 0)
@@ -173,8 +147,9 @@ class BaseImageExporter(BaseExporter):
     ):
         """Add circular image with border to base image"""
         # Load and resize the image
-        img = Image.open(io.BytesIO(image_data))
-        img = img.convert('RGB')
+        img = self._load_image(image_data)
+        if img is None:
+            return
 
         # Crop to square (center crop)
         min_dim = min(img.width, img.height)
@@ -213,10 +188,11 @@ class BaseImageExporter(BaseExporter):
         position: Tuple[int, int],
         size: Tuple[int, int]
     ):
-        """Add rectangular image to base image"""
-        img = Image.open(io.BytesIO(image_data))
-        img = img.convert('RGB')
-        img = img.resize(size, Image.Resampling.LANCZOS)
+        """Add rectangular image to base image, cropped to fill (like CSS object-fit: cover)"""
+        img = self._load_image(image_data)
+        if img is None:
+            return
+        img = ImageOps.fit(img, size, Image.Resampling.LANCZOS)
         base_img.paste(img, position)
 
     def _add_full_background_image(
@@ -226,44 +202,25 @@ class BaseImageExporter(BaseExporter):
         overlay_opacity: float = 0.5
     ):
         """Add full-bleed background image with dark overlay"""
-        img = Image.open(io.BytesIO(image_data))
-        img = img.convert('RGB')
+        img = self._load_image(image_data)
+        if img is None:
+            return
 
         # Resize to cover entire slide
-        img = img.resize((self.WIDTH, self.HEIGHT), Image.Resampling.LANCZOS)
+        img = ImageOps.fit(img, (self.WIDTH, self.HEIGHT), Image.Resampling.LANCZOS)
 
         # Paste the background image
         base_img.paste(img, (0, 0))
 
-        # Add dark gradient overlay from bottom
-        overlay = Image.new('RGBA', (self.WIDTH, self.HEIGHT), (0, 0, 0, 0))
-        overlay_draw = ImageDraw.Draw(overlay)
-
-        # Create gradient from transparent at top to semi-opaque at bottom
-        for y in range(self.HEIGHT):
-            opacity = int(255 * (y / self.HEIGHT) * overlay_opacity)
-            overlay_draw.line([(0, y), (self.WIDTH, y)], fill=(0, 0, 0, opacity))
-
+        # Dark gradient overlay from bottom (transparent at top to
+        # semi-opaque at bottom), built once per opacity and blended in a
+        # single paste
+        overlay = overlay_ramp((self.WIDTH, self.HEIGHT), overlay_opacity)
         base_img.paste(overlay, (0, 0), overlay)
 
     def _generate_qr_code(self, url: str, size: int) -> Image.Image:
-        """Generate QR code image from URL"""
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=2,
-        )
-        qr.add_data(url)
-        qr.make(fit=True)
-
-        img = qr.make_image(fill_color="black", back_color="white")
-        img = img.convert('RGBA')
-
-        # Resize to desired size
-        img = img.resize((size, size), Image.Resampling.LANCZOS)
-
-        return img
+        """Shared QR code image of exactly ``size`` px from the QR cache"""
+        return qr_cache.image(url, size)
 
     def _add_qr_code(
         self,
@@ -273,8 +230,8 @@ class BaseImageExporter(BaseExporter):
         size: int
     ):
         """Add QR code to base image"""
-        qr_img = self._generate_qr_code(url, size)
-        base_img.paste(qr_img, position, qr_img)
+        # The QR code is opaque, so no mask is needed
+        base_img.paste(self._generate_qr_code(url, size), position)
 
     def _get_template_colors(self, slide_data: SlideData) -> dict:
         """Get colors from template_style or fall back to legacy template"""
@@ -306,20 +263,10 @@ class BaseImageExporter(BaseExporter):
 
     def _render_full_hero_layout(self, slide_data: SlideData, colors: dict) -> Image.Image:
         """Full hero layout - large background image with text overlay at bottom"""
-        # Create base with gradient or image
+        # Create base with gradient, covered by the image if there is one
+        img = self._create_background(colors)
         if slide_data.image_data:
-            try:
-                img = self._create_gradient_fast(colors['background_color'], colors['background_gradient_end'])
-            except ImportError:
-                img = self._create_gradient(colors['background_color'], colors['background_gradient_end'])
-            img = img.convert('RGBA')
             self._add_full_background_image(img, slide_data.image_data, overlay_opacity=0.7)
-        else:
-            try:
-                img = self._create_gradient_fast(colors['background_color'], colors['background_gradient_end'])
-            except ImportError:
-                img = self._create_gradient(colors['background_color'], colors['background_gradient_end'])
-            img = img.convert('RGBA')
 
         draw = ImageDraw.Draw(img)
         text_color = self._hex_to_rgb(colors['text_color'])
@@ -399,12 +346,7 @@ class BaseImageExporter(BaseExporter):
 
     def _render_split_text_primary_layout(self, slide_data: SlideData, colors: dict) -> Image.Image:
         """Split layout with text on left (2/3) and circular image on right (1/3)"""
-        try:
-            img = self._create_gradient_fast(colors['background_color'], colors['background_gradient_end'])
-        except ImportError:
-            img = self._create_gradient(colors['background_color'], colors['background_gradient_end'])
-
-        img = img.convert('RGBA')
+        img = self._create_background(colors)
         draw = ImageDraw.Draw(img)
 
         text_color = self._hex_to_rgb(colors['text_color'])
@@ -525,12 +467,7 @@ class BaseImageExporter(BaseExporter):
 
     def _render_split_image_primary_layout(self, slide_data: SlideData, colors: dict) -> Image.Image:
         """Split layout with large image on left (1/2) and text on right (1/2)"""
-        try:
-            img = self._create_gradient_fast(colors['background_color'], colors['background_gradient_end'])
-        except ImportError:
-            img = self._create_gradient(colors['background_color'], colors['background_gradient_end'])
-
-        img = img.convert('RGBA')
+        img = self._create_background(colors)
         draw = ImageDraw.Draw(img)
 
         text_color = self._hex_to_rgb(colors['text_color'])
@@ -639,12 +576,7 @@ class BaseImageExporter(BaseExporter):
 
     def _render_circular_speaker_layout(self, slide_data: SlideData, colors: dict) -> Image.Image:
         """Centered circular image with text below - ideal for speaker highlights"""
-        try:
-            img = self._create_gradient_fast(colors['background_color'], colors['background_gradient_end'])
-        except ImportError:
-            img = self._create_gradient(colors['background_color'], colors['background_gradient_end'])
-
-        img = img.convert('RGBA')
+        img = self._create_background(colors)
         draw = ImageDraw.Draw(img)
 
         text_color = self._hex_to_rgb(colors['text_color'])
@@ -757,12 +689,7 @@ class BaseImageExporter(BaseExporter):
 
     def _render_text_only_layout(self, slide_data: SlideData, colors: dict) -> Image.Image:
         """Bold text-only layout with centered content"""
-        try:
-            img = self._create_gradient_fast(colors['background_color'], colors['background_gradient_end'])
-        except ImportError:
-            img = self._create_gradient(colors['background_color'], colors['background_gradient_end'])
-
-        img = img.convert('RGBA')
+        img = self._create_background(colors)
         draw = ImageDraw.Draw(img)
 
         text_color = self._hex_to_rgb(colors['text_color'])
@@ -845,12 +772,7 @@ class BaseImageExporter(BaseExporter):
 
     def _render_media_vertical_layout(self, slide_data: SlideData, colors: dict) -> Image.Image:
         """Media mention layout with article card style"""
-        try:
-            img = self._create_gradient_fast(colors['background_color'], colors['background_gradient_end'])
-        except ImportError:
-            img = self._create_gradient(colors['background_color'], colors['background_gradient_end'])
-
-        img = img.convert('RGBA')
+        img = self._create_background(colors)
         draw = ImageDraw.Draw(img)
 
         text_color = self._hex_to_rgb(colors['text_color'])
@@ -951,12 +873,7 @@ class BaseImageExporter(BaseExporter):
 
     def _render_media_wide_layout(self, slide_data: SlideData, colors: dict) -> Image.Image:
         """Wide media layout with image on left"""
-        try:
-            img = self._create_gradient_fast(colors['background_color'], colors['background_gradient_end'])
-        except ImportError:
-            img = self._create_gradient(colors['background_color'], colors['background_gradient_end'])
-
-        img = img.convert('RGBA')
+        img = self._create_background(colors)
         draw = ImageDraw.Draw(img)
 
         text_color = self._hex_to_rgb(colors['text_color'])
@@ -1036,12 +953,7 @@ class BaseImageExporter(BaseExporter):
 
     def _render_congrats_framed_layout(self, slide_data: SlideData, colors: dict) -> Image.Image:
         """Congratulations layout with framed image"""
-        try:
-            img = self._create_gradient_fast(colors['background_color'], colors['background_gradient_end'])
-        except ImportError:
-            img = self._create_gradient(colors['background_color'], colors['background_gradient_end'])
-
-        img = img.convert('RGBA')
+        img = self._create_background(colors)
         draw = ImageDraw.Draw(img)
 
         text_color = self._hex_to_rgb(colors['text_color'])
@@ -1138,12 +1050,7 @@ class BaseImageExporter(BaseExporter):
 
     def _render_podcast_layout(self, slide_data: SlideData, colors: dict) -> Image.Image:
         """Podcast layout with artwork on left"""
-        try:
-            img = self._create_gradient_fast(colors['background_color'], colors['background_gradient_end'])
-        except ImportError:
-            img = self._create_gradient(colors['background_color'], colors['background_gradient_end'])
-
-        img = img.convert('RGBA')
+        img = self._create_background(colors)
         draw = ImageDraw.Draw(img)
 
         text_color = self._hex_to_rgb(colors['text_color'])
@@ -1246,7 +1153,7 @@ class BaseImageExporter(BaseExporter):
 
         return img
 
-    async def _render_slide(self, slide_data: SlideData) -> Image.Image:
+    def _render_slide(self, slide_data: SlideData) -> Image.Image:
         """Render slide to PIL Image - routes to appropriate layout method"""
         colors = self._get_template_colors(slide_data)
         layout_type = colors['layout_type']
@@ -1289,9 +1196,9 @@ class PNGExporter(BaseImageExporter):
     def file_extension(self) -> str:
         return ".png"
 
-    async def export(self, slide_data: SlideData) -> bytes:
+    def render(self, slide_data: SlideData) -> bytes:
         """Generate PNG image from slide data"""
-        img = await self._render_slide(slide_data)
+        img = self._render_slide(slide_data)
 
         # Convert to RGB for PNG (remove alpha)
         if img.mode == 'RGBA':
@@ -1299,8 +1206,10 @@ class PNGExporter(BaseImageExporter):
             background.paste(img, mask=img.split()[3])
             img = background
 
+        # Default zlib level: optimize=True costs several hundred ms per
+        # 1920x1080 slide for a few percent smaller files
         output = io.BytesIO()
-        img.save(output, format='PNG', optimize=True)
+        img.save(output, format='PNG')
         output.seek(0)
 
         return output.getvalue()
@@ -1321,9 +1230,9 @@ class JPGExporter(BaseImageExporter):
     def file_extension(self) -> str:
         return ".jpg"
 
-    async def export(self, slide_data: SlideData) -> bytes:
+    def render(self, slide_data: SlideData) -> bytes:
         """Generate JPEG image from slide data"""
-        img = await self._render_slide(slide_data)
+        img = self._render_slide(slide_data)
 
         # Convert to RGB for JPEG (no alpha support)
         if img.mode == 'RGBA':
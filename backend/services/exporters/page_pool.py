@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Deque, Optional
+
+from playwright.async_api import Page
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PooledPage:
+    """A render page owned by the pool, plus its bookkeeping"""
+    page: Page
+    renders: int = 0
+    created_at: float = field(default_factory=time.monotonic)
+
+
+class RenderPagePool:
+    """
+    Pool of pre-navigated render pages.
+
+    Opening a page and navigating it to the render route dominates export
+    latency, so pages are kept warm and reused: a page is checked out, given
+    new slide data, screenshotted, reset and returned. Pages are recycled
+    after ``max_renders`` uses to bound renderer memory growth, and any page
+    that fails a health check or a render is discarded and replaced lazily.
+    """
+
+    HEALTH_CHECK_SCRIPT = (
+        "window.__SLIDE_RENDER_READY__ === true"
+        " && typeof window.__setSlideData__ === 'function'"
+    )
+    RESET_SCRIPT = "window.__resetSlide__ && window.__resetSlide__()"
+    HEALTH_CHECK_TIMEOUT = 2.0
+
+    def __init__(
+        self,
+        open_page: Callable[[], Awaitable[Page]],
+        size: int = 2,
+        max_renders: int = 100,
+    ):
+        self._open_page = open_page
+        self._size = max(1, size)
+        self._max_renders = max(1, max_renders)
+        self._idle: Deque[PooledPage] = deque()
+        self._slots = asyncio.Semaphore(self._size)
+        self._closed = False
+
+        # Counters for stats()
+        self._pages_opened = 0
+        self._pages_recycled = 0
+        self._pages_discarded = 0
+        self._renders = 0
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    async def _is_healthy(self, pooled: PooledPage) -> bool:
+        """Check the page is still alive and the render route is listening"""
+        if pooled.page.is_closed():
+            return False
+        try:
+            return bool(await asyncio.wait_for(
+                pooled.page.evaluate(self.HEALTH_CHECK_SCRIPT),
+                timeout=self.HEALTH_CHECK_TIMEOUT
+            ))
+        except Exception:
+            return False
+
+    async def _discard(self, pooled: PooledPage):
+        """Close a page that will not be returned to the pool"""
+        try:
+            if not pooled.page.is_closed():
+                await pooled.page.close()
+        except Exception as e:
+            logger.debug(f"Error closing render page: {e}")
+
+    async def _checkout(self) -> PooledPage:
+        """Take an idle healthy page, or open a new one"""
+        while self._idle:
+            pooled = self._idle.popleft()
+            if await self._is_healthy(pooled):
+                return pooled
+            self._pages_discarded += 1
+            await self._discard(pooled)
+
+        page = await self._open_page()
+        self._pages_opened += 1
+        return PooledPage(page=page)
+
+    async def _checkin(self, pooled: PooledPage, succeeded: bool):
+        """Reset and return a page to the pool, or retire it"""
+        pooled.renders += 1
+        self._renders += 1
+
+        if self._closed or not succeeded:
+            self._pages_discarded += 1
+            await self._discard(pooled)
+            return
+
+        if pooled.renders >= self._max_renders:
+            self._pages_recycled += 1
+            await self._discard(pooled)
+            return
+
+        try:
+            await pooled.page.evaluate(self.RESET_SCRIPT)
+        except Exception:
+            self._pages_discarded += 1
+            await self._discard(pooled)
+            return
+
+        self._idle.append(pooled)
+
+    @asynccontextmanager
+    async def page(self):
+        """
+        Check out a ready render page for the duration of the block.
+
+        A page whose render raised is not trusted again and is discarded.
+        """
+        if self._closed:
+            raise RuntimeError("Render page pool is closed")
+
+        async with self._slots:
+            pooled = await self._checkout()
+            succeeded = False
+            try:
+                yield pooled.page
+                succeeded = True
+            finally:
+                await self._checkin(pooled, succeeded)
+
+    async def warm_up(self, count: Optional[int] = None):
+        """Open pages ahead of the first export"""
+        count = self._size if count is None else min(count, self._size)
+        while len(self._idle) < count:
+            page = await self._open_page()
+            self._pages_opened += 1
+            self._idle.append(PooledPage(page=page))
+
+    async def close(self):
+        """Close all idle pages; pages in use are closed on check-in"""
+        self._closed = True
+        while self._idle:
+            await self._discard(self._idle.popleft())
+
+    def stats(self) -> dict:
+        """Pool counters for monitoring"""
+        return {
+            "size": self._size,
+            "idle": len(self._idle),
+            "max_renders_per_page": self._max_renders,
+            "pages_opened": self._pages_opened,
+            "pages_recycled": self._pages_recycled,
+            "pages_discarded": self._pages_discarded,
+            "renders": self._renders,
+        }
@@ -1,21 +1,77 @@
 import io
-import qrcode
+import time
+from dataclasses import dataclass, field
+from typing import BinaryIO, List, Sequence, Tuple
+
 from pptx import Presentation
+from pptx.oxml import parse_xml
+from pptx.oxml.ns import nsdecls
+from pptx.parts.image import ImagePart
+from pptx.presentation import Presentation as PresentationDocument
 from pptx.util import Inches, Pt
 from pptx.dml.color import RGBColor
 from pptx.enum.text import PP_ALIGN, MSO_ANCHOR
 from pptx.enum.shapes import MSO_SHAPE
 
-from .base import BaseExporter, ExportFormat, SlideData, TemplateStyle, TemplateConfig
+from .base import CpuBoundExporter, ExportFormat, SlideData, TemplateStyle, TemplateConfig
+from .qr import qr_cache
+
+
+def replace_freeform_path(shape, extent: int, rects: Sequence[Tuple[int, int, int, int]]):
+    """
+    Replace the geometry of a freeform ``shape`` with one path of ``extent``
+    x ``extent`` units holding a closed subpath per (x, y, width, height)
+    rectangle. One path means the fill has no seams between rectangles.
+    Built as one XML string; adding hundreds of elements one by one is slow.
+    """
+    path = parse_xml(
+        f'<a:path {nsdecls("a")} w="{extent}" h="{extent}">'
+        + "".join(
+            f'<a:moveTo><a:pt x="{x}" y="{y}"/></a:moveTo>'
+            f'<a:lnTo><a:pt x="{x + w}" y="{y}"/></a:lnTo>'
+            f'<a:lnTo><a:pt x="{x + w}" y="{y + h}"/></a:lnTo>'
+            f'<a:lnTo><a:pt x="{x}" y="{y + h}"/></a:lnTo>'
+            '<a:close/>'
+            for x, y, w, h in rects
+        )
+        + '</a:path>'
+    )
+    (old_path,) = shape.element.xpath("./p:spPr/a:custGeom/a:pathLst/a:path")
+    old_path.getparent().replace(old_path, path)
+
+
+@dataclass
+class DeckSlideStats:
+    """Build time and size contribution of one slide in a deck"""
+    build_ms: float
+    # Slide XML plus the images this slide embedded first (later slides
+    # reusing an image add only a relationship)
+    bytes: int
+
 
+@dataclass
+class PPTXDeck:
+    """A built multi-slide presentation, ready to be written out"""
+    presentation: PresentationDocument
+    slides: List[DeckSlideStats] = field(default_factory=list)
+    images: int = 0
+    image_references: int = 0
 
-class PPTXExporter(BaseExporter):
+    @property
+    def build_ms(self) -> float:
+        return sum(slide.build_ms for slide in self.slides)
+
+
+class PPTXExporter(CpuBoundExporter):
     """Export slides to PowerPoint format"""
 
     # Slide dimensions (16:9 widescreen)
     SLIDE_WIDTH = Inches(13.333)
     SLIDE_HEIGHT = Inches(7.5)
 
+    # 2: QR codes as vector shapes instead of PNG pictures
+    RENDERER_VERSION = "2"
+
     @property
     def format(self) -> ExportFormat:
         return ExportFormat.PPTX
@@ -102,37 +158,38 @@ class PPTXExporter(BaseExporter):
 
         return picture
 
-    def _generate_qr_code(self, url: str) -> bytes:
-        """Generate QR code image from URL"""
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=2,
-        )
-        qr.add_data(url)
-        qr.make(fit=True)
-
-        img = qr.make_image(fill_color="black", back_color="white")
-
-        # Convert to bytes
-        output = io.BytesIO()
-        img.save(output, format='PNG')
-        output.seek(0)
-        return output.getvalue()
-
     def _add_qr_code(self, slide, url: str, left: float, top: float, size: float):
-        """Add QR code to slide"""
-        qr_bytes = self._generate_qr_code(url)
-        qr_stream = io.BytesIO(qr_bytes)
+        """
+        Add QR code to slide as native vector shapes: a white square for the
+        quiet zone and one black freeform covering the dark modules. It stays
+        sharp at any zoom and needs no embedded picture.
+        """
+        modules, rects = qr_cache.rectangles(url)
 
-        picture = slide.shapes.add_picture(
-            qr_stream,
+        background = slide.shapes.add_shape(
+            MSO_SHAPE.RECTANGLE,
             Inches(left), Inches(top),
             Inches(size), Inches(size)
         )
-
-        return picture
+        background.line.fill.background()
+        background.fill.solid()
+        background.fill.fore_color.rgb = RGBColor(0xFF, 0xFF, 0xFF)
+
+        # FreeformBuilder traces the outline square, which fixes the shape's
+        # position, size and path extents (modules x modules); its path is
+        # then swapped for one holding every dark rectangle. Feeding the
+        # rectangles through the builder instead would be quadratic: it
+        # recomputes the path extents for every point
+        builder = slide.shapes.build_freeform(0, 0, scale=Inches(size) / modules)
+        builder.add_line_segments([(modules, 0), (modules, modules), (0, modules)], close=True)
+        modules_shape = builder.convert_to_shape(Inches(left), Inches(top))
+        replace_freeform_path(modules_shape, modules, rects)
+        modules_shape.line.fill.background()
+        modules_shape.fill.solid()
+        modules_shape.fill.fore_color.rgb = RGBColor(0, 0, 0)
+        modules_shape.name = "QR code"
+
+        return modules_shape
 
     def _add_full_image_background(self, slide, image_data: bytes):
         """Add full-bleed background image with dark overlay"""
@@ -731,17 +788,60 @@ class PPTXExporter(BaseExporter):
                 font_size=10, font_color=template.text_color, bold=False, alignment=PP_ALIGN.CENTER
             )
 
-    async def export(self, slide_data: SlideData) -> bytes:
+    def render(self, slide_data: SlideData) -> bytes:
         """Generate PowerPoint presentation from slide data"""
-        template = slide_data.template
-        template_style = slide_data.template_style
+        prs = self._new_presentation()
+        self._add_slide(prs, slide_data)
+
+        # Save to bytes
+        output = io.BytesIO()
+        prs.save(output)
+        output.seek(0)
+
+        return output.getvalue()
 
-        # Create presentation with 16:9 aspect ratio
+    def build_deck(self, slides: List[SlideData]) -> PPTXDeck:
+        """
+        Append every slide to one presentation, timing each.
+
+        python-pptx stores each distinct image (by SHA-1) as a single media
+        part, so a photo used on several slides is embedded once.
+        """
+        deck = PPTXDeck(presentation=self._new_presentation())
+        embedded = set()
+        for slide_data in slides:
+            started = time.perf_counter()
+            slide = self._add_slide(deck.presentation, slide_data)
+            build_ms = (time.perf_counter() - started) * 1000
+
+            size = len(slide.part.blob)
+            for rel in slide.part.rels.values():
+                if rel.is_external or not isinstance(rel.target_part, ImagePart):
+                    continue
+                deck.image_references += 1
+                if rel.target_part.partname not in embedded:
+                    embedded.add(rel.target_part.partname)
+                    size += len(rel.target_part.blob)
+            deck.slides.append(DeckSlideStats(build_ms=round(build_ms, 1), bytes=size))
+        deck.images = len(embedded)
+        return deck
+
+    def write_deck(self, deck: PPTXDeck, output: BinaryIO):
+        """Write a built deck; ``output`` may be a non-seekable stream"""
+        deck.presentation.save(output)
+
+    def _new_presentation(self) -> PresentationDocument:
+        """Empty presentation with 16:9 aspect ratio"""
         prs = Presentation()
         prs.slide_width = self.SLIDE_WIDTH
         prs.slide_height = self.SLIDE_HEIGHT
+        return prs
+
+    def _add_slide(self, prs: PresentationDocument, slide_data: SlideData):
+        """Append a blank slide to ``prs`` and lay out ``slide_data`` on it"""
+        template = slide_data.template
+        template_style = slide_data.template_style
 
-        # Add blank slide
         blank_layout = prs.slide_layouts[6]  # Blank layout
         slide = prs.slides.add_slide(blank_layout)
 
@@ -773,9 +873,4 @@ class PPTXExporter(BaseExporter):
             # Fallback: use default split text primary layout
             self._layout_split_text_primary(slide, slide_data, template_style, template)
 
-        # Save to bytes
-        output = io.BytesIO()
-        prs.save(output)
-        output.seek(0)
-
-        return output.getvalue()
+        return slide
@@ -0,0 +1,156 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Tuple
+
+import qrcode
+from PIL import Image
+
+from config import settings
+from .gradients import hex_to_rgb
+
+# Module grid including the quiet zone; True = dark module
+Matrix = Tuple[Tuple[bool, ...], ...]
+# (x, y, width, height) in modules
+Rect = Tuple[int, int, int, int]
+
+QR_BORDER = 2
+
+
+def build_matrix(url: str) -> Matrix:
+    """QR module grid for ``url`` (smallest fitting version, error correction L)"""
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        border=QR_BORDER,
+    )
+    qr.add_data(url)
+    qr.make(fit=True)
+    return tuple(tuple(bool(module) for module in row) for row in qr.get_matrix())
+
+
+def dark_rectangles(matrix: Matrix) -> List[Rect]:
+    """
+    Cover the dark modules with few rectangles: horizontal runs per row,
+    merged downwards while the run below has the same span.
+    """
+    rects: List[list] = []
+    open_runs = {}
+    for y, row in enumerate(matrix):
+        runs = []
+        x = 0
+        while x < len(row):
+            if row[x]:
+                start = x
+                while x < len(row) and row[x]:
+                    x += 1
+                runs.append((start, x - start))
+            else:
+                x += 1
+
+        continued = {}
+        for run in runs:
+            rect = open_runs.get(run)
+            if rect is not None:
+                rect[3] += 1
+            else:
+                rect = [run[0], y, run[1], 1]
+                rects.append(rect)
+            continued[run] = rect
+        open_runs = continued
+    return [tuple(rect) for rect in rects]
+
+
+def render_qr(matrix: Matrix, size: int, fill_color: str, back_color: str) -> Image.Image:
+    """
+    Rasterize ``matrix`` at exactly ``size`` x ``size`` px. One pixel per
+    module, scaled up with nearest-neighbour so edges stay sharp; modules
+    differ by at most one pixel when ``size`` is not a multiple of the grid.
+    """
+    modules = len(matrix)
+    mask = Image.new('L', (modules, modules))
+    mask.putdata([255 if dark else 0 for row in matrix for dark in row])
+    mask = mask.resize((size, size), Image.Resampling.NEAREST)
+
+    img = Image.new('RGBA', (size, size), hex_to_rgb(back_color) + (255,))
+    img.paste(hex_to_rgb(fill_color) + (255,), (0, 0, size, size), mask)
+    return img
+
+
+class QRCodeCache:
+    """
+    Bounded LRUs of QR codes shared by the PNG/JPG and PPTX exporters.
+
+    Module grids (and the rectangles covering their dark modules, for
+    vector output) are keyed by URL; raster images by (url, size, colours).
+    A deck usually repeats one or two publication links, so most exports
+    skip QR encoding entirely. Cached images are shared and must not be
+    modified.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self._max_entries = max(1, max_entries)
+        self._matrices: "OrderedDict[str, Tuple[Matrix, List[Rect]]]" = OrderedDict()
+        self._images: "OrderedDict[tuple, Image.Image]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def _lookup(self, store: OrderedDict, key, build: Callable):
+        with self._lock:
+            value = store.get(key)
+            if value is not None:
+                store.move_to_end(key)
+                self._hits += 1
+                return value
+            self._misses += 1
+
+        # Build outside the lock; a concurrent miss just builds twice
+        value = build()
+        with self._lock:
+            store[key] = value
+            store.move_to_end(key)
+            while len(store) > self._max_entries:
+                store.popitem(last=False)
+        return value
+
+    def _grid(self, url: str) -> Tuple[Matrix, List[Rect]]:
+        def build():
+            matrix = build_matrix(url)
+            return matrix, dark_rectangles(matrix)
+        return self._lookup(self._matrices, url, build)
+
+    def matrix(self, url: str) -> Matrix:
+        return self._grid(url)[0]
+
+    def rectangles(self, url: str) -> Tuple[int, List[Rect]]:
+        """Grid size in modules and the rectangles covering its dark modules"""
+        matrix, rects = self._grid(url)
+        return len(matrix), rects
+
+    def image(
+        self,
+        url: str,
+        size: int,
+        fill_color: str = "#000000",
+        back_color: str = "#ffffff"
+    ) -> Image.Image:
+        """Shared RGBA QR code of exactly ``size`` px; do not modify it"""
+        key = (url, size, fill_color.lower(), back_color.lower())
+        return self._lookup(
+            self._images,
+            key,
+            lambda: render_qr(self.matrix(url), size, fill_color, back_color)
+        )
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "urls": len(self._matrices),
+                "images": len(self._images),
+                "max_entries": self._max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+
+qr_cache = QRCodeCache(settings.qr_cache_size)
@@ -0,0 +1,79 @@
+import hashlib
+import logging
+import mimetypes
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from playwright.async_api import Page, Route
+
+logger = logging.getLogger(__name__)
+
+
+class RenderBundle:
+    """
+    Serves the prebuilt slide render bundle (``npm run build:render``) to
+    headless Chromium through request interception.
+
+    Pages navigate to a synthetic origin and every request to that origin is
+    fulfilled from memory, so exports need neither the Vite dev server nor
+    any socket I/O. ``file://`` is avoided because Chromium blocks module
+    scripts loaded from it.
+    """
+
+    ORIGIN = "http://render.bundle"
+    ENTRY = "render.html"
+
+    def __init__(self, bundle_dir: str):
+        self._dir = Path(bundle_dir).expanduser().resolve()
+        self._files: Dict[str, Tuple[bytes, str]] = {}
+        self._fingerprint: Optional[str] = None
+
+    @property
+    def url(self) -> str:
+        return f"{self.ORIGIN}/{self.ENTRY}"
+
+    @property
+    def fingerprint(self) -> str:
+        """Short hash of the bundle contents, changes with every rebuild"""
+        if not self._files:
+            self.load()
+        return self._fingerprint
+
+    def load(self):
+        """Read the bundle into memory"""
+        entry = self._dir / self.ENTRY
+        if not entry.is_file():
+            raise FileNotFoundError(f"Render bundle entry not found: {entry}")
+
+        files = {}
+        for path in self._dir.rglob("*"):
+            if path.is_file():
+                relative = path.relative_to(self._dir).as_posix()
+                content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+                files[relative] = (path.read_bytes(), content_type)
+        self._files = files
+        digest = hashlib.sha256()
+        for relative in sorted(files):
+            digest.update(relative.encode())
+            digest.update(files[relative][0])
+        self._fingerprint = digest.hexdigest()[:16]
+        logger.info(f"Loaded render bundle from {self._dir} ({len(files)} files)")
+
+    def _lookup(self, url: str) -> Optional[Tuple[bytes, str]]:
+        path = urlparse(url).path.lstrip("/") or self.ENTRY
+        return self._files.get(path)
+
+    async def _handle(self, route: Route):
+        found = self._lookup(route.request.url)
+        if found is None:
+            await route.fulfill(status=404, body="Not found")
+            return
+        body, content_type = found
+        await route.fulfill(status=200, body=body, content_type=content_type)
+
+    async def install(self, page: Page):
+        """Route the bundle origin on ``page`` to the in-memory files"""
+        if not self._files:
+            self.load()
+        await page.route(f"{self.ORIGIN}/**", self._handle)
@@ -0,0 +1,212 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import fields
+from pathlib import Path
+from typing import Optional
+
+from .base import ExportFormat, RenderEngine, SlideData
+
+logger = logging.getLogger(__name__)
+
+
+def render_cache_key(
+    slide_data: SlideData,
+    format: ExportFormat,
+    engine: RenderEngine,
+    renderer_version: str
+) -> str:
+    """
+    Content address of an export: SHA-256 over the canonical JSON of the
+    slide fields (image bytes replaced by their SHA-256), the format, the
+    engine and the renderer version.
+    """
+    canonical = {}
+    for field in fields(slide_data):
+        value = getattr(slide_data, field.name)
+        if isinstance(value, (bytes, bytearray)):
+            value = {"sha256": hashlib.sha256(value).hexdigest()}
+        canonical[field.name] = value
+    canonical["_format"] = format.value
+    canonical["_engine"] = engine.value
+    canonical["_renderer"] = renderer_version
+    encoded = json.dumps(canonical, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class _MemoryTier:
+    """Byte-bounded LRU of rendered files"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max(0, max_bytes)
+        self.bytes = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            content = self._entries.get(key)
+            if content is not None:
+                self._entries.move_to_end(key)
+            return content
+
+    def put(self, key: str, content: bytes):
+        if len(content) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= len(previous)
+            self._entries[key] = content
+            self.bytes += len(content)
+            while self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= len(evicted)
+                self.evictions += 1
+
+
+class _DiskTier:
+    """
+    Byte-bounded directory of rendered files, shared by worker processes.
+
+    Files are written atomically and touched on every hit; when the
+    directory grows past ``max_bytes`` the least recently used files are
+    removed until it is back under 90% of the budget.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.max_bytes = max(0, max_bytes)
+        self.evictions = 0
+        self._root = Path(directory).expanduser()
+        self._root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.bytes = sum(size for _, size, _ in self._scan())
+
+    def _path(self, key: str) -> Path:
+        return self._root / key[:2] / key
+
+    def _scan(self):
+        for path in self._root.glob("*/*"):
+            if path.name.startswith(".tmp-"):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            yield path, stat.st_size, stat.st_mtime
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            content = path.read_bytes()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return content
+
+    def put(self, key: str, content: bytes):
+        if len(content) > self.max_bytes:
+            return
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        with self._lock:
+            self.bytes += len(content)
+            if self.bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Rescan: other processes write to the same directory
+        entries = sorted(self._scan(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.evictions += 1
+        self.bytes = total
+
+
+class RenderCache:
+    """
+    Two-tier cache of finished exports keyed by ``render_cache_key``.
+
+    The memory tier answers repeat downloads without any I/O; the disk tier
+    survives restarts and is shared by every worker on the host. A disk hit
+    is promoted to memory. Disk I/O runs in a worker thread.
+    """
+
+    def __init__(self, memory_max_bytes: int, disk_dir: Optional[str] = None, disk_max_bytes: int = 0):
+        self._memory = _MemoryTier(memory_max_bytes)
+        self._disk: Optional[_DiskTier] = None
+        if disk_dir and disk_max_bytes > 0:
+            self._disk = _DiskTier(disk_dir, disk_max_bytes)
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+
+    async def get(self, key: str) -> Optional[bytes]:
+        content = self._memory.get(key)
+        if content is not None:
+            self._memory_hits += 1
+            return content
+        if self._disk is not None:
+            try:
+                content = await asyncio.to_thread(self._disk.get, key)
+            except OSError as e:
+                logger.warning(f"Render cache disk read failed: {e}")
+            if content is not None:
+                self._disk_hits += 1
+                self._memory.put(key, content)
+                return content
+        self._misses += 1
+        return None
+
+    async def put(self, key: str, content: bytes):
+        self._memory.put(key, content)
+        if self._disk is not None:
+            try:
+                await asyncio.to_thread(self._disk.put, key, content)
+            except OSError as e:
+                logger.warning(f"Render cache disk write failed: {e}")
+
+    def stats(self) -> dict:
+        stats = {
+            "memory_hits": self._memory_hits,
+            "disk_hits": self._disk_hits,
+            "misses": self._misses,
+            "memory": {
+                "entries": len(self._memory),
+                "bytes": self._memory.bytes,
+                "max_bytes": self._memory.max_bytes,
+                "evictions": self._memory.evictions,
+            },
+        }
+        if self._disk is not None:
+            stats["disk"] = {
+                "bytes": self._disk.bytes,
+                "max_bytes": self._disk.max_bytes,
+                "evictions": self._disk.evictions,
+            }
+        return stats
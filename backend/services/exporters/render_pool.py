@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional, Tuple
+
+from ..image_utils import decoded_image_cache
+from ..metrics import LatencyWindow
+from .admission import ExportTimeoutError
+from .base import CpuBoundExporter, SlideData
+from .image_exporter import JPGExporter, PNGExporter
+from .pptx_exporter import PPTXExporter
+
+logger = logging.getLogger(__name__)
+
+
+# Worker process side: one exporter per format, created by the initializer
+_exporters: Dict[str, CpuBoundExporter] = {}
+
+
+def _init_worker(warm_up: bool, image_cache_max_bytes: int):
+    for exporter in (PPTXExporter(), PNGExporter(), JPGExporter()):
+        _exporters[exporter.format.value] = exporter
+    # Every worker has its own decode cache; split the budget between them
+    decoded_image_cache.set_max_bytes(image_cache_max_bytes)
+    if warm_up:
+        for exporter in _exporters.values():
+            prepare = getattr(exporter, "prepare", None)
+            if prepare is not None:
+                prepare()
+
+
+def _render(format: str, slide_data: SlideData) -> Tuple[bytes, float]:
+    """Render in a worker; returns the content and the render time in seconds"""
+    started = time.perf_counter()
+    content = _exporters[format].render(slide_data)
+    return content, time.perf_counter() - started
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+class RenderPool:
+    """
+    Process pool for the CPU-bound exporters (native PNG/JPG and PPTX).
+
+    Pillow, numpy, qrcode and python-pptx work holds the GIL, so rendering
+    on the event loop (or a thread) stalls every other request. Exports are
+    sent to ``workers`` spawned processes instead; ``SlideData`` is pickled
+    to the worker and the file bytes come back. Workers are replaced after
+    ``max_tasks_per_child`` renders (0 = never) to bound memory growth.
+
+    A render that exceeds ``task_timeout`` seconds fails the export with a
+    503; the worker finishes it in the background and then takes new work.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_tasks_per_child: int = 0,
+        warm_up: bool = True,
+        task_timeout: float = 60.0,
+        image_cache_max_bytes: int = 256 * 1024 * 1024
+    ):
+        self._workers = max(1, workers or os.cpu_count() or 1)
+        self._max_tasks_per_child = max_tasks_per_child or None
+        self._warm_up = warm_up
+        self._task_timeout = task_timeout
+        self._image_cache_max_bytes = image_cache_max_bytes // self._workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+        self._tasks = 0
+        self._failures = 0
+        self._timeouts = 0
+        self._restarts = 0
+        self._render_times = LatencyWindow()
+        # Pickling, queueing and IPC: total time minus render time
+        self._overheads = LatencyWindow()
+
+    def _ensure_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self._warm_up, self._image_cache_max_bytes),
+                max_tasks_per_child=self._max_tasks_per_child
+            )
+        return self._executor
+
+    def _discard_executor(self, executor: ProcessPoolExecutor):
+        """
+        Shut down ``executor`` if it is still the current pool. Every task of
+        a broken pool fails, and by the time the later ones get here a fresh
+        pool may already be serving other requests; leave that one alone.
+        """
+        if self._executor is executor:
+            self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def render(self, exporter: CpuBoundExporter, slide_data: SlideData) -> bytes:
+        """
+        Render ``slide_data`` with the worker-side exporter for ``exporter.format``.
+
+        Raises:
+            ExportTimeoutError: 503 if the render exceeded the task timeout
+        """
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        self._tasks += 1
+        executor = self._ensure_executor()
+        future = loop.run_in_executor(executor, _render, exporter.format.value, slide_data)
+        try:
+            content, render_seconds = await asyncio.wait_for(future, timeout=self._task_timeout)
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            raise ExportTimeoutError(
+                f"{exporter.format.value} render timed out after {self._task_timeout:g}s",
+                status_code=503,
+                retry_after=max(1, int(self._task_timeout))
+            )
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start a fresh pool next time
+            self._failures += 1
+            if self._executor is executor:
+                self._restarts += 1
+                logger.warning("Render pool worker died; restarting the pool")
+            self._discard_executor(executor)
+            raise
+        except Exception:
+            self._failures += 1
+            raise
+
+        self._render_times.record(render_seconds)
+        self._overheads.record(max(0.0, time.monotonic() - started - render_seconds))
+        return content
+
+    async def warm_up(self):
+        """Start every worker now, so the first exports do not pay for process start-up"""
+        loop = asyncio.get_running_loop()
+        executor = self._ensure_executor()
+        started = time.monotonic()
+        pids = await asyncio.gather(*(loop.run_in_executor(executor, _ping) for _ in range(self._workers)))
+        logger.info(
+            f"Render pool: {len(set(pids))}/{self._workers} workers ready in "
+            f"{time.monotonic() - started:.1f}s"
+        )
+
+    def close(self):
+        if self._executor is not None:
+            self._discard_executor(self._executor)
+
+    def stats(self) -> dict:
+        render = self._render_times.stats()
+        overhead = self._overheads.stats()
+        return {
+            "workers": self._workers,
+            "max_tasks_per_child": self._max_tasks_per_child or 0,
+            "task_timeout_seconds": self._task_timeout,
+            "tasks": self._tasks,
+            "failures": self._failures,
+            "timeouts": self._timeouts,
+            "restarts": self._restarts,
+            "render_ms_p50": render["p50_ms"],
+            "render_ms_p95": render["p95_ms"],
+            "overhead_ms_p50": overhead["p50_ms"],
+            "overhead_ms_p95": overhead["p95_ms"],
+        }
@@ -0,0 +1,102 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Tuple
+
+from PIL import Image
+
+
+@dataclass(frozen=True)
+class DecodedImage:
+    """An upload decoded to upright RGB, possibly downscaled"""
+    image: Image.Image
+    # Upright size of the upload before any downscaling
+    original_size: Tuple[int, int]
+
+    @property
+    def nbytes(self) -> int:
+        return self.image.width * self.image.height * len(self.image.getbands())
+
+
+class DecodedImageCache:
+    """
+    LRU of decoded uploads keyed by the SHA-256 of their bytes.
+
+    A user who previews a crop and then exports PNG, JPG and more slides
+    sends the same photo every time; with the cache it is decoded once.
+    Entries are shared between callers and must be treated as read-only
+    (crop/resize/fit all return new images). The cache is bounded by the
+    decoded size of its entries, not by their count.
+    """
+
+    def __init__(self, decode: Callable[[bytes], DecodedImage], max_bytes: int = 256 * 1024 * 1024):
+        self._decode = decode
+        self._max_bytes = max(0, max_bytes)
+        self._entries: "OrderedDict[str, DecodedImage]" = OrderedDict()
+        self._resident_bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, image_data: bytes) -> DecodedImage:
+        """
+        Decoded image for ``image_data``, decoding it on a miss.
+
+        Raises whatever the decoder raises for unreadable data; failures
+        are not cached.
+        """
+        key = hashlib.sha256(image_data).hexdigest()
+        with self._lock:
+            decoded = self._entries.get(key)
+            if decoded is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return decoded
+            self._misses += 1
+
+        # Decode outside the lock; a concurrent miss just decodes twice
+        decoded = self._decode(image_data)
+        self._store(key, decoded)
+        return decoded
+
+    def _store(self, key: str, decoded: DecodedImage):
+        size = decoded.nbytes
+        if size > self._max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._resident_bytes -= previous.nbytes
+            self._entries[key] = decoded
+            self._resident_bytes += size
+            self._evict()
+
+    def _evict(self):
+        while self._resident_bytes > self._max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._resident_bytes -= evicted.nbytes
+            self._evictions += 1
+
+    def set_max_bytes(self, max_bytes: int):
+        """Change the byte budget, evicting down to it"""
+        with self._lock:
+            self._max_bytes = max(0, max_bytes)
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._resident_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "resident_bytes": self._resident_bytes,
+                "max_bytes": self._max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+            }
@@ -1,7 +1,86 @@
 import io
-from PIL import Image
+from PIL import ExifTags, Image, ImageOps
 from typing import Dict, Any, Tuple
 
+from config import settings
+from .image_cache import DecodedImage, DecodedImageCache
+
+# Largest box any consumer fills with an upload (a full-bleed slide image)
+COVER_SIZE = (1920, 1080)
+
+
+def _upright_size(img: Image.Image) -> Tuple[int, int]:
+    """Size of ``img`` once its EXIF orientation is applied"""
+    orientation = img.getexif().get(ExifTags.Base.Orientation, 1)
+    if orientation in (5, 6, 7, 8):
+        return img.height, img.width
+    return img.size
+
+
+def load_image(image_data: bytes, cover_size: Tuple[int, int] = COVER_SIZE) -> DecodedImage:
+    """
+    Decode an upload as upright RGB, downscaled to the smallest size that
+    still covers ``cover_size`` so later crops and fits never upscale.
+
+    Large uploads are never decoded at full resolution when they do not need
+    to be: JPEGs are decoded straight at a 1/2, 1/4 or 1/8 scale with
+    ``draft()``, other formats are shrunk by an integer factor with
+    ``reduce()``, and only the remaining step uses LANCZOS.
+
+    Raises:
+        PIL.UnidentifiedImageError / OSError / ValueError for unreadable data
+    """
+    img = Image.open(io.BytesIO(image_data))
+    original_size = _upright_size(img)
+
+    scale = max(cover_size[0] / original_size[0], cover_size[1] / original_size[1])
+    if scale >= 1:
+        img = ImageOps.exif_transpose(img)
+        return DecodedImage(image=img.convert('RGB'), original_size=original_size)
+
+    target = (max(1, round(original_size[0] * scale)), max(1, round(original_size[1] * scale)))
+    # draft() and reduce() work in stored (pre-rotation) orientation
+    stored_target = target if original_size == img.size else target[::-1]
+
+    if img.format == 'JPEG':
+        img.draft('RGB', stored_target)
+
+    factor = min(img.width // stored_target[0], img.height // stored_target[1])
+    if factor >= 2:
+        img = img.reduce(factor)
+
+    img = ImageOps.exif_transpose(img)
+    img = img.convert('RGB').resize(target, Image.Resampling.LANCZOS)
+    return DecodedImage(image=img, original_size=original_size)
+
+
+def encode_proxy(image_data: bytes, max_edge: int = 1024, quality: int = 85, format: str = "jpeg") -> Tuple[bytes, str]:
+    """
+    Re-encode an upload as a small upright JPEG/WebP for the vision model.
+
+    The proxy keeps the aspect ratio and is rotated like the upright image
+    that crop_image_to_face works on, so normalized (0-1) coordinates the
+    model reports on the proxy apply unchanged to the original.
+
+    Returns:
+        (proxy bytes, MIME type)
+    """
+    img = Image.open(io.BytesIO(image_data))
+    if img.format == 'JPEG':
+        img.draft('RGB', (max_edge, max_edge))
+    img = ImageOps.exif_transpose(img)
+    img = img.convert('RGB')
+    img.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+
+    pil_format = "WEBP" if format.lower() == "webp" else "JPEG"
+    output = io.BytesIO()
+    img.save(output, format=pil_format, quality=quality)
+    return output.getvalue(), f"image/{pil_format.lower()}"
+
+
+# Shared by the crop endpoint and every image exporter
+decoded_image_cache = DecodedImageCache(load_image, settings.image_cache_max_bytes)
+
 
 def crop_image_to_face(
     image_data: bytes,
@@ -26,13 +105,13 @@ def crop_image_to_face(
         Tuple of (cropped_image_bytes, crop_info)
         crop_info contains details about the crop operation
     """
-    img = Image.open(io.BytesIO(image_data))
-    img = img.convert('RGB')
+    decoded = decoded_image_cache.get(image_data)
+    img = decoded.image
 
     width, height = img.size
     crop_info = {
-        "original_width": width,
-        "original_height": height,
+        "original_width": decoded.original_size[0],
+        "original_height": decoded.original_size[1],
         "was_cropped": False,
         "crop_method": "none"
     }
@@ -131,11 +210,13 @@ def crop_image_to_face(
         right = left + final_size
         bottom = top + final_size
 
+        # Report bounds in the coordinates of the original upload
+        scale = decoded.original_size[0] / width
         crop_info["crop_bounds"] = {
-            "left": left,
-            "top": top,
-            "right": right,
-            "bottom": bottom
+            "left": round(left * scale),
+            "top": round(top * scale),
+            "right": round(right * scale),
+            "bottom": round(bottom * scale)
         }
 
         img = img.crop((left, top, right, bottom))
@@ -152,6 +233,31 @@ def crop_image_to_face(
     return output.getvalue(), crop_info
 
 
+def face_in_crop(face_detection: Dict[str, Any], crop_info: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Express a face position (relative to the original image) relative to the
+    square produced by crop_image_to_face, so the analysis can be reused for
+    the cropped image.
+    """
+    bounds = crop_info.get("crop_bounds")
+    if not face_detection.get("has_face") or not bounds:
+        return {"has_face": False}
+
+    width = crop_info["original_width"]
+    height = crop_info["original_height"]
+    side = max(1, bounds["right"] - bounds["left"])
+
+    def unit(value: float) -> float:
+        return min(1.0, max(0.0, value))
+
+    return {
+        **face_detection,
+        "face_center_x": unit((face_detection["face_center_x"] * width - bounds["left"]) / side),
+        "face_center_y": unit((face_detection["face_center_y"] * height - bounds["top"]) / side),
+        "face_size": unit(face_detection["face_size"] * min(width, height) / side),
+    }
+
+
 def get_image_dimensions(image_data: bytes) -> Tuple[int, int]:
     """Get width and height of an image."""
     img = Image.open(io.BytesIO(image_data))
@@ -0,0 +1,599 @@
+import asyncio
+import itertools
+import json
+import logging
+import os
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from enum import Enum
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .blob_store import FileBlobStore
+from .session_store import blob_refs, split_payload
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+FINISHED = (JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+
+class JobNotFoundError(Exception):
+    """Raised for an unknown job id, or one whose result has expired"""
+
+    def __init__(self, job_id: str):
+        super().__init__(f"Job '{job_id}' does not exist or its result has expired")
+        self.job_id = job_id
+
+
+class JobQueueFullError(Exception):
+    """Raised when the queue already holds ``max_queue`` waiting jobs; maps to a 429 response"""
+
+    def __init__(self, message: str, retry_after: int = 5):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class JobRetryError(Exception):
+    """
+    Raised by a handler that cannot run the job right now (e.g. the exporter
+    is overloaded); the job is queued again after ``retry_after`` seconds.
+    """
+
+    def __init__(self, message: str, retry_after: float = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class JobResult:
+    """What a job handler produces"""
+    content: bytes
+    content_type: str
+    filename: str
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    priority: int
+    seq: int
+    payload: Optional[Dict[str, Any]]
+    status: JobStatus = JobStatus.QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    # Times the job was put back in the queue by JobRetryError
+    retries: int = 0
+    content_type: Optional[str] = None
+    filename: Optional[str] = None
+    size: Optional[int] = None
+    # Result bytes (memory) or their blob digest (persistent queue)
+    result: Optional[bytes] = field(default=None, repr=False)
+    result_digest: Optional[str] = None
+    # Blobs the persisted payload references (persistent queue)
+    payload_digests: List[str] = field(default_factory=list)
+
+    def describe(self) -> Dict[str, Any]:
+        """Public view of the job, as returned by GET /jobs/{id}"""
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status.value,
+            "priority": self.priority,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "retries": self.retries,
+            "content_type": self.content_type,
+            "filename": self.filename,
+            "size": self.size,
+        }
+
+    def record(self, payload: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """JSON-serialisable form for the persistent store"""
+        return {
+            **self.describe(),
+            "seq": self.seq,
+            "payload": payload,
+            "result_digest": self.result_digest,
+        }
+
+
+Handler = Callable[[Dict[str, Any]], Awaitable[JobResult]]
+
+
+class JobQueue:
+    """
+    Priority queue of background jobs drained by a pool of worker tasks.
+
+    ``submit`` returns immediately with a queued job; workers take the
+    highest ``priority`` first (FIFO within a priority) and run the handler
+    registered for the job's kind. Finished jobs keep their result for
+    ``result_ttl`` seconds, and at most ``max_results`` finished jobs are
+    kept (oldest dropped first). Results held in memory are also bounded by
+    ``max_result_bytes``: the oldest are dropped to stay under it, and a
+    single result larger than the budget fails its job.
+
+    A handler raising ``JobRetryError`` (backpressure, not a failure) puts
+    the job back in the queue after the requested delay, up to
+    ``max_retries`` times; then it fails.
+
+    With ``store_dir`` set, job records and payload/result bytes are written
+    to disk: jobs that were queued or running when the process stopped are
+    queued again on start, and results survive restarts.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        max_queue: int = 100,
+        result_ttl: float = 3600,
+        max_results: int = 500,
+        store_dir: Optional[str] = None,
+        max_retries: int = 20,
+        max_result_bytes: int = 512 * 1024 * 1024
+    ):
+        self._workers = max(1, workers)
+        self._max_queue = max(1, max_queue)
+        self._result_ttl = result_ttl
+        self._max_results = max(1, max_results)
+        self._max_retries = max(0, max_retries)
+        self._max_result_bytes = max(1, max_result_bytes)
+        # Bytes of finished results held in memory (not in the blob store)
+        self._result_bytes = 0
+        self._handlers: Dict[str, Handler] = {}
+
+        self._jobs: Dict[str, Job] = {}
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._running: Dict[str, asyncio.Task] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._seq = itertools.count()
+        self._closing = False
+
+        self._records: Optional[Path] = None
+        self._blobs: Optional[FileBlobStore] = None
+        # All store file I/O runs off the event loop on one thread, so writes
+        # and deletes of a shared blob happen in the order they were issued
+        self._io: Optional[ThreadPoolExecutor] = None
+        if store_dir:
+            self._io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-store")
+            root = Path(store_dir).expanduser()
+            self._records = root / "jobs"
+            self._records.mkdir(parents=True, exist_ok=True)
+            self._blobs = FileBlobStore(str(root / "blobs"))
+
+        self._submitted = 0
+        self._succeeded = 0
+        self._failed = 0
+        self._cancelled = 0
+        self._expired = 0
+        self._rejected = 0
+        self._retried = 0
+
+    def register(self, kind: str, handler: Handler):
+        """Run ``handler(payload)`` for jobs of ``kind``"""
+        self._handlers[kind] = handler
+
+    # Persistence
+
+    async def _run_io(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._io, fn, *args)
+
+    def _write_record(self, job: Job, payload: Optional[Dict[str, Any]]):
+        path = self._records / f"{job.id}.json"
+        fd, tmp_path = tempfile.mkstemp(dir=self._records, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(job.record(payload), f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    async def _persist(self, job: Job):
+        """Write the job record (and payload blobs while it still needs them)"""
+        if self._records is None:
+            return
+        payload = None
+        blobs: Dict[str, bytes] = {}
+        if job.payload is not None:
+            payload, blobs = split_payload(job.payload)
+            job.payload_digests = list(blobs)
+
+        def write():
+            for data in blobs.values():
+                self._blobs.put(data)
+            self._write_record(job, payload)
+
+        await self._run_io(write)
+
+    def _referenced_digests(self, exclude: Optional[Job]) -> set:
+        """Blob digests still used by jobs other than ``exclude``"""
+        digests = set()
+        for job in self._jobs.values():
+            if job is exclude:
+                continue
+            if job.result_digest:
+                digests.add(job.result_digest)
+            digests.update(job.payload_digests)
+        return digests
+
+    def _delete_files(self, job: Job, digests: List[str], record: bool) -> Optional[asyncio.Future]:
+        """
+        Delete (on the store thread) the blobs among ``digests`` that no
+        other job references, and the job's record if ``record``.
+        """
+        if self._records is None:
+            return None
+        in_use = self._referenced_digests(job)
+        unused = [digest for digest in digests if digest not in in_use]
+        path = self._records / f"{job.id}.json" if record else None
+
+        def delete():
+            if path is not None:
+                path.unlink(missing_ok=True)
+            for digest in unused:
+                self._blobs.delete(digest)
+
+        return asyncio.ensure_future(self._run_io(delete))
+
+    def _unpersist(self, job: Job, digests: List[str]):
+        """Remove a job record and the blobs no other job references, in the background"""
+        future = self._delete_files(job, digests, record=True)
+        if future is not None:
+            future.add_done_callback(self._log_delete_error)
+
+    @staticmethod
+    def _log_delete_error(future: asyncio.Future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.warning(f"Failed to delete job files: {future.exception()}")
+
+    def _load(self):
+        """Restore persisted jobs; unfinished ones are queued again"""
+        now = time.time()
+        records = []
+        for path in self._records.glob("*.json"):
+            try:
+                records.append((path, json.loads(path.read_text())))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping unreadable job record {path.name}: {e}")
+        # Submission order, so requeued jobs keep FIFO within a priority
+        records.sort(key=lambda item: (item[1]["created_at"], item[1]["seq"]))
+
+        expired_digests = []
+        for path, record in records:
+            payload = record.get("payload")
+            refs = {}
+            if payload is not None:
+                refs = blob_refs(payload)
+                payload = dict(payload)
+                for key, digest in refs.items():
+                    payload[key] = self._blobs.get(digest)
+
+            job = Job(
+                id=record["id"],
+                kind=record["kind"],
+                priority=record["priority"],
+                seq=next(self._seq),
+                payload=payload,
+                status=JobStatus(record["status"]),
+                created_at=record["created_at"],
+                started_at=record.get("started_at"),
+                finished_at=record.get("finished_at"),
+                error=record.get("error"),
+                retries=record.get("retries", 0),
+                content_type=record.get("content_type"),
+                filename=record.get("filename"),
+                size=record.get("size"),
+                result_digest=record.get("result_digest"),
+                payload_digests=list(refs.values()),
+            )
+            if job.status in FINISHED:
+                if self._is_expired(job, now):
+                    path.unlink(missing_ok=True)
+                    if job.result_digest:
+                        expired_digests.append(job.result_digest)
+                    continue
+            else:
+                job.status = JobStatus.QUEUED
+                job.started_at = None
+                self._queue.put_nowait((-job.priority, job.seq, job.id))
+            self._jobs[job.id] = job
+
+        # Identical exports share a result blob; keep it while any job uses it
+        in_use = self._referenced_digests(exclude=None)
+        for digest in set(expired_digests) - in_use:
+            self._blobs.delete(digest)
+
+    # Lifecycle
+
+    async def start(self):
+        """Start the workers (and restore persisted jobs)"""
+        if self._tasks:
+            return
+        self._closing = False
+        self._queue = asyncio.PriorityQueue()
+        if self._records is not None:
+            await self._run_io(self._load)
+            logger.info(f"Job queue restored {len(self._jobs)} jobs from {self._records.parent}")
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self._workers)]
+        self._tasks.append(asyncio.create_task(self._sweeper()))
+
+    async def close(self):
+        """Stop the workers; persisted unfinished jobs run again after a restart"""
+        self._closing = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    # API
+
+    def _queued(self) -> int:
+        return sum(1 for job in self._jobs.values() if job.status == JobStatus.QUEUED)
+
+    async def submit(self, kind: str, payload: Dict[str, Any], priority: int = 0) -> Job:
+        """
+        Queue a job and return it without waiting for it to run.
+
+        Raises:
+            JobQueueFullError: ``max_queue`` jobs are already waiting
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"No handler for job kind '{kind}'")
+        if self._queue is None:
+            raise RuntimeError("Job queue is not started")
+        if self._queued() >= self._max_queue:
+            self._rejected += 1
+            raise JobQueueFullError("Export job queue is full, try again later")
+
+        job = Job(id=uuid.uuid4().hex, kind=kind, priority=priority, seq=next(self._seq), payload=payload)
+        # Registered first so its payload blobs count as referenced while they are written
+        self._jobs[job.id] = job
+        try:
+            await self._persist(job)
+        except BaseException:
+            # Never queued: don't leave it behind counting towards max_queue
+            del self._jobs[job.id]
+            self._unpersist(job, job.payload_digests)
+            raise
+        self._queue.put_nowait((-job.priority, job.seq, job.id))
+        self._submitted += 1
+        return job
+
+    def get(self, job_id: str) -> Job:
+        """
+        Raises:
+            JobNotFoundError: unknown or expired job
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise JobNotFoundError(job_id)
+        if self._is_expired(job, time.time()):
+            self._remove(job)
+            self._expired += 1
+            raise JobNotFoundError(job_id)
+        return job
+
+    def position(self, job: Job) -> Optional[int]:
+        """Number of queued jobs that will run before ``job`` (None unless queued)"""
+        if job.status != JobStatus.QUEUED:
+            return None
+        order = (-job.priority, job.seq)
+        return sum(
+            1 for other in self._jobs.values()
+            if other.status == JobStatus.QUEUED and (-other.priority, other.seq) < order
+        )
+
+    async def result(self, job_id: str) -> bytes:
+        """
+        Result bytes of a succeeded job.
+
+        Raises:
+            JobNotFoundError: unknown or expired job, or its stored result is gone
+        """
+        job = self.get(job_id)
+        if job.result is not None:
+            return job.result
+        if job.result_digest and self._blobs is not None:
+            content = await self._run_io(self._blobs.get, job.result_digest)
+            if content is not None:
+                return content
+        raise JobNotFoundError(job_id)
+
+    async def cancel(self, job_id: str) -> Job:
+        """
+        Cancel a queued or running job; a finished job is deleted with its result.
+
+        Raises:
+            JobNotFoundError: unknown or expired job
+        """
+        job = self.get(job_id)
+        if job.status == JobStatus.QUEUED:
+            # Workers skip it when it reaches the front of the queue
+            await self._finish(job, JobStatus.CANCELLED)
+        elif job.status == JobStatus.RUNNING:
+            task = self._running.get(job.id)
+            if task is not None:
+                task.cancel()
+        else:
+            self._remove(job)
+        return job
+
+    # Workers
+
+    async def _finish(self, job: Job, status: JobStatus, result: Optional[JobResult] = None, error: Optional[str] = None):
+        job.status = status
+        job.finished_at = time.time()
+        job.error = error
+        payload_digests, job.payload_digests = job.payload_digests, []
+        job.payload = None
+
+        if result is not None and self._blobs is None and len(result.content) > self._max_result_bytes:
+            status = job.status = JobStatus.FAILED
+            job.error = (
+                f"Result of {len(result.content)} bytes exceeds the "
+                f"{self._max_result_bytes} byte job result budget"
+            )
+            result = None
+
+        if result is not None:
+            job.content_type = result.content_type
+            job.filename = result.filename
+            job.size = len(result.content)
+            if self._blobs is not None:
+                job.result_digest = await self._run_io(self._blobs.put, result.content)
+            else:
+                job.result = result.content
+                self._result_bytes += len(result.content)
+
+        if status == JobStatus.SUCCEEDED:
+            self._succeeded += 1
+        elif status == JobStatus.FAILED:
+            self._failed += 1
+        else:
+            self._cancelled += 1
+
+        if self._records is not None:
+            await self._persist(job)
+            # The payload is no longer needed once the job has finished
+            await self._delete_files(
+                job, [digest for digest in payload_digests if digest != job.result_digest], record=False
+            )
+        self._trim()
+
+    async def _finish_safely(self, job: Job, status: JobStatus, **kwargs):
+        """
+        ``_finish`` for the workers: a store error (e.g. disk full) is logged
+        instead of killing the worker task. A result that could not be stored
+        fails the job; the persisted record may still say queued, in which
+        case the job runs again after a restart.
+        """
+        try:
+            await self._finish(job, status, **kwargs)
+        except Exception as e:
+            logger.exception(f"Failed to record job {job.id} as {status.value}: {e}")
+            if status == JobStatus.SUCCEEDED and job.result is None and job.result_digest is None:
+                job.status = JobStatus.FAILED
+                job.error = f"Could not store the result: {e}"
+
+    def _remove(self, job: Job):
+        if self._jobs.pop(job.id, None) is not None and job.result is not None:
+            self._result_bytes -= len(job.result)
+        self._unpersist(job, [job.result_digest] if job.result_digest else [])
+
+    def _trim(self):
+        """Keep at most max_results finished jobs, and in-memory results within max_result_bytes"""
+        finished = sorted(
+            (job for job in self._jobs.values() if job.status in FINISHED),
+            key=lambda job: job.finished_at
+        )
+        excess = len(finished) - self._max_results
+        for job in finished:
+            if excess <= 0 and self._result_bytes <= self._max_result_bytes:
+                break
+            if excess <= 0 and job.result is None:
+                # Over the byte budget only: jobs without a result in memory free nothing
+                continue
+            self._remove(job)
+            self._expired += 1
+            excess -= 1
+
+    async def _worker(self, index: int):
+        while True:
+            _, _, job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            if job is None or job.status != JobStatus.QUEUED:
+                continue
+
+            job.status = JobStatus.RUNNING
+            job.started_at = time.time()
+            task = asyncio.create_task(self._handlers[job.kind](job.payload))
+            self._running[job.id] = task
+            try:
+                result = await asyncio.shield(task)
+            except JobRetryError as e:
+                if job.retries < self._max_retries:
+                    self._retry_later(job, e.retry_after)
+                    continue
+                logger.warning(f"Job {job.id} ({job.kind}) gave up after {job.retries} retries: {e}")
+                await self._finish_safely(job, JobStatus.FAILED, error=str(e))
+                continue
+            except asyncio.CancelledError:
+                if self._closing:
+                    # Shutdown: the persisted record still says queued/running
+                    task.cancel()
+                    raise
+                await self._finish_safely(job, JobStatus.CANCELLED)
+                continue
+            except Exception as e:
+                logger.warning(f"Job {job.id} ({job.kind}) failed: {e}")
+                await self._finish_safely(job, JobStatus.FAILED, error=str(e))
+                continue
+            finally:
+                self._running.pop(job.id, None)
+            await self._finish_safely(job, JobStatus.SUCCEEDED, result=result)
+
+    def _retry_later(self, job: Job, delay: float):
+        """Put a job that hit backpressure back in the queue after ``delay`` seconds"""
+        job.status = JobStatus.QUEUED
+        job.started_at = None
+        job.retries += 1
+        self._retried += 1
+
+        def requeue():
+            # A job cancelled while waiting is skipped by the workers
+            if self._queue is not None and not self._closing:
+                self._queue.put_nowait((-job.priority, job.seq, job.id))
+
+        asyncio.get_running_loop().call_later(max(0.1, delay), requeue)
+
+    def _is_expired(self, job: Job, now: float) -> bool:
+        return job.status in FINISHED and job.finished_at is not None and now - job.finished_at > self._result_ttl
+
+    async def _sweeper(self):
+        """Drop finished jobs once their result TTL has passed"""
+        interval = max(1.0, min(60.0, self._result_ttl / 2))
+        while True:
+            await asyncio.sleep(interval)
+            now = time.time()
+            for job in list(self._jobs.values()):
+                if self._is_expired(job, now):
+                    self._remove(job)
+                    self._expired += 1
+
+    def stats(self) -> dict:
+        counts = {status.value: 0 for status in JobStatus}
+        for job in self._jobs.values():
+            counts[job.status.value] += 1
+        return {
+            "workers": self._workers,
+            "max_queue": self._max_queue,
+            "result_ttl_seconds": self._result_ttl,
+            "persistent": self._records is not None,
+            "result_bytes": self._result_bytes,
+            "max_result_bytes": self._max_result_bytes,
+            "jobs": counts,
+            "submitted": self._submitted,
+            "succeeded": self._succeeded,
+            "failed": self._failed,
+            "cancelled": self._cancelled,
+            "expired": self._expired,
+            "rejected_queue_full": self._rejected,
+            "retried": self._retried,
+        }
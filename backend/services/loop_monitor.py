@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+from .metrics import LatencyWindow
+
+logger = logging.getLogger(__name__)
+
+
+class _TimedCoroutine:
+    """
+    Drives a coroutine step by step and adds up the time spent inside each
+    step, i.e. the time the coroutine held the event loop. Time spent
+    awaiting I/O, threads or processes is between steps and is not counted.
+    """
+
+    def __init__(self, coro):
+        self._coro = coro
+        self.blocked = 0.0
+        self.longest = 0.0
+
+    def _step(self, started: float):
+        elapsed = time.perf_counter() - started
+        self.blocked += elapsed
+        self.longest = max(self.longest, elapsed)
+
+    def __await__(self):
+        coro = self._coro
+        value, error = None, None
+        while True:
+            started = time.perf_counter()
+            try:
+                if error is not None:
+                    yielded = coro.throw(error)
+                else:
+                    yielded = coro.send(value)
+            except StopIteration as e:
+                self._step(started)
+                return e.value
+            except BaseException:
+                self._step(started)
+                raise
+            self._step(started)
+            try:
+                value, error = (yield yielded), None
+            except BaseException as e:
+                value, error = None, e
+
+
+class _RouteBlocking:
+    def __init__(self):
+        self.requests = 0
+        self.blocked_total = 0.0
+        self.blocked = LatencyWindow()
+        self.longest_step = 0.0
+
+    def stats(self) -> dict:
+        blocked = self.blocked.stats()
+        return {
+            "requests": self.requests,
+            "blocked_ms_total": round(self.blocked_total * 1000, 1),
+            "blocked_ms_p50": blocked["p50_ms"],
+            "blocked_ms_p95": blocked["p95_ms"],
+            "longest_step_ms": round(self.longest_step * 1000, 1),
+        }
+
+
+class LoopMonitor:
+    """
+    Event-loop blocking instrumentation.
+
+    Two views of the same problem:
+
+    - Per route: ``middleware`` wraps each request's ASGI call and times
+      every synchronous stretch it runs on the loop (request parsing, the
+      handler, response serialization). Work handed to threads or processes
+      is not counted. Reported as blocked time per request and the longest
+      single step, keyed by the route's path template.
+    - Loop-wide: a sampler task sleeps ``interval`` seconds and records how
+      late it wakes up. That lag is what every other request on the worker
+      waited, whichever route (or background job) caused it.
+
+    A step longer than ``warn_ms`` is logged with its route.
+    """
+
+    def __init__(self, interval: float = 0.05, warn_ms: float = 100.0):
+        self._interval = interval
+        self._warn = warn_ms / 1000
+        self._routes: Dict[str, _RouteBlocking] = {}
+        self._lag = LatencyWindow(size=1024)
+        self._sampler: Optional[asyncio.Task] = None
+
+    def middleware(self, app):
+        """Pure ASGI middleware; add it first so it runs in the handler's task"""
+        async def timed_app(scope, receive, send):
+            if scope["type"] != "http":
+                await app(scope, receive, send)
+                return
+            timed = _TimedCoroutine(app(scope, receive, send))
+            try:
+                await timed
+            finally:
+                self._record(scope, timed)
+        return timed_app
+
+    def _record(self, scope: dict, timed: _TimedCoroutine):
+        # FastAPI puts the matched route in the scope; use its template so
+        # /jobs/{job_id} is one entry, not one per job. Unmatched paths
+        # share one entry so scanners cannot grow the table.
+        route = scope.get("route")
+        name = f"{scope['method']} {getattr(route, 'path', None) or '<unmatched>'}"
+        entry = self._routes.get(name)
+        if entry is None:
+            entry = self._routes[name] = _RouteBlocking()
+        entry.requests += 1
+        entry.blocked_total += timed.blocked
+        entry.blocked.record(timed.blocked)
+        entry.longest_step = max(entry.longest_step, timed.longest)
+        if timed.longest >= self._warn:
+            logger.warning(f"{name} blocked the event loop for {timed.longest * 1000:.0f}ms in one step")
+
+    async def _sample(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self._interval)
+            self._lag.record(max(0.0, time.perf_counter() - started - self._interval))
+
+    def start(self):
+        if self._sampler is None:
+            self._sampler = asyncio.create_task(self._sample())
+
+    async def close(self):
+        if self._sampler is not None:
+            self._sampler.cancel()
+            try:
+                await self._sampler
+            except asyncio.CancelledError:
+                pass
+            self._sampler = None
+
+    def stats(self) -> dict:
+        lag = self._lag.stats()
+        return {
+            "sample_interval_seconds": self._interval,
+            "lag_ms_p50": lag["p50_ms"],
+            "lag_ms_p95": lag["p95_ms"],
+            "lag_ms_max": lag["max_ms"],
+            "routes": {name: entry.stats() for name, entry in sorted(self._routes.items())},
+        }
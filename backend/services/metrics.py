@@ -0,0 +1,33 @@
+from collections import deque
+from typing import Deque
+
+
+class LatencyWindow:
+    """Rolling window of recent durations with percentile reporting"""
+
+    def __init__(self, size: int = 512):
+        self._samples: Deque[float] = deque(maxlen=size)
+        self._count = 0
+        self._max = 0.0
+
+    def record(self, seconds: float):
+        """Record one duration in seconds"""
+        self._samples.append(seconds)
+        self._count += 1
+        self._max = max(self._max, seconds)
+
+    def percentile(self, p: float) -> float:
+        """Duration (seconds) at percentile ``p`` (0-1) of the window"""
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+    def stats(self) -> dict:
+        """Count plus p50/p95/max in milliseconds"""
+        return {
+            "count": self._count,
+            "p50_ms": round(self.percentile(0.50) * 1000, 1),
+            "p95_ms": round(self.percentile(0.95) * 1000, 1),
+            "max_ms": round(self._max * 1000, 1),
+        }
@@ -0,0 +1,328 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+import openai
+
+from .metrics import LatencyWindow
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class VisionUnavailableError(Exception):
+    """Raised when a vision call is not attempted: circuit open or no capacity before the deadline"""
+
+    def __init__(self, message: str, outcome: str):
+        super().__init__(message)
+        self.outcome = outcome
+
+
+def _outcome(error: BaseException) -> str:
+    """Metrics label for a failed attempt"""
+    if isinstance(error, openai.RateLimitError):
+        return "rate_limited"
+    if isinstance(error, (openai.APITimeoutError, asyncio.TimeoutError)):
+        return "timeout"
+    if isinstance(error, openai.APIConnectionError):
+        return "connection_error"
+    if isinstance(error, openai.APIStatusError):
+        return "server_error" if error.status_code >= 500 else "client_error"
+    return "error"
+
+
+def _retryable(error: BaseException) -> bool:
+    """Transient failures worth another attempt"""
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in (408, 409, 429) or error.status_code >= 500
+    return isinstance(error, (openai.APIConnectionError, asyncio.TimeoutError))
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the server asked us to wait, if it said"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return max(0.0, float(response.headers.get("retry-after")))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBudget:
+    """
+    Tokens-per-minute bucket shared by all calls.
+
+    Callers reserve an estimate before the request and settle with the
+    actual usage afterwards; overspending leaves the bucket in debt so the
+    next callers wait. A ``tokens_per_minute`` of 0 disables the budget.
+    """
+
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = max(0, tokens_per_minute)
+        self._rate = self.capacity / 60.0
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        # FIFO: an early large reservation is not starved by later small ones
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    async def reserve(self, tokens: int, deadline: float) -> int:
+        """
+        Take ``tokens`` from the bucket, waiting for refill.
+
+        Raises:
+            VisionUnavailableError: if they would not be available before ``deadline``
+        """
+        if not self.capacity:
+            return 0
+        tokens = min(tokens, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return tokens
+                wait = (tokens - self._tokens) / self._rate
+                if time.monotonic() + wait > deadline:
+                    raise VisionUnavailableError("Vision token budget exhausted", "budget_exhausted")
+                await asyncio.sleep(wait)
+
+    def settle(self, reserved: int, used: int):
+        """Correct a reservation with the tokens the call actually used"""
+        if not self.capacity:
+            return
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + reserved - used)
+
+    @property
+    def available(self) -> int:
+        if not self.capacity:
+            return 0
+        self._refill()
+        return int(self._tokens)
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing upstream.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls are refused for ``reset_timeout`` seconds; then one probe call is
+    let through (half-open) and its result closes or re-opens the circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self._failure_threshold = max(1, failure_threshold)
+        self._reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self._reset_timeout:
+            self._state = self.HALF_OPEN
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go out now (claims the probe when half-open)"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self):
+        self._state = self.CLOSED
+        self._failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self._failures += 1
+        if self._state == self.HALF_OPEN or self._failures >= self._failure_threshold:
+            if self._state != self.OPEN:
+                logger.warning(f"Vision circuit opened after {self._failures} consecutive failures")
+                self.opened += 1
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+        self._probing = False
+
+    def release(self):
+        """A claimed probe ended without an upstream result (e.g. cancelled)"""
+        self._probing = False
+
+
+class OpenAILimiter:
+    """
+    Concurrency cap, token budget, retries and circuit breaker around
+    OpenAI calls.
+
+    ``call`` waits for one of ``max_in_flight`` slots and for budget, then
+    runs ``fn(timeout)`` with the per-attempt timeout. Transient failures
+    (429, 5xx, timeouts, connection errors) are retried with full-jitter
+    exponential backoff, honouring Retry-After, for up to ``max_attempts``
+    attempts as long as the overall ``deadline`` (seconds) allows.
+    """
+
+    BACKOFF_BASE = 0.5
+    BACKOFF_MAX = 8.0
+
+    def __init__(
+        self,
+        max_in_flight: int = 4,
+        tokens_per_minute: int = 0,
+        timeout: float = 30.0,
+        deadline: float = 60.0,
+        max_attempts: int = 4,
+        breaker_threshold: int = 5,
+        breaker_reset: float = 30.0
+    ):
+        self._max_in_flight = max(1, max_in_flight)
+        self._slots = asyncio.Semaphore(self._max_in_flight)
+        self._budget = TokenBudget(tokens_per_minute)
+        self._breaker = CircuitBreaker(breaker_threshold, breaker_reset)
+        self._timeout = timeout
+        self._deadline = deadline
+        self._max_attempts = max(1, max_attempts)
+
+        self._in_flight = 0
+        self._waiting = 0
+        self._attempts = 0
+        self._retries = 0
+        self._outcomes: Dict[str, int] = {}
+        self._latency = LatencyWindow()
+
+    def _count(self, outcome: str):
+        self._outcomes[outcome] = self._outcomes.get(outcome, 0) + 1
+
+    @property
+    def degraded(self) -> bool:
+        """True while the circuit is not closed"""
+        return self._breaker.state != CircuitBreaker.CLOSED
+
+    async def call(
+        self,
+        fn: Callable[[float], Awaitable[T]],
+        estimated_tokens: int = 0,
+        used_tokens: Callable[[T], int] = lambda _: 0
+    ) -> T:
+        """
+        Run ``fn(timeout)`` under the limits and return its result.
+
+        Raises:
+            VisionUnavailableError: circuit open, or no slot/budget before the deadline
+            openai.APIError / asyncio.TimeoutError: the last failure once
+                retries are exhausted or non-retryable
+        """
+        started = time.monotonic()
+        deadline = started + self._deadline
+
+        probe = self._breaker.state == CircuitBreaker.HALF_OPEN
+        if not self._breaker.allow():
+            self._count("circuit_open")
+            raise VisionUnavailableError("Vision service temporarily unavailable (circuit open)", "circuit_open")
+
+        settled = False
+        try:
+            attempt = 0
+            while True:
+                attempt += 1
+                # Held per attempt only, so backoff sleeps don't keep callers waiting
+                await self._acquire_slot(deadline)
+                try:
+                    try:
+                        reserved = await self._budget.reserve(estimated_tokens, deadline)
+                    except VisionUnavailableError as e:
+                        self._count(e.outcome)
+                        raise
+
+                    remaining = deadline - time.monotonic()
+                    attempt_timeout = max(0.1, min(self._timeout, remaining))
+                    self._attempts += 1
+                    try:
+                        result = await asyncio.wait_for(fn(attempt_timeout), timeout=attempt_timeout + 1)
+                    except Exception as e:
+                        self._budget.settle(reserved, 0)
+                        outcome = _outcome(e)
+                        backoff = min(self.BACKOFF_MAX, self.BACKOFF_BASE * 2 ** (attempt - 1))
+                        delay = max(random.uniform(0, backoff), _retry_after(e) or 0.0)
+                        if (
+                            not _retryable(e)
+                            or attempt >= self._max_attempts
+                            or time.monotonic() + delay >= deadline
+                        ):
+                            self._count(outcome)
+                            # Request-specific rejections say nothing about upstream
+                            # health: leave the breaker as it is (a held probe is
+                            # released below)
+                            if _retryable(e) or isinstance(e, (openai.AuthenticationError, openai.PermissionDeniedError)):
+                                self._breaker.record_failure()
+                                settled = True
+                            raise
+                        self._retries += 1
+                        logger.info(f"Vision call {outcome}, retrying in {delay:.2f}s (attempt {attempt}/{self._max_attempts})")
+                    else:
+                        self._budget.settle(reserved, used_tokens(result) or reserved)
+                        self._count("ok" if attempt == 1 else "ok_after_retry")
+                        self._breaker.record_success()
+                        settled = True
+                        self._latency.record(time.monotonic() - started)
+                        return result
+                finally:
+                    self._in_flight -= 1
+                    self._slots.release()
+                await asyncio.sleep(delay)
+        finally:
+            if probe and not settled:
+                self._breaker.release()
+
+    async def _acquire_slot(self, deadline: float):
+        """
+        Take one of the ``max_in_flight`` slots.
+
+        Raises:
+            VisionUnavailableError: if none frees up before ``deadline``
+        """
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            self._count("overloaded")
+            raise VisionUnavailableError("No vision call slot before the deadline", "overloaded")
+        finally:
+            self._waiting -= 1
+        self._in_flight += 1
+
+    def stats(self) -> dict:
+        latency = self._latency.stats()
+        return {
+            "circuit": self._breaker.state,
+            "circuit_opened": self._breaker.opened,
+            "degraded": self.degraded,
+            "max_in_flight": self._max_in_flight,
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "tokens_per_minute": self._budget.capacity,
+            "tokens_available": self._budget.available,
+            "attempts": self._attempts,
+            "retries": self._retries,
+            "outcomes": dict(self._outcomes),
+            "latency_ms_p50": latency["p50_ms"],
+            "latency_ms_p95": latency["p95_ms"],
+        }
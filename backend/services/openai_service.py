@@ -1,64 +1,292 @@
 from openai import AsyncOpenAI
 from config import settings
-from typing import Optional, Dict, Any
+from .image_utils import encode_proxy
+from .openai_limiter import OpenAILimiter
+from .singleflight import SingleFlight
+from .vision_cache import VisionCache
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+import asyncio
 import base64
+import hashlib
 import json
-import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+ANALYSIS_PROMPT = """Analyze this image and return a JSON object with these keys:
+- "description": 1-2 sentences describing what the image depicts and its relevance to research or academic content
+- "has_face": true if a human face is visible, otherwise false
+- "face_center_x": a number between 0 and 1 for the horizontal center of the main face (0 = left edge, 1 = right edge)
+- "face_center_y": a number between 0 and 1 for the vertical center of the main face (0 = top edge, 1 = bottom edge)
+- "face_size": a number between 0 and 1 for how much of the image the face occupies (0.1 = small, 0.5 = half the image)
+- "confidence": a number between 0 and 1 for how confident you are in the face position
+
+Omit the face_* keys when has_face is false. Return ONLY the JSON object."""
+
+DEFAULT_DESCRIPTION = "an uploaded image"
+
+# Tokens reserved from the budget per analysis before the real usage is
+# known: a 1024px image tile set, the prompt and max_tokens of output
+ESTIMATED_ANALYSIS_TOKENS = 1200
+
+
+def _unit(value: Any, default: float) -> float:
+    """Coerce a model-provided coordinate into [0, 1]"""
+    try:
+        return min(1.0, max(0.0, float(value)))
+    except (TypeError, ValueError):
+        return default
+
+
+def normalize_analysis(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate the model's JSON into a complete analysis dict"""
+    description = raw.get("description")
+    analysis = {
+        "description": description.strip() if isinstance(description, str) and description.strip() else DEFAULT_DESCRIPTION,
+        "has_face": bool(raw.get("has_face", False)),
+        "confidence": _unit(raw.get("confidence"), 0.0),
+    }
+    if analysis["has_face"]:
+        analysis["face_center_x"] = _unit(raw.get("face_center_x"), 0.5)
+        analysis["face_center_y"] = _unit(raw.get("face_center_y"), 0.5)
+        analysis["face_size"] = _unit(raw.get("face_size"), 0.3)
+    return analysis
+
+
+def face_position(analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """The face-detection view of an analysis, as returned by detect_face_position"""
+    if not analysis.get("has_face"):
+        return {"has_face": False}
+    return {
+        "has_face": True,
+        "face_center_x": analysis["face_center_x"],
+        "face_center_y": analysis["face_center_y"],
+        "face_size": analysis["face_size"],
+        "confidence": analysis.get("confidence", 0.0),
+    }
 
 
 class OpenAIService:
     def __init__(self):
-        self.client = AsyncOpenAI(api_key=settings.openai_api_key)
+        # Retries are done by the limiter, within its deadline
+        self.client = AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            base_url=settings.openai_base_url,
+            timeout=settings.openai_timeout,
+            max_retries=0
+        )
+        self._limiter = OpenAILimiter(
+            max_in_flight=settings.openai_max_in_flight,
+            tokens_per_minute=settings.openai_tokens_per_minute,
+            timeout=settings.openai_timeout,
+            deadline=settings.openai_deadline,
+            max_attempts=settings.openai_max_attempts,
+            breaker_threshold=settings.openai_breaker_threshold,
+            breaker_reset=settings.openai_breaker_reset_seconds
+        )
+        # Results replaced by a default because the vision call failed
+        self._degraded = {"description": 0, "face_position": 0}
+        # Image analyses keyed by SHA-256 of the image bytes (most recent last)
+        self._analyses: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._analysis_cache_size = settings.vision_cache_size
+        # Concurrent analyses of the same image share one vision call
+        self._inflight = SingleFlight("vision")
+        # Persistent cache that also matches re-encoded near-duplicates
+        self._vision_cache: Optional[VisionCache] = None
+        if settings.vision_cache_enabled:
+            self._vision_cache = VisionCache(
+                settings.vision_cache_path,
+                ttl_seconds=settings.vision_cache_ttl_seconds,
+                max_entries=settings.vision_cache_max_entries,
+                max_distance=settings.vision_cache_max_distance
+            )
 
-    async def analyze_image(self, image_data: bytes, image_type: str = "image/jpeg") -> str:
+    def _vision_payload(self, image_data: bytes, image_type: str) -> Tuple[bytes, str]:
         """
-        Analyze an image using GPT-4 Vision to describe what's in the image.
+        Image bytes and MIME type to send to the vision model: a bounded
+        proxy (VISION_MAX_EDGE, VISION_QUALITY, VISION_FORMAT), or the
+        original when it is already smaller or cannot be decoded.
+        """
+        try:
+            proxy, proxy_type = encode_proxy(
+                image_data,
+                max_edge=settings.vision_max_edge,
+                quality=settings.vision_quality,
+                format=settings.vision_format
+            )
+        except Exception as e:
+            logger.info(f"Sending original image to vision model, proxy failed: {e}")
+            return image_data, image_type
+
+        if len(proxy) >= len(image_data):
+            return image_data, image_type
+        logger.debug(f"Vision proxy: {len(image_data)} -> {len(proxy)} bytes ({len(image_data) - len(proxy)} saved)")
+        return proxy, proxy_type
+
+    @staticmethod
+    def _image_key(image_data: bytes) -> str:
+        return hashlib.sha256(image_data).hexdigest()
+
+    def cached_analysis(self, image_data: bytes) -> Optional[Dict[str, Any]]:
+        """Analysis previously computed for these exact image bytes, if any"""
+        return self._analyses.get(self._image_key(image_data))
+
+    def _remember(self, image_data: bytes, analysis: Dict[str, Any]):
+        key = self._image_key(image_data)
+        self._analyses[key] = analysis
+        self._analyses.move_to_end(key)
+        while len(self._analyses) > self._analysis_cache_size:
+            self._analyses.popitem(last=False)
+
+    async def remember_analysis(self, image_data: bytes, analysis: Dict[str, Any], tokens: int = 0):
+        """Cache an analysis for this image (and, persistently, its near-duplicates)"""
+        self._remember(image_data, analysis)
+        if self._vision_cache is not None:
+            try:
+                await self._vision_cache.put(image_data, analysis, tokens)
+            except Exception as e:
+                logger.warning(f"Error storing vision cache entry: {e}")
+
+    async def analyze_image_full(
+        self,
+        image_data: bytes,
+        image_type: str = "image/jpeg",
+        bypass_cache: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Describe an image and locate its main face in a single GPT-4 Vision call.
+
+        Results are cached by image hash, so /analyze-and-crop-image and
+        /process-metadata share one call per image, and persistently by
+        perceptual hash, so re-uploads of the same photo skip the call.
+        Concurrent calls for the same image share one request.
 
         Args:
             image_data: Binary image data
             image_type: MIME type of the image
+            bypass_cache: Skip cache lookups and analyze again (the fresh
+                result still replaces the cached one)
 
         Returns:
-            Description of what's in the image
-        """
-        try:
-            # Encode image to base64
-            base64_image = base64.b64encode(image_data).decode('utf-8')
+            {
+                'description': str,
+                'has_face': bool,
+                'face_center_x', 'face_center_y', 'face_size': float (0-1, only with a face),
+                'confidence': float (0-1)
+            }
 
-            response = await self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
+        Raises:
+            Exception: If the API call fails or returns invalid JSON (not cached)
+        """
+        key = self._image_key(image_data)
+        if not bypass_cache:
+            cached = self._analyses.get(key)
+            if cached is not None:
+                self._analyses.move_to_end(key)
+                return cached
+        return await self._inflight.do(
+            (key, bypass_cache),
+            lambda: self._analyze_image(image_data, image_type, bypass_cache)
+        )
+
+    async def _analyze_image(self, image_data: bytes, image_type: str, bypass_cache: bool) -> Dict[str, Any]:
+        """Persistent cache lookup, then the vision call itself"""
+        if not bypass_cache:
+            if self._vision_cache is not None:
+                try:
+                    cached = await self._vision_cache.get(image_data)
+                except Exception as e:
+                    logger.warning(f"Error reading vision cache: {e}")
+                    cached = None
+                if cached is not None:
+                    self._remember(image_data, cached)
+                    return cached
+
+        # Decoding and re-encoding is CPU-bound; keep it off the event loop
+        payload, payload_type = await asyncio.to_thread(self._vision_payload, image_data, image_type)
+        base64_image = base64.b64encode(payload).decode('utf-8')
+
+        messages = [
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": ANALYSIS_PROMPT
+                    },
                     {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": "Describe this image in 1-2 sentences, focusing on what it depicts and its relevance to research or academic content."
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:{image_type};base64,{base64_image}"
-                                }
-                            }
-                        ]
+                        "type": "image_url",
+                        "image_url": {
+                            "url": f"data:{payload_type};base64,{base64_image}"
+                        }
                     }
-                ],
-                max_tokens=150
-            )
+                ]
+            }
+        ]
+        response = await self._limiter.call(
+            lambda timeout: self.client.chat.completions.create(
+                model="gpt-4o",
+                messages=messages,
+                response_format={"type": "json_object"},
+                max_tokens=250,
+                timeout=timeout
+            ),
+            estimated_tokens=ESTIMATED_ANALYSIS_TOKENS,
+            used_tokens=lambda response: response.usage.total_tokens if response.usage else 0
+        )
+
+        analysis = normalize_analysis(json.loads(response.choices[0].message.content))
+        tokens = response.usage.total_tokens if response.usage else 0
+        await self.remember_analysis(image_data, analysis, tokens)
+        return analysis
+
+    @property
+    def degraded(self) -> bool:
+        """True while vision calls are being skipped after repeated failures"""
+        return self._limiter.degraded
+
+    def stats(self) -> dict:
+        """Vision analysis cache, call limiter and degraded-result statistics"""
+        stats = {
+            "memory_entries": len(self._analyses),
+            "singleflight": self._inflight.stats(),
+            "limiter": self._limiter.stats(),
+            "degraded_results": dict(self._degraded),
+        }
+        if self._vision_cache is not None:
+            stats["persistent"] = self._vision_cache.stats()
+        return stats
+
+    async def analyze_image(self, image_data: bytes, image_type: str = "image/jpeg", bypass_cache: bool = False) -> str:
+        """
+        Analyze an image using GPT-4 Vision to describe what's in the image.
+
+        Args:
+            image_data: Binary image data
+            image_type: MIME type of the image
+            bypass_cache: Analyze again instead of using a cached result
 
-            return response.choices[0].message.content.strip()
+        Returns:
+            Description of what's in the image
+        """
+        try:
+            analysis = await self.analyze_image_full(image_data, image_type, bypass_cache)
+            return analysis["description"]
         except Exception as e:
             print(f"Error analyzing image: {str(e)}")
-            return "an uploaded image"
+            self._degraded["description"] += 1
+            return DEFAULT_DESCRIPTION
 
-    async def detect_face_position(self, image_data: bytes, image_type: str = "image/jpeg") -> Dict[str, Any]:
+    async def detect_face_position(self, image_data: bytes, image_type: str = "image/jpeg", bypass_cache: bool = False) -> Dict[str, Any]:
         """
         Analyze an image using GPT-4 Vision to detect face position for smart cropping.
 
         Args:
             image_data: Binary image data
             image_type: MIME type of the image
+            bypass_cache: Analyze again instead of using a cached result
 
         Returns:
             Dictionary with face detection results:
@@ -66,61 +294,21 @@ class OpenAIService:
                 'has_face': bool,
                 'face_center_x': float (0-1, percentage from left),
                 'face_center_y': float (0-1, percentage from top),
-                'face_size': float (0-1, relative to image size)
+                'face_size': float (0-1, relative to image size),
+                'confidence': float (0-1)
             }
+            When the vision call fails the result is {'has_face': False,
+            'degraded': True}.
         """
         try:
-            base64_image = base64.b64encode(image_data).decode('utf-8')
-
-            response = await self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": """Analyze this image for face detection and positioning.
-
-If there is a human face visible in the image, return a JSON object with:
-- "has_face": true
-- "face_center_x": a number between 0 and 1 representing the horizontal center of the face (0 = left edge, 1 = right edge)
-- "face_center_y": a number between 0 and 1 representing the vertical center of the face (0 = top edge, 1 = bottom edge)
-- "face_size": a number between 0 and 1 representing how much of the image the face occupies (0.1 = small, 0.5 = half the image)
-
-If there is NO human face visible, return:
-{"has_face": false}
-
-Return ONLY the JSON object, no other text."""
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:{image_type};base64,{base64_image}"
-                                }
-                            }
-                        ]
-                    }
-                ],
-                max_tokens=150
-            )
-
-            response_text = response.choices[0].message.content.strip()
-
-            # Parse JSON from response (handle markdown code blocks)
-            json_match = re.search(r'\{[^}]+\}', response_text)
-            if json_match:
-                result = json.loads(json_match.group())
-                return result
-
-            return {"has_face": False}
-
+            analysis = await self.analyze_image_full(image_data, image_type, bypass_cache)
+            return face_position(analysis)
         except json.JSONDecodeError as e:
             print(f"Error parsing face detection response: {str(e)}")
-            return {"has_face": False}
         except Exception as e:
             print(f"Error detecting face position: {str(e)}")
-            return {"has_face": False}
+        self._degraded["face_position"] += 1
+        return {"has_face": False, "degraded": True}
 
     def format_metadata_summary(
         self,
@@ -0,0 +1,599 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .blob_store import FileBlobStore, blob_digest
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:
+    redis_asyncio = None
+
+logger = logging.getLogger(__name__)
+
+
+class SessionNotFoundError(Exception):
+    """Raised when an export references a session that expired or never existed"""
+
+    def __init__(self, session_id: str):
+        super().__init__(
+            f"Session '{session_id}' has expired or does not exist; "
+            f"process the metadata again to re-upload the image"
+        )
+        self.session_id = session_id
+
+
+class SessionTooLargeError(Exception):
+    """Raised when a session alone exceeds the store's byte budget; maps to a 413 response"""
+
+    def __init__(self, size: int, max_bytes: int):
+        super().__init__(
+            f"Upload of {size} bytes exceeds the session store budget of {max_bytes} bytes"
+        )
+        self.size = size
+        self.max_bytes = max_bytes
+
+
+def session_size(data: Dict[str, Any]) -> int:
+    """Approximate resident size of a session payload in bytes"""
+    size = 0
+    for key, value in data.items():
+        size += len(key)
+        if isinstance(value, (bytes, bytearray)):
+            size += len(value)
+        elif isinstance(value, str):
+            size += len(value.encode())
+    return size
+
+
+# Placeholder for a bytes value stored as a content-addressed blob
+_BLOB_REF = "__blob__"
+
+
+def split_payload(data: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, bytes]]:
+    """Replace bytes values with blob references; return (payload, blobs by digest)"""
+    payload, blobs = {}, {}
+    for key, value in data.items():
+        if isinstance(value, (bytes, bytearray)):
+            digest = blob_digest(value)
+            blobs[digest] = bytes(value)
+            payload[key] = {_BLOB_REF: digest}
+        else:
+            payload[key] = value
+    return payload, blobs
+
+
+def blob_refs(payload: Dict[str, Any]) -> Dict[str, str]:
+    """Keys of ``payload`` that reference a blob, mapped to the blob digest"""
+    return {
+        key: value[_BLOB_REF]
+        for key, value in payload.items()
+        if isinstance(value, dict) and _BLOB_REF in value
+    }
+
+
+class SessionStore(ABC):
+    """
+    Storage for processed metadata sessions (uploaded image bytes plus the
+    image description) between /process-metadata and the exports that
+    reference them by session_id.
+    """
+
+    @abstractmethod
+    async def put(self, session_id: str, data: Dict[str, Any]):
+        """
+        Store (or replace) a session.
+
+        Raises:
+            SessionTooLargeError: the session alone exceeds the store's byte budget
+        """
+        pass
+
+    @abstractmethod
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Return the session, or None if it expired, was evicted or never existed"""
+        pass
+
+    @abstractmethod
+    async def delete(self, session_id: str):
+        """Remove a session if present"""
+        pass
+
+    @abstractmethod
+    def stats(self) -> dict:
+        """Hit/miss/eviction counters and resident size"""
+        pass
+
+    async def close(self):
+        """Release connections or files held by the store"""
+        pass
+
+
+class MemorySessionStore(SessionStore):
+    """
+    In-process LRU session store with a TTL and a byte budget.
+
+    A session expires ``ttl_seconds`` after it was last stored or read.
+    When the store holds more than ``max_entries`` sessions or more than
+    ``max_bytes`` of payload, the least recently used sessions are evicted.
+    Only usable with a single worker process.
+    """
+
+    backend = "memory"
+
+    def __init__(self, ttl_seconds: float = 3600, max_bytes: int = 512 * 1024 * 1024, max_entries: int = 1000):
+        self._ttl = ttl_seconds
+        self._max_bytes = max(0, max_bytes)
+        self._max_entries = max(1, max_entries)
+        # session_id -> (expires_at, size, data)
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()
+        self._resident_bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def _remove(self, session_id: str):
+        _, size, _ = self._sessions.pop(session_id)
+        self._resident_bytes -= size
+
+    def _purge_expired(self, now: float):
+        # Sessions are ordered by last use, and each use extends the expiry
+        # by the same TTL, so expired sessions are always at the front
+        while self._sessions:
+            session_id, (expires_at, _, _) = next(iter(self._sessions.items()))
+            if expires_at > now:
+                break
+            self._remove(session_id)
+            self._expirations += 1
+
+    async def put(self, session_id: str, data: Dict[str, Any]):
+        size = session_size(data)
+        now = time.monotonic()
+        with self._lock:
+            if session_id in self._sessions:
+                self._remove(session_id)
+            self._purge_expired(now)
+            if size > self._max_bytes:
+                # Storing it would evict it right away and fail the export later with a 410
+                raise SessionTooLargeError(size, self._max_bytes)
+            self._sessions[session_id] = (now + self._ttl, size, data)
+            self._resident_bytes += size
+            while len(self._sessions) > self._max_entries or self._resident_bytes > self._max_bytes:
+                self._remove(next(iter(self._sessions)))
+                self._evictions += 1
+
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            self._purge_expired(now)
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                self._misses += 1
+                return None
+            _, size, data = entry
+            self._sessions[session_id] = (now + self._ttl, size, data)
+            self._sessions.move_to_end(session_id)
+            self._hits += 1
+            return data
+
+    async def delete(self, session_id: str):
+        with self._lock:
+            if session_id in self._sessions:
+                self._remove(session_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "entries": len(self._sessions),
+                "resident_bytes": self._resident_bytes,
+                "max_bytes": self._max_bytes,
+                "max_entries": self._max_entries,
+                "ttl_seconds": self._ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
+
+
+class _BlobChanges:
+    """
+    Blob file changes made inside one SQLite write transaction, kept in step
+    with its outcome. New blobs are written immediately and removed again if
+    the transaction rolls back. Blobs to delete are first renamed aside and
+    only unlinked after COMMIT, or renamed back on rollback. Both happen
+    while the write lock is still held, so no other process sees files that
+    disagree with the committed rows.
+    """
+
+    TRASH_PREFIX = ".trash-"
+
+    def __init__(self, blobs: FileBlobStore):
+        self._blobs = blobs
+        self._created: List[str] = []
+        self._trashed: List[Tuple[Path, Path]] = []
+
+    def put(self, data: bytes) -> str:
+        digest = blob_digest(data)
+        existed = self._blobs.path(digest).exists()
+        self._blobs.put(data)
+        if not existed:
+            self._created.append(digest)
+        return digest
+
+    def delete(self, digest: str):
+        path = self._blobs.path(digest)
+        # The timestamp lets a later start-up sweep trash left by a crash
+        trash = path.with_name(f"{self.TRASH_PREFIX}{int(time.time())}-{uuid.uuid4().hex}")
+        try:
+            os.replace(path, trash)
+        except FileNotFoundError:
+            return
+        self._trashed.append((path, trash))
+
+    def undo(self):
+        """Before ROLLBACK: drop new blobs, restore the ones set aside"""
+        for digest in self._created:
+            self._blobs.delete(digest)
+        for path, trash in self._trashed:
+            os.replace(trash, path)
+
+    def commit(self):
+        """After COMMIT: the set-aside blobs are gone for good"""
+        for _, trash in self._trashed:
+            trash.unlink(missing_ok=True)
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Session store shared by every worker process on one host.
+
+    Session metadata lives in SQLite (WAL mode); uploaded bytes live in a
+    content-addressed FileBlobStore next to it, so an image shared by
+    several sessions is stored once and can be read in chunks. Writes,
+    expiry and eviction run inside one IMMEDIATE transaction, which also
+    serializes blob creation against garbage collection of unreferenced
+    blobs across processes. Blob files follow the transaction's outcome
+    (see ``_BlobChanges``), so a rollback leaves no orphaned or missing
+    files.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, directory: str, ttl_seconds: float = 3600, max_bytes: int = 512 * 1024 * 1024, max_entries: int = 1000):
+        root = Path(directory).expanduser()
+        root.mkdir(parents=True, exist_ok=True)
+        self._db_path = str(root / "sessions.sqlite3")
+        self.blobs = FileBlobStore(str(root / "blobs"))
+        self._ttl = ttl_seconds
+        self._max_bytes = max(0, max_bytes)
+        self._max_entries = max(1, max_entries)
+        # Counters are per process
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._init_db()
+        self._sweep_trash()
+        # (sessions, resident bytes, blobs) as of this process's last write,
+        # so stats() never touches the database on the event loop
+        conn = self._connect()
+        try:
+            self._usage_snapshot = self._usage_with_blobs(conn)
+        finally:
+            conn.close()
+
+    def _sweep_trash(self, max_age: float = 3600):
+        """Remove blobs set aside by a transaction that crashed before finishing"""
+        cutoff = time.time() - max_age
+        for path in self.blobs.root.glob(f"*/{_BlobChanges.TRASH_PREFIX}*"):
+            try:
+                stamp = int(path.name[len(_BlobChanges.TRASH_PREFIX):].split("-", 1)[0])
+            except ValueError:
+                continue
+            if stamp < cutoff:
+                path.unlink(missing_ok=True)
+
+    @contextmanager
+    def _write_transaction(self, conn: sqlite3.Connection):
+        """IMMEDIATE transaction yielding the _BlobChanges to make blob file changes through"""
+        changes = _BlobChanges(self.blobs)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield changes
+            usage = self._usage_with_blobs(conn)
+            conn.execute("COMMIT")
+        except BaseException:
+            changes.undo()
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        changes.commit()
+        self._usage_snapshot = usage
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self._db_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _init_db(self):
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    id TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS sessions_last_used ON sessions (last_used);
+                CREATE TABLE IF NOT EXISTS blobs (
+                    digest TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS session_blobs (
+                    session_id TEXT NOT NULL,
+                    digest TEXT NOT NULL,
+                    PRIMARY KEY (session_id, digest)
+                );
+                CREATE INDEX IF NOT EXISTS session_blobs_digest ON session_blobs (digest);
+            """)
+
+    @staticmethod
+    def _delete_session(conn: sqlite3.Connection, session_id: str):
+        conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+        conn.execute("DELETE FROM session_blobs WHERE session_id = ?", (session_id,))
+
+    @staticmethod
+    def _collect_garbage(conn: sqlite3.Connection, changes: _BlobChanges):
+        """Delete blobs no session references (inside the write transaction)"""
+        orphans = [row[0] for row in conn.execute(
+            "SELECT digest FROM blobs WHERE digest NOT IN (SELECT digest FROM session_blobs)"
+        )]
+        for digest in orphans:
+            conn.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+            changes.delete(digest)
+
+    def _purge_expired(self, conn: sqlite3.Connection, now: float):
+        expired = [row[0] for row in conn.execute("SELECT id FROM sessions WHERE expires_at <= ?", (now,))]
+        for session_id in expired:
+            self._delete_session(conn, session_id)
+        self._expirations += len(expired)
+
+    @staticmethod
+    def _usage(conn: sqlite3.Connection) -> Tuple[int, int]:
+        """(session count, resident bytes of payloads plus unique blobs)"""
+        count, payload_bytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM sessions").fetchone()
+        blob_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        return count, payload_bytes + blob_bytes
+
+    @classmethod
+    def _usage_with_blobs(cls, conn: sqlite3.Connection) -> Tuple[int, int, int]:
+        count, resident = cls._usage(conn)
+        return count, resident, conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
+
+    def _put(self, session_id: str, data: Dict[str, Any]):
+        payload, blobs = split_payload(data)
+        encoded = json.dumps(payload)
+        size = len(encoded) + sum(len(blob) for blob in blobs.values())
+        if size > self._max_bytes:
+            raise SessionTooLargeError(size, self._max_bytes)
+        now = time.time()
+        conn = self._connect()
+        try:
+            with self._write_transaction(conn) as changes:
+                self._put_session(conn, changes, session_id, encoded, blobs, now)
+        finally:
+            conn.close()
+
+    def _put_session(
+        self,
+        conn: sqlite3.Connection,
+        changes: _BlobChanges,
+        session_id: str,
+        encoded: str,
+        blobs: Dict[str, bytes],
+        now: float
+    ):
+        self._delete_session(conn, session_id)
+        self._purge_expired(conn, now)
+        for digest, blob in blobs.items():
+            changes.put(blob)
+            conn.execute("INSERT OR IGNORE INTO blobs (digest, size) VALUES (?, ?)", (digest, len(blob)))
+            conn.execute("INSERT INTO session_blobs (session_id, digest) VALUES (?, ?)", (session_id, digest))
+        conn.execute(
+            "INSERT INTO sessions (id, payload, size, expires_at, last_used) VALUES (?, ?, ?, ?, ?)",
+            (session_id, encoded, len(encoded), now + self._ttl, now)
+        )
+        self._collect_garbage(conn, changes)
+
+        count, resident = self._usage(conn)
+        while count > self._max_entries or resident > self._max_bytes:
+            oldest = conn.execute("SELECT id FROM sessions ORDER BY last_used LIMIT 1").fetchone()
+            if oldest is None:
+                break
+            self._delete_session(conn, oldest[0])
+            self._collect_garbage(conn, changes)
+            self._evictions += 1
+            count, resident = self._usage(conn)
+
+    def _get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT payload, expires_at FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                self._misses += 1
+                return None
+            conn.execute(
+                "UPDATE sessions SET expires_at = ?, last_used = ? WHERE id = ?",
+                (now + self._ttl, now, session_id)
+            )
+        finally:
+            conn.close()
+
+        data = json.loads(row[0])
+        for key, digest in blob_refs(data).items():
+            blob = self.blobs.get(digest)
+            if blob is None:
+                # Evicted by another process between the two reads
+                self._misses += 1
+                return None
+            data[key] = blob
+        self._hits += 1
+        return data
+
+    def _delete(self, session_id: str):
+        conn = self._connect()
+        try:
+            with self._write_transaction(conn) as changes:
+                self._delete_session(conn, session_id)
+                self._collect_garbage(conn, changes)
+        finally:
+            conn.close()
+
+    async def put(self, session_id: str, data: Dict[str, Any]):
+        await asyncio.to_thread(self._put, session_id, data)
+
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._get, session_id)
+
+    async def delete(self, session_id: str):
+        await asyncio.to_thread(self._delete, session_id)
+
+    def stats(self) -> dict:
+        # Other workers write to the same database; their changes show up
+        # here after this process's next write
+        count, resident, blob_count = self._usage_snapshot
+        return {
+            "backend": self.backend,
+            "entries": count,
+            "blobs": blob_count,
+            "resident_bytes": resident,
+            "max_bytes": self._max_bytes,
+            "max_entries": self._max_entries,
+            "ttl_seconds": self._ttl,
+            "hits": self._hits,
+            "misses": self._misses,
+            "evictions": self._evictions,
+            "expirations": self._expirations,
+        }
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Session store on a Redis-protocol server (Redis, Valkey, KeyDB...),
+    shared by every worker and replica.
+
+    Sessions are JSON documents with a TTL; uploaded bytes are stored once
+    per SHA-256 under their own key and their TTL is refreshed whenever a
+    session referencing them is stored or read. Size-based eviction is left
+    to the server (configure ``maxmemory`` with an LRU policy).
+    Requires the optional ``redis`` package.
+    """
+
+    backend = "redis"
+
+    def __init__(self, url: str, ttl_seconds: float = 3600, prefix: str = "slides:"):
+        if redis_asyncio is None:
+            raise RuntimeError("SESSION_STORE_BACKEND=redis requires the 'redis' package (pip install redis)")
+        self._redis = redis_asyncio.from_url(url)
+        self._ttl = max(1, int(ttl_seconds))
+        self._prefix = prefix
+        self._hits = 0
+        self._misses = 0
+
+    def _session_key(self, session_id: str) -> str:
+        return f"{self._prefix}session:{session_id}"
+
+    def _blob_key(self, digest: str) -> str:
+        return f"{self._prefix}blob:{digest}"
+
+    async def put(self, session_id: str, data: Dict[str, Any]):
+        payload, blobs = split_payload(data)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            for digest, blob in blobs.items():
+                # Deduplicated: only the first session uploads the bytes
+                pipe.set(self._blob_key(digest), blob, ex=self._ttl, nx=True)
+                pipe.expire(self._blob_key(digest), self._ttl)
+            pipe.set(self._session_key(session_id), json.dumps(payload), ex=self._ttl)
+            await pipe.execute()
+
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        key = self._session_key(session_id)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.get(key)
+            pipe.expire(key, self._ttl)
+            raw, _ = await pipe.execute()
+        if raw is None:
+            self._misses += 1
+            return None
+
+        data = json.loads(raw)
+        refs = blob_refs(data)
+        if refs:
+            async with self._redis.pipeline(transaction=True) as pipe:
+                for digest in refs.values():
+                    pipe.get(self._blob_key(digest))
+                    pipe.expire(self._blob_key(digest), self._ttl)
+                results = await pipe.execute()
+            for (key, _), blob in zip(refs.items(), results[::2]):
+                if blob is None:
+                    self._misses += 1
+                    return None
+                data[key] = blob
+        self._hits += 1
+        return data
+
+    async def delete(self, session_id: str):
+        # Blobs may be shared with other sessions; they expire on their own
+        await self._redis.delete(self._session_key(session_id))
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend,
+            "ttl_seconds": self._ttl,
+            "hits": self._hits,
+            "misses": self._misses,
+        }
+
+    async def close(self):
+        await self._redis.aclose()
+
+
+def create_session_store(settings) -> SessionStore:
+    """Build the session store selected by ``settings.session_store_backend``"""
+    backend = settings.session_store_backend
+    logger.info(f"Session store backend: {backend}")
+    if backend == "memory":
+        return MemorySessionStore(
+            ttl_seconds=settings.session_ttl_seconds,
+            max_bytes=settings.session_max_bytes,
+            max_entries=settings.session_max_entries,
+        )
+    if backend == "sqlite":
+        return SQLiteSessionStore(
+            settings.session_store_dir,
+            ttl_seconds=settings.session_ttl_seconds,
+            max_bytes=settings.session_max_bytes,
+            max_entries=settings.session_max_entries,
+        )
+    if backend == "redis":
+        return RedisSessionStore(settings.session_redis_url, ttl_seconds=settings.session_ttl_seconds)
+    raise ValueError(f"Unknown session store backend: {backend}")
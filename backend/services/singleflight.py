@@ -0,0 +1,65 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call:
+    """One in-flight task and the number of callers awaiting it"""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one task.
+
+    The first caller for a key starts the work; callers arriving while it
+    runs await the same task (through ``asyncio.shield``) and receive its
+    result or exception. Cancelling one caller never cancels the work for
+    the others; the task is cancelled only once every caller has gone.
+    Nothing is cached: the key is forgotten as soon as the task finishes.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+        self._started = 0
+        self._coalesced = 0
+        self._abandoned = 0
+
+    def _forget(self, key: Hashable, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run ``fn()`` for ``key``, or join the run already in flight"""
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            self._started += 1
+        else:
+            self._coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Every caller gave up (e.g. clients disconnected)
+                self._forget(key, call)
+                call.task.cancel()
+                self._abandoned += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._calls),
+            "started": self._started,
+            "coalesced": self._coalesced,
+            "abandoned": self._abandoned,
+        }
@@ -0,0 +1,223 @@
+import asyncio
+import hashlib
+import io
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+# The 64-bit hash is split into this many 16-bit bands. Two hashes within
+# BANDS - 1 bits of each other share at least one band exactly, so band
+# lookups find every near-duplicate up to that distance through an index.
+BANDS = 4
+BAND_BITS = 64 // BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+
+# Near-duplicates must also have (almost) the same shape; face coordinates
+# are relative to the image frame
+MAX_ASPECT_DIFFERENCE = 0.02
+
+
+def dhash(image_data: bytes) -> Tuple[int, float]:
+    """
+    64-bit difference hash of the upright image plus its aspect ratio.
+
+    Re-encodes, recompressions and resizes of the same photo hash to the
+    same or nearly the same value.
+    """
+    img = Image.open(io.BytesIO(image_data))
+    if img.format == 'JPEG':
+        img.draft('L', (64, 64))
+    img = ImageOps.exif_transpose(img)
+    aspect = img.width / img.height
+    pixels = list(img.convert('L').resize((9, 8), Image.Resampling.LANCZOS).getdata())
+
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            value = (value << 1) | (left > right)
+    return value, aspect
+
+
+def _signed(value: int) -> int:
+    """SQLite integers are signed 64-bit"""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _bands(value: int) -> list:
+    return [(value >> (i * BAND_BITS)) & BAND_MASK for i in range(BANDS)]
+
+
+class VisionCache:
+    """
+    Persistent cache of vision analyses.
+
+    Lives in SQLite so results survive restarts and are shared by worker
+    processes. By default only the same file (SHA-256 of the upload) is a
+    hit. With ``max_distance`` > 0, a re-encoded, resized or recompressed
+    copy also matches: any stored perceptual hash within ``max_distance``
+    bits (Hamming) and with the same aspect ratio. That is opt-in because
+    distinct photos shot alike (headshots on one backdrop) can land that
+    close, and would then share a description and face box. Entries expire
+    after ``ttl_seconds``; beyond ``max_entries`` the least recently used
+    are dropped.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 30 * 24 * 3600, max_entries: int = 10000, max_distance: int = 0):
+        db_path = Path(path).expanduser()
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db_path = str(db_path)
+        self._ttl = ttl_seconds
+        self._max_entries = max(1, max_entries)
+        self._max_distance = max(0, max_distance)
+        self._lock = threading.Lock()
+        self._entries = 0
+        self._exact_hits = 0
+        self._near_hits = 0
+        self._misses = 0
+        self._tokens_saved = 0
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self._db_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _init_db(self):
+        band_columns = ", ".join(f"band{i} INTEGER NOT NULL" for i in range(BANDS))
+        conn = self._connect()
+        try:
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(vision_results)")}
+            if columns and "sha" not in columns:
+                # Keyed by perceptual hash only; it is a cache, start over
+                conn.execute("DROP TABLE vision_results")
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS vision_results (
+                    sha TEXT PRIMARY KEY,
+                    phash INTEGER NOT NULL,
+                    aspect REAL NOT NULL,
+                    {band_columns},
+                    result TEXT NOT NULL,
+                    tokens INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            for i in range(BANDS):
+                conn.execute(f"CREATE INDEX IF NOT EXISTS vision_results_band{i} ON vision_results (band{i})")
+            self._entries = conn.execute("SELECT COUNT(*) FROM vision_results").fetchone()[0]
+        finally:
+            conn.close()
+
+    def _near_match(self, conn: sqlite3.Connection, phash: int, aspect: float, expired_before: float) -> Optional[tuple]:
+        """Closest stored entry within max_distance bits and the same aspect ratio"""
+        if self._max_distance < BANDS:
+            where = " OR ".join(f"band{i} = ?" for i in range(BANDS))
+            rows = conn.execute(
+                f"SELECT sha, phash, aspect, result, tokens FROM vision_results WHERE ({where}) AND created_at > ?",
+                (*_bands(phash), expired_before)
+            ).fetchall()
+        else:
+            rows = conn.execute(
+                "SELECT sha, phash, aspect, result, tokens FROM vision_results WHERE created_at > ?",
+                (expired_before,)
+            ).fetchall()
+
+        best = None
+        for sha, stored, stored_aspect, result, tokens in rows:
+            distance = bin((stored ^ _signed(phash)) & ((1 << 64) - 1)).count("1")
+            if distance > self._max_distance or abs(stored_aspect - aspect) > MAX_ASPECT_DIFFERENCE * aspect:
+                continue
+            if best is None or distance < best[0]:
+                best = (distance, sha, result, tokens)
+        return best and best[1:]
+
+    def _lookup(self, sha: str, image_data: bytes) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        expired_before = now - self._ttl
+        conn = self._connect()
+        try:
+            match = conn.execute(
+                "SELECT sha, result, tokens FROM vision_results WHERE sha = ? AND created_at > ?",
+                (sha, expired_before)
+            ).fetchone()
+            exact = match is not None
+            if not exact and self._max_distance > 0:
+                match = self._near_match(conn, *dhash(image_data), expired_before)
+
+            if match is None:
+                with self._lock:
+                    self._misses += 1
+                return None
+
+            stored, result, tokens = match
+            conn.execute("UPDATE vision_results SET last_used = ? WHERE sha = ?", (now, stored))
+            with self._lock:
+                if exact:
+                    self._exact_hits += 1
+                else:
+                    self._near_hits += 1
+                self._tokens_saved += tokens
+            return json.loads(result)
+        finally:
+            conn.close()
+
+    def _store(self, sha: str, image_data: bytes, result: Dict[str, Any], tokens: int):
+        phash, aspect = dhash(image_data)
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                f"INSERT OR REPLACE INTO vision_results VALUES (?, ?, ?, {', '.join('?' * BANDS)}, ?, ?, ?, ?)",
+                (sha, _signed(phash), aspect, *_bands(phash), json.dumps(result), tokens, now, now)
+            )
+            conn.execute("DELETE FROM vision_results WHERE created_at <= ?", (now - self._ttl,))
+            conn.execute(
+                "DELETE FROM vision_results WHERE sha IN ("
+                "SELECT sha FROM vision_results ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self._max_entries,)
+            )
+            entries = conn.execute("SELECT COUNT(*) FROM vision_results").fetchone()[0]
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        with self._lock:
+            self._entries = entries
+
+    async def get(self, image_data: bytes) -> Optional[Dict[str, Any]]:
+        """Cached analysis of this image (or, if enabled, a near-duplicate)"""
+        sha = hashlib.sha256(image_data).hexdigest()
+        return await asyncio.to_thread(self._lookup, sha, image_data)
+
+    async def put(self, image_data: bytes, result: Dict[str, Any], tokens: int = 0):
+        """Store an analysis; ``tokens`` is what the call cost, reported as saved on hits"""
+        sha = hashlib.sha256(image_data).hexdigest()
+        await asyncio.to_thread(self._store, sha, image_data, result, tokens)
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self._exact_hits + self._near_hits
+            lookups = hits + self._misses
+            return {
+                # As of this process's last write; other workers share the file
+                "entries": self._entries,
+                "max_entries": self._max_entries,
+                "ttl_seconds": self._ttl,
+                "max_distance": self._max_distance,
+                "exact_hits": self._exact_hits,
+                "near_hits": self._near_hits,
+                "misses": self._misses,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "calls_avoided": hits,
+                "tokens_saved": self._tokens_saved,
+            }
@@ -0,0 +1,7 @@
+import os
+import sys
+from pathlib import Path
+
+# Tests import the app's modules the way main.py does, from backend/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("OPENAI_API_KEY", "test")
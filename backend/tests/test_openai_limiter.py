@@ -0,0 +1,268 @@
+import asyncio
+import json
+import time
+
+import httpx
+import openai
+import pytest
+
+from services import openai_limiter
+from services.openai_limiter import CircuitBreaker, OpenAILimiter, TokenBudget, VisionUnavailableError
+
+REQUEST = httpx.Request("POST", "https://api.openai.test/v1/chat/completions")
+
+
+def _status_error(status: int, retry_after: str = None) -> openai.APIStatusError:
+    headers = {"retry-after": retry_after} if retry_after is not None else {}
+    response = httpx.Response(status, headers=headers, request=REQUEST)
+    error = openai.RateLimitError if status == 429 else openai.APIStatusError
+    return error(f"status {status}", response=response, body=None)
+
+
+class Upstream:
+    """Stub call: raises the queued errors in turn, then returns "ok\""""
+
+    def __init__(self, *errors: BaseException):
+        self.errors = list(errors)
+        self.timeouts = []
+
+    async def __call__(self, timeout: float) -> str:
+        self.timeouts.append(timeout)
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record backoff sleeps instead of waiting them out"""
+    real_sleep = asyncio.sleep
+    recorded = []
+
+    async def sleep(delay, *args, **kwargs):
+        recorded.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr(openai_limiter.asyncio, "sleep", sleep)
+    return recorded
+
+
+# Circuit breaker
+
+def test_breaker_opens_after_consecutive_failures(sleeps):
+    limiter = OpenAILimiter(max_attempts=1, breaker_threshold=3, breaker_reset=60)
+
+    async def run():
+        for _ in range(3):
+            with pytest.raises(openai.APIStatusError):
+                await limiter.call(Upstream(_status_error(500)))
+        upstream = Upstream()
+        with pytest.raises(VisionUnavailableError) as refused:
+            await limiter.call(upstream)
+        return upstream, refused.value
+
+    upstream, refused = asyncio.run(run())
+    assert refused.outcome == "circuit_open"
+    assert upstream.timeouts == []
+    stats = limiter.stats()
+    assert stats["circuit"] == CircuitBreaker.OPEN and stats["degraded"]
+    assert stats["circuit_opened"] == 1
+    assert stats["outcomes"] == {"server_error": 3, "circuit_open": 1}
+
+
+def test_success_resets_the_failure_count(sleeps):
+    limiter = OpenAILimiter(max_attempts=1, breaker_threshold=2)
+
+    async def run():
+        for upstream in (Upstream(_status_error(503)), Upstream(), Upstream(_status_error(503))):
+            try:
+                await limiter.call(upstream)
+            except openai.APIStatusError:
+                pass
+
+    asyncio.run(run())
+    assert limiter.stats()["circuit"] == CircuitBreaker.CLOSED
+
+
+def test_client_errors_leave_the_breaker_closed(sleeps):
+    limiter = OpenAILimiter(max_attempts=4, breaker_threshold=1)
+    upstream = Upstream(_status_error(400))
+
+    with pytest.raises(openai.APIStatusError):
+        asyncio.run(limiter.call(upstream))
+    # Not retried, and says nothing about upstream health
+    assert len(upstream.timeouts) == 1 and sleeps == []
+    assert limiter.stats()["circuit"] == CircuitBreaker.CLOSED
+
+
+def test_half_open_probe_success_closes_the_circuit(sleeps):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # Exactly one probe goes out
+    assert breaker.allow() and not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+
+
+def test_half_open_probe_failure_reopens_the_circuit(sleeps):
+    limiter = OpenAILimiter(max_attempts=1, breaker_threshold=1, breaker_reset=0.05)
+
+    async def run():
+        with pytest.raises(openai.APIStatusError):
+            await limiter.call(Upstream(_status_error(500)))
+        await asyncio.get_running_loop().run_in_executor(None, time.sleep, 0.06)
+        assert limiter.stats()["circuit"] == CircuitBreaker.HALF_OPEN
+
+        with pytest.raises(openai.APIStatusError):
+            await limiter.call(Upstream(_status_error(500)))
+
+    asyncio.run(run())
+    assert limiter.stats()["circuit"] == CircuitBreaker.OPEN
+    assert limiter.stats()["circuit_opened"] == 2
+
+
+def test_half_open_lets_a_successful_probe_through(sleeps):
+    limiter = OpenAILimiter(max_attempts=1, breaker_threshold=1, breaker_reset=0.05)
+
+    async def run():
+        with pytest.raises(openai.APIStatusError):
+            await limiter.call(Upstream(_status_error(502)))
+        await asyncio.get_running_loop().run_in_executor(None, time.sleep, 0.06)
+        return await limiter.call(Upstream())
+
+    assert asyncio.run(run()) == "ok"
+    assert limiter.stats()["circuit"] == CircuitBreaker.CLOSED
+    assert not limiter.degraded
+
+
+# Retries
+
+def test_retry_after_is_honoured(sleeps):
+    limiter = OpenAILimiter(max_attempts=3, deadline=60)
+    upstream = Upstream(_status_error(429, retry_after="7"))
+
+    assert asyncio.run(limiter.call(upstream)) == "ok"
+    # Retry-After is above the first attempt's 0.5 s jitter ceiling
+    assert sleeps == [7.0]
+    assert limiter.stats()["outcomes"] == {"ok_after_retry": 1}
+    assert limiter.stats()["retries"] == 1
+
+
+def test_retry_after_beyond_the_deadline_is_not_waited_for(sleeps):
+    limiter = OpenAILimiter(max_attempts=3, deadline=5, breaker_threshold=5)
+    upstream = Upstream(_status_error(429, retry_after="30"))
+
+    with pytest.raises(openai.RateLimitError):
+        asyncio.run(limiter.call(upstream))
+    assert len(upstream.timeouts) == 1 and sleeps == []
+    assert limiter.stats()["outcomes"] == {"rate_limited": 1}
+
+
+def test_jittered_backoff_is_capped_and_attempts_are_limited(sleeps, monkeypatch):
+    # Always draw the top of the jitter range
+    monkeypatch.setattr(openai_limiter.random, "uniform", lambda low, high: high)
+    limiter = OpenAILimiter(max_attempts=7, deadline=600, breaker_threshold=100)
+    upstream = Upstream(*(_status_error(503) for _ in range(10)))
+
+    with pytest.raises(openai.APIStatusError):
+        asyncio.run(limiter.call(upstream))
+    assert len(upstream.timeouts) == 7
+    assert sleeps == [0.5, 1.0, 2.0, 4.0, 8.0, 8.0]
+    assert limiter.stats()["attempts"] == 7 and limiter.stats()["retries"] == 6
+
+
+def test_jitter_stays_within_the_backoff(sleeps):
+    limiter = OpenAILimiter(max_attempts=5, deadline=600, breaker_threshold=100)
+    for _ in range(20):
+        asyncio.run(limiter.call(Upstream(*(_status_error(500) for _ in range(4)))))
+
+    ceilings = [0.5, 1.0, 2.0, 4.0] * 20
+    assert len(sleeps) == len(ceilings)
+    assert all(0 <= delay <= ceiling for delay, ceiling in zip(sleeps, ceilings))
+    # Full jitter: not every caller waits the same
+    assert len(set(sleeps)) > 4
+
+
+def test_backoff_does_not_hold_a_slot(monkeypatch):
+    limiter = OpenAILimiter(max_in_flight=1, max_attempts=2, deadline=60)
+    in_flight_while_sleeping = []
+
+    async def sleep(delay, *args, **kwargs):
+        in_flight_while_sleeping.append(limiter.stats()["in_flight"])
+
+    monkeypatch.setattr(openai_limiter.asyncio, "sleep", sleep)
+    assert asyncio.run(limiter.call(Upstream(_status_error(500)))) == "ok"
+    assert in_flight_while_sleeping == [0]
+
+
+# Token budget
+
+def test_token_budget_refuses_what_cannot_arrive_before_the_deadline():
+    async def run():
+        budget = TokenBudget(tokens_per_minute=600)
+        assert await budget.reserve(600, time.monotonic() + 1) == 600
+        # 10 tokens/s: 100 more need ~10 s
+        with pytest.raises(VisionUnavailableError) as refused:
+            await budget.reserve(100, time.monotonic() + 1)
+        assert refused.value.outcome == "budget_exhausted"
+
+        # Unused tokens of a reservation go back
+        budget.settle(600, 200)
+        assert budget.available >= 400
+
+    asyncio.run(run())
+
+
+# Against the real OpenAI client, over a mock transport
+
+def test_openai_client_rate_limit_then_success(sleeps):
+    responses = [
+        httpx.Response(429, headers={"retry-after": "2"}, json={"error": {"message": "Rate limit reached"}}),
+        httpx.Response(200, json={
+            "id": "chatcmpl-1",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "gpt-4o",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "A portrait"},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 90, "completion_tokens": 10, "total_tokens": 100},
+        }),
+    ]
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(json.loads(request.content))
+        return responses.pop(0)
+
+    async def run():
+        client = openai.AsyncOpenAI(
+            api_key="test",
+            base_url="https://api.openai.test/v1",
+            max_retries=0,
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        )
+        limiter = OpenAILimiter(max_attempts=3, tokens_per_minute=10000, deadline=60)
+        response = await limiter.call(
+            lambda timeout: client.chat.completions.create(
+                model="gpt-4o", messages=[{"role": "user", "content": "Describe"}], timeout=timeout
+            ),
+            estimated_tokens=500,
+            used_tokens=lambda r: r.usage.total_tokens,
+        )
+        await client.close()
+        return limiter, response
+
+    limiter, response = asyncio.run(run())
+    assert response.choices[0].message.content == "A portrait"
+    assert len(requests) == 2 and sleeps == [2.0]
+    stats = limiter.stats()
+    assert stats["outcomes"] == {"ok_after_retry": 1}
+    # Settled with actual usage: the 500-token estimate is not kept
+    assert stats["tokens_available"] >= 9900
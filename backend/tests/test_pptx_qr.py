@@ -0,0 +1,57 @@
+import io
+
+from pptx import Presentation
+from pptx.util import Inches
+
+from services.exporters.pptx_exporter import PPTXExporter
+from services.exporters.qr import build_matrix, qr_cache
+
+URL = "https://example.com/research/2024/some-article"
+
+
+def _qr_shape(url=URL):
+    exporter = PPTXExporter()
+    prs = Presentation()
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    exporter._add_qr_code(slide, url, left=1.0, top=2.0, size=1.5)
+    # Round-trip so the test sees what PowerPoint would read
+    buffer = io.BytesIO()
+    prs.save(buffer)
+    slide = Presentation(io.BytesIO(buffer.getvalue())).slides[0]
+    return next(shape for shape in slide.shapes if shape.name == "QR code")
+
+
+def _points(element):
+    return [(int(pt.get("x")), int(pt.get("y"))) for pt in element.xpath("./a:pt")]
+
+
+def test_qr_shape_geometry():
+    shape = _qr_shape()
+    assert (shape.left, shape.top) == (Inches(1.0), Inches(2.0))
+    assert (shape.width, shape.height) == (Inches(1.5), Inches(1.5))
+
+    modules, rects = qr_cache.rectangles(URL)
+    (path,) = shape.element.xpath("./p:spPr/a:custGeom/a:pathLst/a:path")
+    assert (int(path.get("w")), int(path.get("h"))) == (modules, modules)
+    assert len(path.xpath("./a:close")) == len(rects)
+
+
+def test_qr_path_covers_exactly_the_dark_modules():
+    shape = _qr_shape()
+    matrix = build_matrix(URL)
+    (path,) = shape.element.xpath("./p:spPr/a:custGeom/a:pathLst/a:path")
+
+    covered = [[False] * len(matrix) for _ in matrix]
+    for move in path.xpath("./a:moveTo"):
+        corners = _points(move) + [
+            point for line in move.itersiblings() if line.tag.endswith("lnTo")
+            for point in _points(line)
+        ][:3]
+        xs = [x for x, _ in corners]
+        ys = [y for _, y in corners]
+        for y in range(min(ys), max(ys)):
+            for x in range(min(xs), max(xs)):
+                assert not covered[y][x], "rectangles overlap"
+                covered[y][x] = True
+
+    assert covered == [list(row) for row in matrix]
@@ -0,0 +1,185 @@
+import asyncio
+import time
+
+import pytest
+
+from services import session_store
+from services.blob_store import blob_digest
+from services.session_store import (
+    MemorySessionStore, RedisSessionStore, SessionTooLargeError, SQLiteSessionStore
+)
+
+IMAGE = b"\xff\xd8" + b"portrait" * 1000
+OTHER_IMAGE = b"\xff\xd8" + b"landscape" * 1000
+
+
+def _session(image: bytes = IMAGE, headline: str = "Headline") -> dict:
+    return {"headline": headline, "image_data": image, "image_type": "image/jpeg"}
+
+
+def _blob_files(store: SQLiteSessionStore) -> list:
+    return sorted(path.name for path in store.blobs.root.glob("*/*") if not path.name.startswith("."))
+
+
+# SQLite
+
+def test_sqlite_round_trip_across_instances(tmp_path):
+    writer = SQLiteSessionStore(str(tmp_path))
+    reader = SQLiteSessionStore(str(tmp_path))
+    writer._put("s1", _session())
+
+    assert reader._get("s1") == _session()
+    assert reader._get("missing") is None
+    assert reader.stats()["hits"] == 1 and reader.stats()["misses"] == 1
+
+
+def test_sqlite_shared_upload_is_stored_once(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path))
+    store._put("s1", _session(headline="One"))
+    store._put("s2", _session(headline="Two"))
+    assert _blob_files(store) == [blob_digest(IMAGE)]
+
+    store._delete("s1")
+    assert store._get("s2")["image_data"] == IMAGE
+    store._delete("s2")
+    assert _blob_files(store) == []
+    assert store.stats()["entries"] == 0 and store.stats()["blobs"] == 0
+
+
+def test_sqlite_replacing_a_session_frees_its_old_blob(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path))
+    store._put("s1", _session(IMAGE))
+    store._put("s1", _session(OTHER_IMAGE))
+    assert store._get("s1")["image_data"] == OTHER_IMAGE
+    assert _blob_files(store) == [blob_digest(OTHER_IMAGE)]
+
+
+def test_sqlite_expiry(tmp_path, monkeypatch):
+    store = SQLiteSessionStore(str(tmp_path), ttl_seconds=60)
+    store._put("s1", _session())
+    now = time.time()
+
+    # Reading refreshes the TTL
+    monkeypatch.setattr(session_store.time, "time", lambda: now + 50)
+    assert store._get("s1") is not None
+    monkeypatch.setattr(session_store.time, "time", lambda: now + 100)
+    assert store._get("s1") is not None
+
+    monkeypatch.setattr(session_store.time, "time", lambda: now + 200)
+    assert store._get("s1") is None
+    # The next write purges it and its blob
+    store._put("s2", _session(OTHER_IMAGE))
+    assert store.stats()["expirations"] == 1
+    assert _blob_files(store) == [blob_digest(OTHER_IMAGE)]
+
+
+def test_sqlite_evicts_least_recently_used(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path), max_entries=2)
+    store._put("s1", _session(headline="One"))
+    store._put("s2", _session(headline="Two"))
+    store._get("s1")
+    store._put("s3", _session(headline="Three"))
+
+    assert store._get("s2") is None
+    assert store._get("s1") is not None and store._get("s3") is not None
+    assert store.stats()["evictions"] == 1
+
+
+def test_sqlite_rollback_keeps_blob_files_consistent(tmp_path, monkeypatch):
+    store = SQLiteSessionStore(str(tmp_path))
+    store._put("s1", _session(IMAGE))
+
+    def fail(conn):
+        raise RuntimeError("failed before commit")
+
+    # Replacing s1 frees IMAGE and writes OTHER_IMAGE, then the transaction fails
+    monkeypatch.setattr(store, "_usage", fail)
+    with pytest.raises(RuntimeError):
+        store._put("s1", _session(OTHER_IMAGE))
+    monkeypatch.undo()
+
+    assert _blob_files(store) == [blob_digest(IMAGE)]
+    assert store._get("s1")["image_data"] == IMAGE
+
+
+def test_oversized_session_is_rejected(tmp_path):
+    with pytest.raises(SessionTooLargeError):
+        SQLiteSessionStore(str(tmp_path), max_bytes=1000)._put("s1", _session())
+    with pytest.raises(SessionTooLargeError):
+        asyncio.run(MemorySessionStore(max_bytes=1000).put("s1", _session()))
+
+
+# Redis, against an in-process fake server
+
+@pytest.fixture
+def redis_store(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    if session_store.redis_asyncio is None:
+        pytest.skip("redis is not installed")
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        session_store.redis_asyncio, "from_url",
+        lambda url: fakeredis.aioredis.FakeRedis(server=server)
+    )
+    return lambda **kwargs: RedisSessionStore("redis://test", **kwargs)
+
+
+def test_redis_round_trip_and_shared_upload(redis_store):
+    async def run():
+        store = redis_store(ttl_seconds=100)
+        await store.put("s1", _session(headline="One"))
+        await store.put("s2", _session(headline="Two"))
+
+        assert await store.get("s1") == _session(headline="One")
+        assert await store.get("missing") is None
+        assert len(await store._redis.keys(store._blob_key("*"))) == 1
+
+        # The blob outlives a deleted session that shared it
+        await store.delete("s1")
+        assert await store.get("s1") is None
+        assert (await store.get("s2"))["image_data"] == IMAGE
+        assert store.stats()["hits"] == 2 and store.stats()["misses"] == 2
+        await store.close()
+
+    asyncio.run(run())
+
+
+def test_redis_blob_is_written_once(redis_store):
+    async def run():
+        store = redis_store()
+        await store.put("s1", _session())
+        key = store._blob_key(blob_digest(IMAGE))
+        # Prove SET NX: a second put must not overwrite the stored bytes
+        await store._redis.set(key, b"sentinel", keepttl=True)
+        await store.put("s2", _session())
+        assert await store._redis.get(key) == b"sentinel"
+        await store.close()
+
+    asyncio.run(run())
+
+
+def test_redis_ttl_refresh_and_expiry(redis_store):
+    async def run():
+        store = redis_store(ttl_seconds=100)
+        await store.put("s1", _session())
+        session_key = store._session_key("s1")
+        blob_key = store._blob_key(blob_digest(IMAGE))
+
+        # Reading refreshes both the session's and its blob's TTL
+        await store._redis.expire(session_key, 5)
+        await store._redis.expire(blob_key, 5)
+        assert await store.get("s1") is not None
+        assert await store._redis.ttl(session_key) > 5
+        assert await store._redis.ttl(blob_key) > 5
+
+        # A session whose blob expired is a miss, not a session without its image
+        await store._redis.pexpire(blob_key, 1)
+        await asyncio.sleep(0.01)
+        assert await store.get("s1") is None
+
+        await store._redis.pexpire(session_key, 1)
+        await asyncio.sleep(0.01)
+        assert not await store._redis.exists(session_key)
+        await store.close()
+
+    asyncio.run(run())
@@ -0,0 +1,53 @@
+"""
+Incremental ZIP writer for streaming responses.
+"""
+import zipfile
+
+
+class _ChunkBuffer:
+    """
+    Write-only sink that hands back whatever was written since the last drain.
+
+    It deliberately has no seek()/tell(), so zipfile treats it as a
+    non-seekable stream and writes data descriptors instead of going back to
+    patch local headers.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class ZipStreamWriter:
+    """
+    Build a ZIP archive entry by entry, returning the bytes for each entry as
+    soon as it is added so they can be streamed to the client.
+
+    Entries are stored uncompressed: slide images and PPTX files are already
+    compressed, so deflating them again only costs CPU.
+    """
+
+    def __init__(self, compression: int = zipfile.ZIP_STORED):
+        self._buffer = _ChunkBuffer()
+        self._archive = zipfile.ZipFile(self._buffer, mode="w", compression=compression)
+
+    def add(self, name: str, data: bytes) -> bytes:
+        """Add a file and return the archive bytes produced for it"""
+        self._archive.writestr(name, data)
+        return self._buffer.drain()
+
+    def close(self) -> bytes:
+        """Finish the archive and return the central directory bytes"""
+        self._archive.close()
+        return self._buffer.drain()
@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import {
   FullHeroLayout,
   SplitTextPrimaryLayout,
@@ -17,6 +17,11 @@ import {
  *
  * Data is passed via window.__SLIDE_DATA__ (injected by Playwright)
  *
+ * The page is reused by the backend page pool: window.__setSlideData__ may be
+ * called many times, and window.__resetSlide__ clears the previous slide.
+ * Each payload carries a renderId that is echoed on the container so the
+ * exporter can wait for *its* render rather than a stale one.
+ *
  * IMPORTANT: All sizes are in pixels, scaled for 1920x1080 output
  */
 
@@ -51,9 +56,22 @@ function SlideRender() {
   const [slideData, setSlideData] = useState(null)
   const [imageUrl, setImageUrl] = useState(null)
   const [ready, setReady] = useState(false)
+  const [renderId, setRenderId] = useState(null)
+  const imageUrlRef = useRef(null)
+
+  const releaseImageUrl = () => {
+    if (imageUrlRef.current) {
+      URL.revokeObjectURL(imageUrlRef.current)
+      imageUrlRef.current = null
+    }
+  }
 
   // Function to process slide data
   const processSlideData = (decoded) => {
+    releaseImageUrl()
+    setReady(false)
+    setImageUrl(null)
+    setRenderId(decoded.renderId ?? null)
     setSlideData(decoded)
 
     // If there's image data (base64), convert to blob URL
@@ -65,13 +83,19 @@ function SlideRender() {
       }
       const byteArray = new Uint8Array(byteNumbers)
       const blob = new Blob([byteArray], { type: 'image/jpeg' })
-      setImageUrl(URL.createObjectURL(blob))
+      imageUrlRef.current = URL.createObjectURL(blob)
+      setImageUrl(imageUrlRef.current)
     }
-
-    // Mark as ready after a short delay to ensure rendering is complete
-    setTimeout(() => setReady(true), 100)
   }
 
+  // Mark as ready on the first frame after the slide has been committed.
+  // Font loading and image decoding are awaited by the exporter itself.
+  useEffect(() => {
+    if (!slideData) return
+    const frame = requestAnimationFrame(() => setReady(true))
+    return () => cancelAnimationFrame(frame)
+  }, [slideData, imageUrl])
+
   useEffect(() => {
     // Check if data is already available (injected by Playwright)
     if (window.__SLIDE_DATA__) {
@@ -84,12 +108,22 @@ function SlideRender() {
       processSlideData(data)
     }
 
+    // Clear the current slide so a pooled page can be handed to the next export
+    window.__resetSlide__ = () => {
+      releaseImageUrl()
+      setImageUrl(null)
+      setSlideData(null)
+      setRenderId(null)
+      setReady(false)
+    }
+
     // Signal that we're ready to receive data
     window.__SLIDE_RENDER_READY__ = true
 
     return () => {
-      if (imageUrl) URL.revokeObjectURL(imageUrl)
+      releaseImageUrl()
       delete window.__setSlideData__
+      delete window.__resetSlide__
       delete window.__SLIDE_RENDER_READY__
     }
   }, [])
@@ -160,6 +194,7 @@ function SlideRender() {
     <div
       id="slide-render-container"
       data-status={ready ? 'ready' : 'loading'}
+      data-render-id={renderId ?? ''}
       style={{
         position: 'relative',
         width: '1920px',
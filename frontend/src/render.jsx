@@ -0,0 +1,10 @@
+import React from 'react'
+import ReactDOM from 'react-dom/client'
+import SlideRender from './components/SlideRender.jsx'
+import './index.css'
+import './render-fonts.css'
+
+// Standalone entry for the prebuilt render bundle (npm run build:render).
+// The backend loads this bundle into headless Chromium directly, so it only
+// mounts SlideRender and skips the app shell, router and StrictMode.
+ReactDOM.createRoot(document.getElementById('root')).render(<SlideRender />)
@@ -0,0 +1,23 @@
+import { defineConfig } from 'vite'
+import react from '@vitejs/plugin-react'
+import { fileURLToPath } from 'url'
+
+// Standalone build of the slide render route for the backend's browser
+// exporter. Everything (including fonts) is inlined into one JS and one CSS
+// file so the bundle can be served from disk without the Vite dev server.
+export default defineConfig({
+  plugins: [react()],
+  base: './',
+  publicDir: false,
+  build: {
+    outDir: 'dist-render',
+    emptyOutDir: true,
+    sourcemap: false,
+    minify: 'terser',
+    cssCodeSplit: false,
+    assetsInlineLimit: 10 * 1024 * 1024,
+    rollupOptions: {
+      input: fileURLToPath(new URL('./render.html', import.meta.url))
+    }
+  }
+})